@@ -16,19 +16,194 @@ Author: [Mikkel Bentsen-Petersen]
 Date: [2025-03-25]
 """
 
+import argparse
+import contextlib
+import json
+import sys
+import threading
+from collections import deque
 from datetime import datetime
 
+from library_holds import DUE, HOLD_EXPIRY, Hold, HoldTable, Notice, Scheduler
+from library_loans import Loan, LoanTable
+from library_search import SearchIndex
+from library_transactions import BORROW, BORROW_EBOOK, RETURN, Transaction, TransactionLog
+
+NO_LOCK = contextlib.nullcontext()                                           # Stands in for a lock when the library is not thread-safe.
+DAY = 86400                                                                  # Seconds in a day
+LOAN_DAYS = 14                                                               # Days a book may be kept before it is overdue
+HOLD_DAYS = 3                                                                # Days a member has to collect a book set aside for their hold
+
+
+# Class for everything that can go wrong when using the library. The message explains what happened.
+class LibraryError(Exception):
+    pass
+
+
+# Class for a book ID that is not in the library.
+class BookNotFoundError(LibraryError):
+    def __init__(self, book_id):
+        super().__init__(book_id)
+        self.book_id = book_id
+
+    def __str__(self):
+        return f"Book with ID {self.book_id} not found."
+
+
+# Class for a member ID that is not in the library.
+class MemberNotFoundError(LibraryError):
+    def __init__(self, member_id):
+        super().__init__(member_id)
+        self.member_id = member_id
+
+    def __str__(self):
+        return f"Member with ID {self.member_id} not found."
+
+
+# Class for adding a book or member with an ID that is already used.
+class DuplicateIdError(LibraryError):
+    def __init__(self, kind, record_id):                                     # kind is "Book/Ebook" or "Member".
+        super().__init__(kind, record_id)
+        self.kind = kind
+        self.record_id = record_id
+
+    def __str__(self):
+        return f"{self.kind} with ID: {self.record_id} already exists"
+
+
+# Class for borrowing a book that has no copies left.
+class NotAvailableError(LibraryError):
+    def __init__(self, book_id, title):
+        super().__init__(book_id, title)
+        self.book_id = book_id
+        self.title = title
+
+    def __str__(self):
+        return f"Sorry, '{self.title}' is not available."
+
+
+# Class for borrowing a book the member already has.
+class AlreadyBorrowedError(LibraryError):
+    def __init__(self, member_id, name, book_id, title):
+        super().__init__(member_id, name, book_id, title)
+        self.member_id = member_id
+        self.book_id = book_id
+        self.name = name
+        self.title = title
+
+    def __str__(self):
+        return f"{self.name} already has '{self.title}' borrowed."
+
+
+# Class for removing a book that members still have borrowed.
+class BookOnLoanError(LibraryError):
+    def __init__(self, book_id, title, borrowers):
+        super().__init__(book_id, title, borrowers)
+        self.book_id = book_id
+        self.title = title
+        self.borrowers = borrowers                                           # Number of members who have the book
+
+    def __str__(self):
+        return f"Book '{self.title}' cannot be removed while {self.borrowers} member(s) have it borrowed."
+
+
+# Class for removing a member who still has books borrowed.
+class MemberHasLoansError(LibraryError):
+    def __init__(self, member_id, name, loans):
+        super().__init__(member_id, name, loans)
+        self.member_id = member_id
+        self.name = name
+        self.loans = loans                                                   # Number of books the member has borrowed
+
+    def __str__(self):
+        return f"Member '{self.name}' cannot be removed while they have {self.loans} book(s) borrowed."
+
+
+# Class for returning a book the member has not borrowed.
+class NotBorrowedError(LibraryError):
+    def __init__(self, member_id, name, book_id, title):
+        super().__init__(member_id, name, book_id, title)
+        self.member_id = member_id
+        self.book_id = book_id
+        self.name = name
+        self.title = title
+
+    def __str__(self):
+        return f"{self.name} does not have '{self.title}' borrowed."
+
+
+# Class for placing a hold on a book that can be borrowed right away.
+class HoldNotNeededError(LibraryError):
+    def __init__(self, book_id, title):
+        super().__init__(book_id, title)
+        self.book_id = book_id
+        self.title = title
+
+    def __str__(self):
+        return f"'{self.title}' is available; borrow it instead of placing a hold."
+
+
+# Class for placing a second hold on the same book.
+class AlreadyOnHoldError(LibraryError):
+    def __init__(self, member_id, name, book_id, title):
+        super().__init__(member_id, name, book_id, title)
+        self.member_id = member_id
+        self.book_id = book_id
+        self.name = name
+        self.title = title
+
+    def __str__(self):
+        return f"{self.name} already has a hold on '{self.title}'."
+
+
+# Class for cancelling a hold the member does not have.
+class NotOnHoldError(LibraryError):
+    def __init__(self, member_id, name, book_id, title):
+        super().__init__(member_id, name, book_id, title)
+        self.member_id = member_id
+        self.book_id = book_id
+        self.name = name
+        self.title = title
+
+    def __str__(self):
+        return f"{self.name} has no hold on '{self.title}'."
+
+
+# Class for operations the library's storage backend does not offer (holds and due dates in SQLiteLibrary).
+class NotSupportedError(LibraryError):
+    def __init__(self, operation, backend):
+        super().__init__(operation, backend)
+        self.operation = operation
+        self.backend = backend
+
+    def __str__(self):
+        return f"{self.operation} is not supported by {self.backend}."
+
+
+# Function that returns a method of a library, or raises NotSupportedError if its backend does not have it.
+def supported_method(library, operation):
+    method = getattr(library, operation, None)
+    if method is None:
+        raise NotSupportedError(operation, type(library).__name__)
+    return method
+
+
+####################################################################################################################################################################################
+
+
 # Class that represents a physical book in the library.
 class Book:
+    __slots__ = ("book_id", "title", "author", "copies")                # Stores the attributes without a per-object __dict__ to save memory.
+
     def __init__(self, book_id, title, author, copies):  # Initializes a book with ID, title, author, and number of copies.
         self.book_id = book_id                           # Unique identifier for the book
         self.title = title                               # Title of the book
         self.author = author                             # Author of the book
         self.copies = copies                             # Number of copies available in the library
 
-    # Method that displays book details.
-    def display_info(self):
-        print(f"ID: {self.book_id}, Title: {self.title}, Author: {self.author}, Copies: {self.copies}") # Prints the book information.
+    # Method that describes the book in one line.
+    def describe(self):
+        return f"ID: {self.book_id}, Title: {self.title}, Author: {self.author}, Copies: {self.copies}"
 
 
 ####################################################################################################################################################################################
@@ -36,14 +211,16 @@ class Book:
 
 # Class that represents an e-book, inheriting from Book. (Polymorphism)
 class Ebook(Book):
+    __slots__ = ("file_size",)
+
     def __init__(self, book_id, title, author, file_size):                   # Initializes a e-book with extra attributs for file size
         super().__init__(book_id, title, author, copies=None)                # Calls the constructor of the parent class (Book)
         self.file_size = file_size                                           # File size of the e-book in MB
 
-    # Method that displays e-book details.
-    def display_info(self): 
-        print(f"ID: {self.book_id}, Title: {self.title}, Author: {self.author}, File Size: {self.file_size} MB") # Prints the e-book information.
-                                                                             # Overrides the display_info method of the parent class (Book) to include file size.
+    # Method that describes the e-book in one line.
+    def describe(self): 
+        return f"ID: {self.book_id}, Title: {self.title}, Author: {self.author}, File Size: {self.file_size} MB"
+                                                                             # Overrides the describe method of the parent class (Book) to include file size.
 
 
 ####################################################################################################################################################################################
@@ -51,52 +228,97 @@ class Ebook(Book):
 
 # Class that represents a library member.
 class Member:
+    __slots__ = ("member_id", "name", "loan_table", "log")
+
     def __init__(self, member_id, name):  
         self.member_id = member_id     # ID of the member
         self.name = name               # Name of the member
-        self.borrowed_books = []       # List of borrowed books
-        self.transaction_history = []  # List of transaction history
-
-    # Method that displays member details.
-    def display_info(self): 
-        print(f"ID: {self.member_id}, Name: {self.name}, Borrowed Books: {', '.join(self.borrowed_books) if self.borrowed_books else 'None'}") 
-
-    # Method that handles book borrowing.
-    def borrow_book(self, book):
-        if isinstance(book, Ebook):                                          # If the book is an e-book, it cannot be borrowed. 
-            self.borrowed_books.append(book.title)                           # Adds the e-book title to the borrowed books list.
-            transaction_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Formats the current time.
-            self.transaction_history.append(f"Borrowed Ebook '{book.title}' on {transaction_time}") # Adds the transaction to the history.
-            print(f"{self.name} borrowed Ebook '{book.title}'")              # Prints a message that the e-book has been borrowed.
+        self.loan_table = LoanTable()  # Loan table the member's loans are kept in (the library's table once added)
+        self.log = None                # Transaction log the member's transactions are recorded in (the library's log once added)
+
+    # Property that gives the member's loans, keyed by book ID.
+    @property
+    def loans(self):
+        return self.loan_table.of_member(self.member_id)
+
+    # Property that lists the titles of the books the member has borrowed.
+    @property
+    def borrowed_books(self):
+        return [loan.book.title for loan in self.loans.values()]
+
+    # Method that records a transaction in the member's transaction log. Returns the Transaction.
+    def record_transaction(self, operation, book, when):
+        if self.log is None:                                                 # A member outside a library gets a log of its own.
+            self.log = TransactionLog()
+        transaction = Transaction(operation, self.member_id, book.book_id, int((when or datetime.now()).timestamp()))
+        self.log.append(*transaction, book.title)
+        return transaction
+
+    # Property that lists the member's transactions as text.
+    @property
+    def transaction_history(self):
+        if self.log is None:
+            return []
+        return self.log.history(self.member_id)
+
+    # Method that describes the member in one line.
+    def describe(self): 
+        return f"ID: {self.member_id}, Name: {self.name}, Borrowed Books: {', '.join(self.borrowed_books) if self.borrowed_books else 'None'}"
+
+    # Method that handles book borrowing. Returns the Transaction, or raises AlreadyBorrowedError or NotAvailableError.
+    def borrow_book(self, book, when=None):                                  # "when" is the time of the transaction (defaults to now).
+        if book.book_id in self.loans:                                       # A member can have one copy of a book at a time.
+            raise AlreadyBorrowedError(self.member_id, self.name, book.book_id, book.title)
+        if isinstance(book, Ebook):                                          # E-books can always be borrowed.
+            operation = BORROW_EBOOK
         elif book.copies > 0:                                                # Checks if the book is available for borrowing.
             book.copies -= 1                                                 # Decreases the number of copies available.
-            self.borrowed_books.append(book.title)                           # Adds the book title to the borrowed books list.
-            transaction_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  
-            self.transaction_history.append(f"Borrowed '{book.title}' on {transaction_time}")   
-            print(f"{self.name} borrowed '{book.title}'")                    # Prints a message that the book has been borrowed.
-        else:
-            print(f"Sorry, '{book.title}' is not available.")  
-
-    # Method that handles book returning.
-    def return_book(self, book):
-        if book.title in self.borrowed_books:                                # Checks if the book is in the borrowed books list.
-            if not isinstance(book, Ebook):                                  # If the book is not an e-book, increase the number of copies.
-                book.copies += 1                                             # Increases the number of copies available.
-            self.borrowed_books.remove(book.title)                           # Removes the book from the borrowed books list.
-            transaction_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S") 
-            self.transaction_history.append(f"Returned '{book.title}' on {transaction_time}") 
-            print(f"{self.name} returned '{book.title}'")                    # Prints a message that the book has been returned. 
+            operation = BORROW
         else:
-            print(f"{self.name} does not have '{book.title}' borrowed.")     # Checks if the book is borrowed by the member.
-
-    # Method that displays transactions history
-    def display_transaction_history(self):                                   # Displays the transaction history for the member.
-        print(f"\nTransaction History for {self.name}:")                     # Prints the name of the member.
-        if self.transaction_history:                                         # Checks if the member has any transaction history. 
-            for transaction in self.transaction_history:                     # Loops through the transaction history and prints each transaction.
-                print(transaction)
-        else:
-            print("No transaction history.")
+            raise NotAvailableError(book.book_id, book.title)
+        transaction = self.record_transaction(operation, book, when)         # Adds the transaction to the history.
+        self.loan_table.add(Loan(self.member_id, book, transaction.timestamp))
+        return transaction
+
+    # Method that handles book returning. Returns the Transaction, or raises NotBorrowedError.
+    def return_book(self, book, when=None):                                  # "when" is the time of the transaction (defaults to now).
+        if self.loan_table.remove(self.member_id, book.book_id) is None:     # Checks if the book is borrowed by the member.
+            raise NotBorrowedError(self.member_id, self.name, book.book_id, book.title)
+        if not isinstance(book, Ebook):                                      # If the book is not an e-book, increase the number of copies.
+            book.copies += 1                                                 # Increases the number of copies available.
+        return self.record_transaction(RETURN, book, when)
+
+
+####################################################################################################################################################################################
+
+
+# Class that holds several locks at once, taking them in the order given.
+class LockGroup:
+    __slots__ = ("locks",)
+
+    def __init__(self, locks):
+        self.locks = locks
+
+    def __enter__(self):
+        for lock in self.locks:
+            lock.acquire()
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self.locks):
+            lock.release()
+
+
+# Class that hands out locks for keys from a fixed set of locks (lock striping), so unrelated keys rarely share a lock.
+class LockStripes:
+    def __init__(self, count=64):
+        self.locks = [threading.Lock() for _ in range(count)]                # The stripes shared by all keys
+
+    # Method that returns a context holding the locks of several keys at once.
+    def hold(self, *keys):
+        stripes = sorted({hash(key) % len(self.locks) for key in keys})     # Takes the locks in a fixed order so two threads never wait on each other.
+        if len(stripes) == 1:
+            return self.locks[stripes[0]]
+        return LockGroup([self.locks[stripe] for stripe in stripes])
 
 
 ####################################################################################################################################################################################
@@ -104,127 +326,395 @@ class Member:
 
 # Class that manages books and members in the library.
 class Library:
-    def __init__(self):
-        self.books = []                                                      # List of books in the library
-        self.members = []                                                    # List of members in the library
+    def __init__(self, thread_safe=False, lock_stripes=64, loan_days=LOAN_DAYS, hold_days=HOLD_DAYS, clock=datetime.now):  # thread_safe lets several threads use the library at the same time.
+        self.book_index = {}                                                 # Books in the library keyed by book ID (keeps insertion order)
+        self.member_index = {}                                               # Members in the library keyed by member ID (keeps insertion order)
+        self.search_index = SearchIndex()                                    # Index over book titles and authors used by the search methods
+        self.transactions = TransactionLog()                                 # Borrow and return transactions of every member
+        self.loans = LoanTable()                                             # Books borrowed and not yet returned, by member and by book
+        self.holds = HoldTable()                                             # Members waiting for books, by member and by book, with a queue for each book
+        self.scheduler = Scheduler()                                         # Times loans fall due and ready holds expire
+        self.overdue = {}                                                    # Loans found overdue by the scheduler, keyed by (member ID, book ID)
+        self.notices = deque()                                               # Notices (overdue loans, ready and expired holds) not yet taken by process_due
+        self.loan_seconds = loan_days * DAY                                  # Time a book may be kept
+        self.hold_seconds = hold_days * DAY                                  # Time a member has to collect a book set aside for them
+        self.clock = clock                                                   # Gives the current time as a datetime (replaceable in tests)
+        self.listeners = []                                                  # Functions that are told about every change to the library
+        self.stripes = LockStripes(lock_stripes) if thread_safe else None    # Locks for books and members (only in thread-safe mode)
+        self.index_lock = threading.Lock() if thread_safe else NO_LOCK       # Lock for the search index (only in thread-safe mode)
+        self.schedule_lock = threading.Lock() if thread_safe else NO_LOCK    # Lock for the scheduler (only in thread-safe mode)
+
+    # Method that returns a context holding the locks of the given books and members, as ("book", id) and ("member", id) keys.
+    def locked(self, *keys):
+        if self.stripes is None:                                             # Without thread safety no locks are taken.
+            return NO_LOCK
+        return self.stripes.hold(*keys)
+
+    # Method that registers a function to be called after every successful change, as listener(event, *details).
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # Method that tells the listeners about a change.
+    def notify(self, event, *details):
+        for listener in self.listeners:
+            listener(event, *details)
+
+    # Property that lists the books in the order they were added.
+    @property
+    def books(self):
+        return list(self.book_index.values())
+
+    # Property that lists the members in the order they were added.
+    @property
+    def members(self):
+        return list(self.member_index.values())
+
+    # Method that yields the books in the order they were added.
+    def iter_books(self):
+        return iter(self.books if self.stripes else self.book_index.values())  # Iterates over a copy when other threads may add books.
+
+    # Method that yields the members in the order they were added.
+    def iter_members(self):
+        return iter(self.members if self.stripes else self.member_index.values())
+
+    # Method that finds a book by its ID, or returns None.
+    def get_book(self, book_id):
+        return self.book_index.get(book_id)
+
+    # Method that finds a member by its ID, or returns None.
+    def get_member(self, member_id):
+        return self.member_index.get(member_id)
+
+    # Method that adds a book to the catalog and the search index. Returns True if the book was added.
+    def insert_book(self, book):
+        with self.locked(("book", book.book_id)):
+            if book.book_id in self.book_index:                              # Checks if the book already exists in the library.
+                return False
+            self.book_index[book.book_id] = book
+            with self.index_lock:
+                self.search_index.add(book.book_id, book.title, book.author) # Makes the book searchable.
+            self.notify("add_book", book)
+        return True
         
-    # Method that adds a book to the library.
+    # Method that adds a book to the library. Returns the book, or raises DuplicateIdError.
     def add_book(self, book):
-        if any(b.book_id == book.book_id for b in self.books):               # Checks if the book already exists in the library.
-            print(f"Book/Ebook with ID: {book.book_id} already exists") 
-        else:
-            self.books.append(book)
-            print(f"Book/Ebook '{book.title}' added to the library.")
+        if not self.insert_book(book):
+            raise DuplicateIdError("Book/Ebook", book.book_id)
+        return book
 
-    # Method that removes a book.
+    # Method that adds many books at once, skipping IDs that already exist. Returns the number of books added.
+    def add_books(self, books):
+        return sum(self.insert_book(book) for book in books)
+
+    # Method that removes a book. Returns the removed book, or raises BookNotFoundError or BookOnLoanError.
     def remove_book(self, book_id):
-        for book in self.books:                                              # Loops through the list of books to find the book with the given ID.
-            if book.book_id == book_id:                                      # Checks if the book exists in the library.     
-                self.books.remove(book)                                      # Removes the book from the list of books.
-                print(f"Book '{book.title}' removed from the library.")
-                return 
-        print(f"Book with ID {book_id} not found.")
+        with self.locked(("book", book_id)):
+            book = self.book_index.get(book_id)                              # Finds the book with the given ID.
+            if book is None:
+                raise BookNotFoundError(book_id)
+            borrowers = len(self.loans.of_book(book_id))
+            if borrowers:                                                    # Keeps books that members still have to return.
+                raise BookOnLoanError(book_id, book.title, borrowers)
+            del self.book_index[book_id]
+            self.loans.remove_book(book_id)
+            self.holds.remove_book(book_id)                                  # Holds on the book end with it.
+            with self.index_lock:
+                self.search_index.remove(book_id)                            # Removes the book from the search index.
+            self.notify("remove_book", book_id)
+        return book
     
-    # Method that updates a books book_id, title, author and number of copies or file size. 
-    def update_book(self, book_id, title=None, author=None, copies=None, file_size=None): 
-        for book in self.books:                                              # Loops through the list of books to find the book with the given ID.
-            if book.book_id == book_id:                                      # Checks if the book exists in the library.
-                if title:
-                    book.title = title                                       # Updates the title of the book.
-                if author:
-                    book.author = author                                     # Updates the author of the book.
-                if isinstance(book, Ebook):                                  # Checks if the book is an e-book.
-                    if file_size is not None:                                
-                        book.file_size = file_size                           # Updates the file size of the e-book.
-                else:
-                    if copies is not None:   
-                        book.copies = copies                                 # Updates the number of copies of the book.
-
-                print(f"Book '{book_id}' updated successfully.")
-                return
-        print(f"Book with ID {book_id} not found.")
-
-    # Method that adds a member to the library.
+    # Method that updates a books title, author and number of copies or file size. Returns the book, or raises BookNotFoundError.
+    def update_book(self, book_id, title=None, author=None, copies=None, file_size=None, when=None):  # "when" is the time of the change (defaults to now).
+        with self.locked(("book", book_id)):
+            book = self.book_index.get(book_id)                              # Finds the book with the given ID.
+            if book is None:
+                raise BookNotFoundError(book_id)
+            if title:
+                book.title = title                                           # Updates the title of the book.
+            if author:
+                book.author = author                                         # Updates the author of the book.
+            if isinstance(book, Ebook):                                      # Checks if the book is an e-book.
+                if file_size is not None:                                
+                    book.file_size = file_size                               # Updates the file size of the e-book.
+            else:
+                if copies is not None:   
+                    book.copies = copies                                     # Updates the number of copies of the book.
+            when = when or self.clock()
+            if copies is not None:
+                self.fill_holds(book, int(when.timestamp()))                 # New copies go to members waiting for the book first.
+            if title or author:
+                with self.index_lock:
+                    self.search_index.add(book_id, book.title, book.author)  # Re-indexes the new title and author.
+            self.notify("update_book", book_id, title, author, copies, file_size, when)
+        return book
+
+    # Method that adds a member to the library's member registry. Returns True if the member was added.
+    def insert_member(self, member):
+        with self.locked(("member", member.member_id)):
+            if member.member_id in self.member_index:                        # Checks if the member already exists in the library.
+                return False
+            self.member_index[member.member_id] = member                     # Adds the member to the library.
+            self.adopt_log(member)
+            self.adopt_loans(member)
+            self.notify("add_member", member)
+        return True
+
+    # Method that adds a member to the library. Returns the member, or raises DuplicateIdError.
     def add_member(self, member):
-        if any(m.member_id == member.member_id for m in self.members):       # Checks if the member already exists in the library.
-            print(f"Member with ID: {member.member_id} already exists")
-        else:
-            self.members.append(member)                                      # Adds the member to the list of members.
-            print(f"Member '{member.name}' added to the library.")
-
-    # Method that removees a member from the library.
+        if not self.insert_member(member):
+            raise DuplicateIdError("Member", member.member_id)
+        return member
+
+    # Method that makes a new member record transactions in the library's log, keeping any it already has.
+    def adopt_log(self, member):
+        if member.log is not None and member.log is not self.transactions:
+            self.transactions.copy_member(member.log, member.member_id)
+        member.log = self.transactions
+
+    # Method that makes a new member keep their loans in the library's loan table, keeping any they already have.
+    def adopt_loans(self, member):
+        if member.loan_table is not self.loans:
+            for loan in list(member.loans.values()):
+                self.loans.add(loan)
+            member.loan_table = self.loans
+            for loan in member.loans.values():
+                self.track_loan(loan)
+
+    # Method that adds many members at once, skipping IDs that already exist. Returns the number of members added.
+    def add_members(self, members):
+        return sum(self.insert_member(member) for member in members)
+
+    # Method that removees a member from the library. Returns the removed member, or raises MemberNotFoundError or MemberHasLoansError.
     def remove_member(self, member_id): 
-        for member in self.members:                                          # Loops through the list of members to find the member with the given ID.
-            if member.member_id == member_id:                                # Checks if the member exists in the library.
-                self.members.remove(member)                                  # Removes the member from the list of members.
-                print(f"Member '{member.name}' removed from the library.")
-                return
-        print(f"Member with ID {member_id} not found.")
-
-    # Method that updates a members name.
+        self.check_no_loans(member_id)                                       # Checked before the holds are cancelled, so a refused removal changes nothing.
+        for book_id in list(self.holds.of_member(member_id)):                # Cancels the member's holds first, passing copies set aside for them on.
+            self.cancel_hold(member_id, book_id)
+        with self.locked(("member", member_id)):
+            member = self.check_no_loans(member_id)                          # Checked again, in case a book was borrowed meanwhile.
+            del self.member_index[member_id]                                 # Removes the member with the given ID.
+            self.loans.remove_member(member_id)
+            self.notify("remove_member", member_id)
+        return member
+
+    # Method that finds a member who has no books borrowed. Returns the member, or raises MemberNotFoundError or MemberHasLoansError.
+    def check_no_loans(self, member_id):
+        member = self.member_index.get(member_id)
+        if member is None:
+            raise MemberNotFoundError(member_id)
+        loans = len(self.loans.of_member(member_id))
+        if loans:                                                            # Keeps members who still have books to return, so no copy is lost.
+            raise MemberHasLoansError(member_id, member.name, loans)
+        return member
+
+    # Method that updates a members name. Returns the member, or raises MemberNotFoundError.
     def update_member(self, member_id, new_name):
-        for member in self.members:                                          # Loops through the list of members to find the member with the given ID.
-            if member.member_id == member_id:                                # Checks if the member exists in the library.
-                old_name = member.name                                       # Stores the old name of the member.
-                member.name = new_name                                       # Updates the name of the member.
-                print(f"Member '{old_name}' renamed to '{new_name}'.")
-                return
-            print(f"Member with ID {member_id} not found.")
-
-    # Method that displays all books in the library.
-    def display_books(self):
-        print("\nLibrary Books:")
-        for book in self.books:                                              # Loops through the list of books and displays each book's information.
-            if isinstance(book, Ebook):                                      # Checks if the book is an e-book.
-                print("[Ebook] ", end="")                                    # Prints "[Ebook]" before the book information.
+        with self.locked(("member", member_id)):
+            member = self.member_index.get(member_id)                        # Finds the member with the given ID.
+            if member is None:
+                raise MemberNotFoundError(member_id)
+            member.name = new_name                                           # Updates the name of the member.
+            self.notify("update_member", member_id, new_name)
+        return member
+
+    # Method that finds a member and a book by their IDs, raising MemberNotFoundError or BookNotFoundError.
+    def member_and_book(self, member_id, book_id):
+        member = self.member_index.get(member_id)                                    # Finds the member with the given ID.
+        if member is None:
+            raise MemberNotFoundError(member_id)
+        book = self.book_index.get(book_id)                                          # Finds the book with the given ID.
+        if book is None:
+            raise BookNotFoundError(book_id)
+        return member, book
+
+    # Method that allows a member to borrow a book. Returns the Transaction, or raises a LibraryError.
+    def issue_book(self, member_id, book_id, when=None):                            # "when" is the time of the transaction (defaults to now).
+        with self.locked(("member", member_id), ("book", book_id)):                 # Only this member and this book are locked.
+            member, book = self.member_and_book(member_id, book_id)
+            when = when or self.clock()
+            hold = self.holds.get(member_id, book_id)
+            if hold is not None and hold.ready:                                      # Puts the copy set aside for the member back, for them to borrow.
+                book.copies += 1
+                try:
+                    transaction = member.borrow_book(book, when)
+                except LibraryError:
+                    book.copies -= 1                                                 # The copy stays set aside.
+                    raise
             else:
-                print("[Book]  ", end="")                                    # Prints "[Book]" before the book information.
-            book.display_info()                                              # Calls the display_info method of the book to print its information.
-        input("\nPress Enter to continue...")
-
-    # Method that shows all members in the library.
-    def display_members(self):
-        print("\nLibrary Members:")
-        for member in self.members:                                          # Loops through the list of members and displays each member's information.
-            member.display_info()                                            # Calls the display_info method of the member to print its information.
-        input("\nPress Enter to continue...")
-
-    # Method that allows a member to borrow a book.
-    def issue_book(self, member_id, book_id):
-        member = next((m for m in self.members if m.member_id == member_id), None)   # Finds the member with the given ID.
-        book = next((b for b in self.books if b.book_id == book_id), None)           # Finds the book with the given ID.
-        if member and book:                                                          # Checks if both the member and book exist.
-            member.borrow_book(book)                                                 # Calls the borrow_book method of the member to borrow the book.
-        else:
-            print("Invalid member ID or book ID.")
-
-    # Method that allows a member to return a book.
-    def return_book(self, member_id, book_id):
-        member = next((m for m in self.members if m.member_id == member_id), None)   # Finds the member with the given ID.
-        book = next((b for b in self.books if b.book_id == book_id), None)           # Finds the book with the given ID.
-        if member and book:                                                          # Checks if both the member and book exist.
-            member.return_book(book)                                                 # Calls the return_book method of the member to return the book.
-        else:
-            print("Invalid member ID or book ID.")
-
-    # Method that allows you to search for a book.
+                transaction = member.borrow_book(book, when)                         # Calls the borrow_book method of the member to borrow the book.
+            if hold is not None:
+                self.holds.remove(member_id, book_id)                                # The hold is fulfilled.
+            self.track_loan(self.loans.get(member_id, book_id))
+            self.notify("issue_book", member_id, book_id, when)
+        return transaction
+
+    # Method that allows a member to return a book. Returns the Transaction, or raises a LibraryError.
+    def return_book(self, member_id, book_id, when=None):                           # "when" is the time of the transaction (defaults to now).
+        with self.locked(("member", member_id), ("book", book_id)):
+            member, book = self.member_and_book(member_id, book_id)
+            when = when or self.clock()
+            transaction = member.return_book(book, when)                             # Calls the return_book method of the member to return the book.
+            self.overdue.pop((member_id, book_id), None)
+            self.fill_holds(book, transaction.timestamp)                             # The copy goes to the next member waiting for it, if any.
+            self.notify("return_book", member_id, book_id, when)
+        return transaction
+
+    # Method that gives a loan its due date (if it has none yet) and schedules it.
+    def track_loan(self, loan):
+        if loan.due_at is None:
+            loan.due_at = loan.borrowed_at + self.loan_seconds
+        with self.schedule_lock:
+            self.scheduler.schedule(loan.due_at, DUE, (loan.member_id, loan.book_id))
+
+    # Method that adds a hold, scheduling its expiry if a copy is already set aside for it.
+    def track_hold(self, hold):
+        self.holds.add(hold)
+        if hold.ready:
+            with self.schedule_lock:
+                self.scheduler.schedule(hold.expires_at, HOLD_EXPIRY, (hold.member_id, hold.book_id))
+
+    # Method that sets copies on the shelf aside for the members waiting for a book, in queue order. The book's lock must be held.
+    def fill_holds(self, book, now):
+        if isinstance(book, Ebook):
+            return
+        while book.copies > 0:
+            hold = self.holds.next_waiting(book.book_id)
+            if hold is None:
+                break
+            book.copies -= 1
+            hold.expires_at = now + self.hold_seconds
+            with self.schedule_lock:
+                self.scheduler.schedule(hold.expires_at, HOLD_EXPIRY, (hold.member_id, book.book_id))
+            self.notices.append(Notice("hold_ready", hold.member_id, book.book_id, now))
+
+    # Method that places a hold on a book that has no copies on the shelf. Returns the Hold, or raises a LibraryError.
+    def place_hold(self, member_id, book_id, priority=0, when=None):                 # Lower priorities are served first; equal ones in the order they were placed.
+        with self.locked(("member", member_id), ("book", book_id)):
+            member, book = self.member_and_book(member_id, book_id)
+            if isinstance(book, Ebook) or book.copies > 0:
+                raise HoldNotNeededError(book_id, book.title)
+            if self.loans.get(member_id, book_id) is not None:
+                raise AlreadyBorrowedError(member_id, member.name, book_id, book.title)
+            if self.holds.get(member_id, book_id) is not None:
+                raise AlreadyOnHoldError(member_id, member.name, book_id, book.title)
+            when = when or self.clock()
+            hold = Hold(member_id, book_id, priority, int(when.timestamp()))
+            self.holds.add(hold)
+            self.notify("place_hold", member_id, book_id, priority, when)
+        return hold
+
+    # Method that cancels a hold. Returns the Hold, or raises a LibraryError.
+    def cancel_hold(self, member_id, book_id, when=None):
+        with self.locked(("member", member_id), ("book", book_id)):
+            member, book = self.member_and_book(member_id, book_id)
+            hold = self.holds.remove(member_id, book_id)
+            if hold is None:
+                raise NotOnHoldError(member_id, member.name, book_id, book.title)
+            when = when or self.clock()
+            if hold.ready:                                                           # The copy set aside goes to the next member waiting.
+                book.copies += 1
+                self.fill_holds(book, int(when.timestamp()))
+            self.notify("cancel_hold", member_id, book_id, when)
+        return hold
+
+    # Method that handles the scheduled events up to a time: loans that fall due become overdue and uncollected holds expire.
+    def advance(self, now=None):
+        now = now or self.clock()
+        with self.schedule_lock:
+            due = self.scheduler.pop_due(int(now.timestamp()))
+        for at, kind, (member_id, book_id) in due:
+            if kind == HOLD_EXPIRY:
+                self.expire_hold(member_id, book_id, datetime.fromtimestamp(at), at)
+                continue
+            self.mark_overdue(member_id, book_id, at)
+
+    # Method that records that a loan is overdue, with a notice the first time. Returns the Loan, or None if it was returned or is already overdue.
+    def mark_overdue(self, member_id, book_id, due_at=None):                        # The scheduler passes due_at to skip loans borrowed again since.
+        with self.locked(("member", member_id), ("book", book_id)):
+            loan = self.loans.get(member_id, book_id)
+            if loan is None or due_at not in (None, loan.due_at) or (member_id, book_id) in self.overdue:
+                return None                                                          # Overdue loans are journaled, so a restart does not report them again.
+            self.overdue[(member_id, book_id)] = loan
+            self.notices.append(Notice("overdue", member_id, book_id, loan.due_at))
+            self.notify("mark_overdue", member_id, book_id)
+        return loan
+
+    # Method that ends a ready hold that was not collected in time; the copy goes to the next member waiting. Returns the Hold, or None if it was collected or cancelled.
+    def expire_hold(self, member_id, book_id, when, expires_at=None):               # The scheduler passes expires_at to skip holds set aside again since.
+        at = int(when.timestamp())
+        with self.locked(("member", member_id), ("book", book_id)):
+            hold = self.holds.get(member_id, book_id)
+            if hold is None or not hold.ready or expires_at not in (None, hold.expires_at):
+                return None
+            self.holds.remove(member_id, book_id)
+            self.notices.append(Notice("hold_expired", member_id, book_id, at))
+            book = self.book_index[book_id]
+            book.copies += 1
+            self.fill_holds(book, at)                                                # The next member's wait starts when the last one's ended.
+            self.notify("expire_hold", member_id, book_id, when)
+        return hold
+
+    # Method that handles the scheduled events up to a time. Returns the notices (overdue loans, ready and expired holds) since the last call.
+    def process_due(self, now=None):
+        self.advance(now)
+        notices = []
+        while self.notices:
+            notices.append(self.notices.popleft())
+        return notices
+
+    # Method that returns the loans that are overdue at a time, the longest overdue first.
+    def overdue_loans(self, now=None):
+        self.advance(now)
+        return sorted(self.overdue.values(), key=lambda loan: loan.due_at)
+
+    # Method that returns the holds still waiting for a book, in the order they will be served.
+    def waiting_for(self, book_id):
+        with self.locked(("book", book_id)):
+            return self.holds.waiting(book_id)
+
+    # Method that returns the members who have a book borrowed, in the order they borrowed it.
+    def borrowers_of(self, book_id):
+        with self.locked(("book", book_id)):
+            member_ids = list(self.loans.of_book(book_id))
+        return [self.member_index[member_id] for member_id in member_ids if member_id in self.member_index]
+
+    # Method that returns the books whose title or author contains the search term.
     def search_books(self, search_term):
-                                                                                     # Searches for books that match the search term in title or author.
-        found_books = [book for book in self.books if search_term.lower() in book.title.lower() or search_term.lower() in book.author.lower()] 
-        if found_books:
-            print("\nSearch Results:")
-            for book in found_books:                                                 # Loops through the found books and displays each book's information.
-                book.display_info()                                                  # Calls the display_info method of the book to print its information.
-        else:
-            print(f"No books found matching '{search_term}'.")
-        
-        return found_books                                                           # Return the list of found books for further processing if needed.
-
-    # Method that displays transactions history for all members.
-    def display_transaction_history(self):
-        for member in self.members:                                                  # Loops through the list of members and displays each member's transaction history.
-            member.display_transaction_history()                                     # Calls the display_transaction_history method of the member to print its information.
-        input("\nPress Enter to continue...")
+        with self.index_lock:
+            book_ids = self.search_index.substring(search_term)
+        return [self.book_index[book_id] for book_id in book_ids if book_id in self.book_index]
+
+    # Method that returns the books matching any word of a query, best matches first.
+    def search_books_ranked(self, query, limit=10):
+        with self.index_lock:
+            book_ids = self.search_index.ranked(query, limit)
+        return [self.book_index[book_id] for book_id in book_ids if book_id in self.book_index]
+
+    # Method that returns the books with a word in the title or author starting with a prefix (autocomplete).
+    def search_books_prefix(self, prefix, limit=10):
+        with self.index_lock:
+            book_ids = self.search_index.prefix(prefix, limit)
+        return [self.book_index[book_id] for book_id in book_ids if book_id in self.book_index]
+
+    # Method that appends (operation, member_id, book_id, timestamp, title) records to the transaction log. Returns the number of records added.
+    def add_transactions(self, records):
+        added = 0
+        for operation, member_id, book_id, timestamp, title in records:
+            if member_id not in self.member_index:                                   # Skips records of members that are not in the library.
+                continue
+            self.transactions.append(operation, member_id, book_id, timestamp, title)
+            self.notify("add_transaction", operation, member_id, book_id, timestamp, title)
+            added += 1
+        return added
+
+    # Method that yields every transaction as an (operation, member_id, book_id, timestamp, title) record, oldest first.
+    def iter_transaction_records(self):
+        log = self.transactions
+        for position in range(len(log)):
+            yield (*log.get(position), log.title_at(position))
+
+    # Method that returns transactions, optionally only those of a member, of a book and/or between two epoch times, a page at a time.
+    def query_transactions(self, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+        return self.transactions.query(member_id, book_id, start, end, offset, limit)
 
 
 ####################################################################################################################################################################################
@@ -242,11 +732,10 @@ def getInt(prompt):
 ####################################################################################################################################################################################
 
 
-# Main funktion that runs the Library Management System - [CLI].
-def main():
-    library = Library()                                                              # Creates an instance of the Library class.
-
-
+# Function that runs the interactive menu against a library until the user chooses to exit.
+def run_menu(library):
+    from library_render import Console
+    console = Console(library, sys.stdout, pause=True)                              # Shows results and listings, a page at a time.
     while True:                                                                      # Main loop that runs the library management system until the user chooses to exit.
         print("\nLibrary Management System") 
         print("0. Add Ebook")
@@ -266,61 +755,165 @@ def main():
         
         choice = input("Enter your choice: ")                                       # Prompts the user for a choice from the menu.         
 
-        if choice == "0":
-            book_id = getInt("Enter EBook ID: ")
-            title = input("Enter EBook Title: ")
-            author = input("Enter EBook Author: ")
-            file_size = getInt("Enter File Size (MB): ")
-            library.add_book(Ebook(book_id, title, author, file_size))
-        elif choice == "1":
-            book_id = getInt("Enter Book ID: ")
-            title = input("Enter Book Title: ")
-            author = input("Enter Book Author: ")
-            copies = getInt("Enter Number of Copies: ")
-            library.add_book(Book(book_id, title, author, copies))
-        elif choice == "2":
-            member_id = getInt("Enter Member ID: ")
-            name = input("Enter Member Name: ")
-            library.add_member(Member(member_id, name))
-        elif choice == "3":
-            library.display_books()
-        elif choice == "4":
-            library.display_members()
-        elif choice == "5":
-            member_id = getInt("Enter Member ID: ")
-            book_id = getInt("Enter Book ID: ")
-            library.issue_book(member_id, book_id)
-        elif choice == "6":
-            member_id = getInt("Enter Member ID: ")
-            book_id = getInt("Enter Book ID: ")
-            library.return_book(member_id, book_id)
-        elif choice == "7":
-            library.display_transaction_history()
-        elif choice == "8":
-            member_id = getInt("Enter Member ID: ")
-            library.remove_member(member_id)
-        elif choice == "9":
-            member_id = getInt("Enter Member ID: ")
-            new_name = input("Input The Rename: ")
-            library.update_member(member_id, new_name)
-        elif choice == "10":
-            book_id = getInt("Enter The ID Of The Book You Want To update: ")
-            title = input("Enter New Book Title: ")
-            author = input("Enter Book Author: ")
-            copies = getInt("Enter Number of Copies: ")
-            library.update_book(book_id, title, author, copies)
-        elif choice == "11":
-            search_term = input("Search For Book: ")
-            library.search_books(search_term)
-        elif choice == "12":
-            book_id = getInt("Enter The ID Of The Book You Want To Remove: ")
-            library.remove_book(book_id)
-        elif choice == "13":
-            print("Exiting Library Management System.")
-            break
+        try:
+            if choice == "0":
+                book_id = getInt("Enter EBook ID: ")
+                title = input("Enter EBook Title: ")
+                author = input("Enter EBook Author: ")
+                file_size = getInt("Enter File Size (MB): ")
+                console.perform("add_book", Ebook(book_id, title, author, file_size))
+            elif choice == "1":
+                book_id = getInt("Enter Book ID: ")
+                title = input("Enter Book Title: ")
+                author = input("Enter Book Author: ")
+                copies = getInt("Enter Number of Copies: ")
+                console.perform("add_book", Book(book_id, title, author, copies))
+            elif choice == "2":
+                member_id = getInt("Enter Member ID: ")
+                name = input("Enter Member Name: ")
+                console.perform("add_member", Member(member_id, name))
+            elif choice == "3":
+                console.show_books()
+            elif choice == "4":
+                console.show_members()
+            elif choice == "5":
+                member_id = getInt("Enter Member ID: ")
+                book_id = getInt("Enter Book ID: ")
+                console.perform("issue_book", member_id, book_id)
+            elif choice == "6":
+                member_id = getInt("Enter Member ID: ")
+                book_id = getInt("Enter Book ID: ")
+                console.perform("return_book", member_id, book_id)
+            elif choice == "7":
+                console.show_history()
+            elif choice == "8":
+                member_id = getInt("Enter Member ID: ")
+                console.perform("remove_member", member_id)
+            elif choice == "9":
+                member_id = getInt("Enter Member ID: ")
+                new_name = input("Input The Rename: ")
+                console.perform("update_member", member_id, new_name)
+            elif choice == "10":
+                book_id = getInt("Enter The ID Of The Book You Want To update: ")
+                title = input("Enter New Book Title: ")
+                author = input("Enter Book Author: ")
+                copies = getInt("Enter Number of Copies: ")
+                console.perform("update_book", book_id, title, author, copies)
+            elif choice == "11":
+                search_term = input("Search For Book: ")
+                console.show_search(search_term)
+            elif choice == "12":
+                book_id = getInt("Enter The ID Of The Book You Want To Remove: ")
+                console.perform("remove_book", book_id)
+            elif choice == "13":
+                print("Exiting Library Management System.")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+        except LibraryError as error:                                               # Shows why the library refused the command.
+            console.say(str(error))
+        finally:
+            console.flush()
+
+
+# Function that opens the library chosen on the command line. Returns the library and a function that closes it.
+def open_storage(args):
+    if args.db:                                                                      # Opens the library stored in a SQLite database.
+        from library_sqlite import SQLiteLibrary
+        library = SQLiteLibrary(args.db)
+        return library, library.close
+    if args.data_dir:                                                                # Loads the saved library and records every change to it.
+        from library_journal import Journal
+        journal = Journal(args.data_dir, durability=args.durability)
+        return journal.load(), journal.close                                         # Closing writes a snapshot so the next start is fast.
+    return Library(), lambda: None                                                   # Creates an instance of the Library class.
+
+
+# Function that reports a slow operation (and its profile, if it was profiled) on standard error.
+def report_slow_call(slow_call):
+    print(f"slow: {slow_call.operation}({slow_call.arguments}) took {slow_call.seconds * 1000:.1f} ms", file=sys.stderr)
+    if slow_call.profile:
+        print(slow_call.profile, file=sys.stderr)
+
+
+# Main funktion that runs the Library Management System - [CLI].
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Library Management System")
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument("--data-dir", help="directory the library is saved in between runs (journal and snapshots)")
+    storage.add_argument("--db", help="SQLite database file to keep the library in (created if it does not exist)")
+    parser.add_argument("--durability", choices=["always", "group", "none"], default="group",
+                        help="fsync every change (always), fsync changes in groups (group) or never fsync (none)")
+    parser.add_argument("--metrics", help="time every operation and write the metrics to this file on exit (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--slow-ms", type=float, help="report operations slower than this many milliseconds on standard error")
+    parser.add_argument("--profile-every", type=int, default=0, help="profile one call in this many of each operation, to show where slow calls spend their time")
+    commands = parser.add_subparsers(dest="command", metavar="command")              # Without a command the interactive menu is shown.
+    for name, action in (("import", "read records from"), ("export", "write records to")):
+        command = commands.add_parser(name, help=f"{action} a CSV or JSONL file")
+        command.add_argument("kind", choices=["books", "members", "history"])
+        command.add_argument("path", help='file to use, or "-" for standard input/output')
+        command.add_argument("--format", choices=["csv", "jsonl"], help="file format (guessed from the extension if left out)")
+        command.add_argument("--chunk-size", type=int, default=10000, help="number of records handled at a time")
+    command = commands.add_parser("batch", help="run a script of commands (one per line) without prompts")
+    command.add_argument("script", help='script to run, or "-" for standard input')
+    command.add_argument("--output", help="file to write the output of the commands to (standard output if left out)")
+    command.add_argument("--quiet", action="store_true", help="throw the output of the commands away")
+    command.add_argument("--stop-on-error", action="store_true", help="stop at the first command that fails")
+    command = commands.add_parser("serve", help="serve the library to many clients over TCP (JSON lines)")
+    command.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    command.add_argument("--port", type=int, default=8765, help="port to listen on")
+    command.add_argument("--analytics", action="store_true", help='keep circulation reports up to date for the "analytics" operation')
+    command = commands.add_parser("analytics", help="print circulation reports (most borrowed, active borrowers, utilization, rates) as JSON")
+    command.add_argument("--top", type=int, default=10, help="number of books, authors and time buckets listed")
+    args = parser.parse_args(argv)
+
+    if args.db and (args.command == "analytics" or getattr(args, "analytics", False)):
+        parser.error("analytics work on the library in memory; use --data-dir instead of --db")
+    library, close = open_storage(args)
+    metrics = None
+    if args.metrics or args.slow_ms is not None:                                    # Instruments the library only when asked, so it costs nothing otherwise.
+        from library_metrics import Metrics, instrument
+        slow_threshold = None if args.slow_ms is None else args.slow_ms / 1000
+        metrics = instrument(library, Metrics(slow_threshold, args.profile_every, report_slow_call,
+                                              thread_safe=getattr(library, "stripes", None) is not None))
+    try:
+        if args.command == "import":
+            from library_io import import_records
+            report = import_records(library, args.kind, args.path, args.format, args.chunk_size)
+            print(report.summary(), file=sys.stderr)
+            for line_number, message in report.errors:                              # Lists the rows that could not be imported.
+                print(f"  line {line_number}: {message}" if line_number else f"  {message}", file=sys.stderr)
+        elif args.command == "export":
+            from library_io import export_records
+            written = export_records(library, args.kind, args.path, args.format, args.chunk_size)
+            print(f"Exported {written} {args.kind} rows.", file=sys.stderr)
+        elif args.command == "batch":
+            from library_batch import run_script
+            with contextlib.ExitStack() as stack:
+                output = None if args.quiet else sys.stdout
+                if args.output and not args.quiet:
+                    output = stack.enter_context(open(args.output, "w", encoding="utf-8"))
+                report = run_script(library, args.script, output, args.stop_on_error)
+            print(report.summary(), file=sys.stderr)
+            for line_number, message in report.failures:                            # Lists the commands that failed.
+                print(f"  line {line_number}: {message}", file=sys.stderr)
+        elif args.command == "serve":
+            from library_server import serve
+            if args.analytics:
+                from library_analytics import CirculationAnalytics
+                library.analytics = CirculationAnalytics(library)
+            serve(library, args.host, args.port)
+        elif args.command == "analytics":
+            from library_analytics import CirculationAnalytics
+            print(json.dumps(CirculationAnalytics(library).summary(args.top), indent=2))
         else:
-            print("Invalid choice. Please try again.")
+            run_menu(library)
+    finally:
+        close()
+        if metrics is not None and args.metrics:
+            metrics.write(args.metrics)
 
 
 if __name__ == "__main__":  # Ensures that the main function is called when the it is run directly.
+    sys.modules.setdefault("Library_cli", sys.modules[__name__])  # Lets the other modules import this file by name without loading it twice.
     main()                  # Calls the main function to start the library management system.
@@ -0,0 +1,84 @@
+"""
+Concurrency Stress Benchmark
+==========================
+Hammers one thread-safe Library with issue_book/return_book calls from a thread pool and reports the
+throughput for each number of threads, comparing the per-book/per-member lock striping of a thread-safe
+Library with a plain Library behind a single global lock. After each run it checks that no copies were lost or oversold:
+for every book, copies on the shelf plus copies on loan must equal the copies it started with.
+
+On a CPython build with the global interpreter lock, threads cannot run Python code in parallel, so the
+numbers mainly show the cost of locking and that the counts stay consistent under contention.
+
+Usage:
+    python3 bench_concurrency.py --books 1000 --members 1000 --operations 20000 --threads 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Library_cli import Book, Library, LibraryError, Member
+
+
+# Function that builds a library with the given number of books and members.
+def build_library(books, members, copies, thread_safe=True):
+    library = Library(thread_safe=thread_safe)
+    library.add_books(Book(book_id, f"Title {book_id}", f"Author {book_id % 100}", copies) for book_id in range(books))
+    library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(members))
+    return library
+
+
+# Function that runs one worker: borrows random books and returns about half of them again.
+def work(library, operations, books, members, seed, global_lock):
+    generator = random.Random(seed)
+    for _ in range(operations):
+        member_id, book_id = generator.randrange(members), generator.randrange(books)
+        try:
+            with global_lock:
+                library.issue_book(member_id, book_id)
+        except LibraryError:
+            continue
+        if generator.random() < 0.5:
+            with global_lock:
+                library.return_book(member_id, book_id)
+
+
+# Function that checks that no copies were lost or oversold. Returns the number of books that are inconsistent.
+def count_inconsistent(library, copies):
+    on_loan = {}
+    for member in library.iter_members():
+        for title in member.borrowed_books:
+            on_loan[title] = on_loan.get(title, 0) + 1
+    return sum(1 for book in library.iter_books()
+               if book.copies < 0 or book.copies + on_loan.get(book.title, 0) != copies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress issue_book/return_book from several threads.")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--copies", type=int, default=2, help="copies of every book")
+    parser.add_argument("--operations", type=int, default=20000, help="issue attempts per run")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    print(f"{'locking':<8} {'threads':>7} {'issues/s':>10} {'transactions':>13} {'inconsistent':>13}")
+    for locking in ("striped", "global"):
+        for threads in args.threads:
+            library = build_library(args.books, args.members, args.copies, thread_safe=locking == "striped")
+            global_lock = threading.Lock() if locking == "global" else contextlib.nullcontext()
+            share = args.operations // threads
+            started = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                for seed in range(threads):
+                    pool.submit(work, library, share, args.books, args.members, seed, global_lock)
+            elapsed = time.perf_counter() - started
+            inconsistent = count_inconsistent(library, args.copies)
+            print(f"{locking:<8} {threads:>7} {share * threads / elapsed:>10.0f} {len(library.transactions):>13} {inconsistent:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Federation Benchmark
+==========================
+Compares one Library with a Federation of Library shards in worker processes, for each number of shards:
+how many searches per second they answer (every search is fanned out to all shards) and how many
+issue_book/return_book calls per second they handle from several client threads (each call goes to the one
+shard that owns the book).
+
+Searches of a large catalog are where the shards pay off: each shard searches its part of the catalog at
+the same time, so the rate grows with the number of shards up to the number of cores. A single borrow or
+return is a small amount of work, so for those the time spent sending the call to the worker dominates.
+
+Usage:
+    python3 bench_federation.py --books 200000 --shards 1 2 4 8 --searches 200 --operations 20000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Library_cli import Book, Library, LibraryError, Member
+from library_federation import Federation
+
+WORDS = ["python", "data", "history", "garden", "ocean", "winter", "music", "stone", "river", "light"]  # Words the generated titles are made of
+
+
+# Function that fills a library (or federation) with generated books and members.
+def fill(library, books, members, seed):
+    generator = random.Random(seed)
+    library.add_books(Book(book_id, f"{generator.choice(WORDS)} {generator.choice(WORDS)} {book_id}", f"Author {book_id % 997}", 2)
+                      for book_id in range(books))
+    library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(members))
+
+
+# Function that runs searches and returns the number per second.
+def time_searches(library, searches, seed):
+    generator = random.Random(seed)
+    terms = [generator.choice(WORDS)[:generator.randint(3, 5)] for _ in range(searches)]
+    started = time.perf_counter()
+    for term in terms:
+        library.search_books_ranked(term, 10)
+    return searches / (time.perf_counter() - started)
+
+
+# Function that runs one client: borrows random books and returns them again.
+def work(library, operations, books, members, seed):
+    generator = random.Random(seed)
+    for _ in range(operations // 2):
+        member_id, book_id = generator.randrange(members), generator.randrange(books)
+        try:
+            library.issue_book(member_id, book_id)
+            library.return_book(member_id, book_id)
+        except LibraryError:
+            pass
+
+
+# Function that runs borrow/return clients in threads and returns the calls per second.
+def time_loans(library, operations, threads, books, members):
+    share = operations // threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for seed in range(threads):
+            pool.submit(work, library, share, books, members, seed)
+    return share * threads / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare one Library with a Federation of shards in worker processes.")
+    parser.add_argument("--books", type=int, default=200000)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--searches", type=int, default=200, help="ranked searches per run")
+    parser.add_argument("--operations", type=int, default=20000, help="issue/return calls per run")
+    parser.add_argument("--threads", type=int, default=8, help="client threads for the issue/return calls")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} cores, {args.books} books")
+    print(f"{'setup':<12} {'searches/s':>11} {'loans/s':>10}")
+    library = Library(thread_safe=True)
+    fill(library, args.books, args.members, args.seed)
+    print(f"{'library':<12} {time_searches(library, args.searches, args.seed):>11.1f} "
+          f"{time_loans(library, args.operations, args.threads, args.books, args.members):>10.0f}")
+    for shards in args.shards:
+        federation = Federation(shards=shards)
+        try:
+            fill(federation, args.books, args.members, args.seed)
+            print(f"{f'{shards} shards':<12} {time_searches(federation, args.searches, args.seed):>11.1f} "
+                  f"{time_loans(federation, args.operations, args.threads, args.books, args.members):>10.0f}")
+        finally:
+            federation.close()
+
+
+if __name__ == "__main__":
+    main()
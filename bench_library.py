@@ -0,0 +1,290 @@
+"""
+Library Benchmark Suite
+==========================
+Times the public Library operations on synthetic libraries of several sizes and reports, for every size
+and operation, the throughput, the latency percentiles and the number of calls that raised a LibraryError,
+together with the peak memory used to build each library.
+
+The data is made from a seed, so two runs with the same arguments do the same work:
+
+- books:    titles and authors made of words from a small vocabulary (so searches find something), one in
+            ten of them an Ebook
+- members:  one for every ten books
+- loans:    borrowing traffic that favours popular books, issued before the timings start so that
+            returns, histories and borrower lists have something to work on
+
+Each operation is timed call by call with time.perf_counter_ns, so the percentiles show single calls;
+the throughput is the number of calls divided by their total time. Memory is measured with tracemalloc on
+a separate build, because tracing slows everything down.
+
+The time taken to build each library is reported per book. If it grows more than --scaling times from the
+smallest size to a larger one, something in the build (add_books, the search index, issuing loans) is
+slower than linear, and the run says so.
+
+The results can be saved as JSON. With --compare the run is checked against a saved baseline: every
+operation whose median latency or throughput got worse by more than --threshold (and every library that
+grew by more than that) is flagged, and the program exits with status 1.
+
+Usage:
+    python3 bench_library.py --sizes 10000 100000 --samples 2000 --output baseline.json
+    python3 bench_library.py --sizes 10000 100000 --samples 2000 --compare baseline.json
+    python3 bench_library.py --sizes 1000000 10000000 --samples 500 --no-memory
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from Library_cli import Book, Ebook, Library, LibraryError, Member
+from library_metrics import percentile
+from library_render import history_lines
+
+WORDS = ("ancient", "blue", "city", "dark", "dragon", "empire", "forest", "garden", "hidden", "iron", "journey", "kingdom",
+         "light", "machine", "night", "ocean", "python", "quiet", "river", "secret", "silver", "storm", "tower", "winter")
+NAMES = ("Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace", "Guido", "John", "Ken", "Linus",
+         "Margaret", "Niklaus", "Radia", "Tim")
+START = 1_700_000_000                                                        # Time of the first synthetic loan, in seconds since the epoch
+MEMBERS_PER_BOOK = 0.1                                                       # Members made for every book
+LOANS_PER_BOOK = 0.2                                                         # Loans issued before the timings start, for every book
+SCALING_LIMIT = 2.0                                                          # Times the build time per book may grow from the smallest size to a larger one before it counts as slower than linear
+
+
+# Function that yields synthetic books: one in every ebook_share of them is an Ebook.
+def generate_books(count, seed=0, first_id=0, ebook_share=10):
+    generator = random.Random(seed)
+    for book_id in range(first_id, first_id + count):
+        title = f"{generator.choice(WORDS).title()} {generator.choice(WORDS).title()} {book_id}"
+        author = f"{generator.choice(NAMES)} {generator.choice(WORDS).title()}"
+        if book_id % ebook_share == 0:
+            yield Ebook(book_id, title, author, generator.randint(1, 50))
+        else:
+            yield Book(book_id, title, author, generator.randint(1, 5))
+
+
+# Function that yields synthetic members.
+def generate_members(count, first_id=0):
+    for member_id in range(first_id, first_id + count):
+        yield Member(member_id, f"{NAMES[member_id % len(NAMES)]} {member_id}")
+
+
+# Function that yields (member ID, book ID) pairs of borrowing traffic; low book IDs are borrowed most often.
+def generate_loans(count, members, books, seed=0):
+    generator = random.Random(seed)
+    for _ in range(count):
+        yield generator.randrange(members), int(books * generator.random() ** 2)
+
+
+# Function that gives the number of members made for a library of the given number of books.
+def member_count(size):
+    return max(1, int(size * MEMBERS_PER_BOOK))
+
+
+# Function that builds a library of the given number of books, with its members and some loans already issued.
+def build_library(size, seed=0):
+    library = Library()
+    members = member_count(size)
+    library.add_books(generate_books(size, seed))
+    library.add_members(generate_members(members))
+    for number, (member_id, book_id) in enumerate(generate_loans(int(size * LOANS_PER_BOOK), members, size, seed)):
+        try:
+            library.issue_book(member_id, book_id, when=datetime.fromtimestamp(START + number))
+        except LibraryError:                                                 # Not available, or already borrowed: the traffic goes on.
+            pass
+    return library
+
+
+# Function that measures the peak memory allocated while building a library of the given size.
+def measure_memory(size, seed=0):
+    gc.collect()
+    tracemalloc.start()
+    library = build_library(size, seed)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del library
+    return peak
+
+
+# Function that picks up to "samples" loans that are currently out.
+def current_loans(library, generator, samples):
+    loans = [(member_id, book_id) for member_id, books in library.loans.by_member.items() for book_id in books]
+    return generator.sample(loans, min(samples, len(loans)))
+
+
+CASES = [                                                                    # (operation, function(library, generator, samples, size) -> arguments of each call, function(library, *arguments)), run in this order
+    ("get_book",
+     lambda library, generator, samples, size: [(generator.randrange(size),) for _ in range(samples)],
+     lambda library, book_id: library.get_book(book_id)),
+    ("add_book",
+     lambda library, generator, samples, size: [(book,) for book in generate_books(samples, size, first_id=size)],
+     lambda library, book: library.add_book(book)),
+    ("add_member",
+     lambda library, generator, samples, size: [(member,) for member in generate_members(samples, first_id=size)],
+     lambda library, member: library.add_member(member)),
+    ("issue_book",
+     lambda library, generator, samples, size: list(generate_loans(samples, member_count(size), size, generator.random())),
+     lambda library, member_id, book_id: library.issue_book(member_id, book_id)),
+    ("return_book",
+     lambda library, generator, samples, size: current_loans(library, generator, samples),
+     lambda library, member_id, book_id: library.return_book(member_id, book_id)),
+    ("update_book",
+     lambda library, generator, samples, size: [(generator.randrange(size), f"{generator.choice(WORDS).title()} Edition")
+                                                for _ in range(samples)],
+     lambda library, book_id, title: library.update_book(book_id, title=title)),
+    ("search_books",
+     lambda library, generator, samples, size: [(f"{generator.choice(WORDS)} {generator.choice(WORDS)}",) for _ in range(samples)],
+     lambda library, search_term: library.search_books(search_term)),
+    ("search_books_prefix",
+     lambda library, generator, samples, size: [(generator.choice(WORDS)[:3],) for _ in range(samples)],
+     lambda library, prefix: library.search_books_prefix(prefix)),
+    ("search_books_ranked",
+     lambda library, generator, samples, size: [(f"{generator.choice(WORDS)} {generator.choice(NAMES)}",) for _ in range(samples)],
+     lambda library, query: library.search_books_ranked(query)),
+    ("borrowers_of",
+     lambda library, generator, samples, size: [(int(size * generator.random() ** 2),) for _ in range(samples)],
+     lambda library, book_id: library.borrowers_of(book_id)),
+    ("member_history",
+     lambda library, generator, samples, size: [(generator.randrange(member_count(size)),) for _ in range(samples)],
+     lambda library, member_id: list(history_lines([library.member_index[member_id]]))),
+    ("query_transactions",
+     lambda library, generator, samples, size: [(generator.randrange(member_count(size)),) for _ in range(samples)],
+     lambda library, member_id: library.query_transactions(member_id=member_id)),
+    ("remove_book",
+     lambda library, generator, samples, size: [(book_id,) for book_id in range(size, size + samples)],
+     lambda library, book_id: library.remove_book(book_id)),
+    ("remove_member",
+     lambda library, generator, samples, size: [(member_id,) for member_id in range(size, size + samples)],  # The members added above, who have no loans
+     lambda library, member_id: library.remove_member(member_id)),
+]
+
+
+# Function that times every call of one operation. Returns its result record.
+def time_operation(library, name, calls, run, size):
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    for arguments in calls:
+        started = clock()
+        try:
+            run(library, *arguments)
+        except LibraryError:                                                 # A refused call is still a call; it is counted and timed.
+            errors += 1
+        latencies.append(clock() - started)
+    latencies.sort()
+    total = sum(latencies) or 1
+    return {
+        "size": size,
+        "operation": name,
+        "calls": len(latencies),
+        "errors": errors,
+        "ops_per_sec": len(latencies) * 1e9 / total,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p95_us": percentile(latencies, 0.95) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "max_us": latencies[-1] / 1000 if latencies else 0.0,
+    }
+
+
+# Function that runs every case (or the chosen ones) on a library of each size. Returns the results as a dictionary.
+def run_suite(sizes, samples, seed=0, operations=None, memory=True, report=print):
+    results = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": seed, "samples": samples,
+                 "date": datetime.now().isoformat(timespec="seconds")},
+        "memory": {},
+        "build": {},
+        "results": [],
+    }
+    for size in sizes:
+        if memory:
+            peak = measure_memory(size, seed)
+            results["memory"][str(size)] = peak
+            report(f"\n{size} books: peak memory {peak / 2**20:.1f} MiB ({peak / size:.0f} bytes per book)")
+        else:
+            report(f"\n{size} books")
+        started = time.perf_counter()
+        library = build_library(size, seed)
+        elapsed = time.perf_counter() - started
+        results["build"][str(size)] = elapsed * 1e6 / size
+        report(f"built in {elapsed:.2f} s ({elapsed * 1e6 / size:.1f} us per book), {len(library.loans)} loans out")
+        report(f"{'operation':<20} {'calls':>6} {'errors':>6} {'ops/s':>11} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>10}")
+        generator = random.Random(seed)
+        for name, prepare, run in CASES:
+            if operations and name not in operations:
+                continue
+            record = time_operation(library, name, prepare(library, generator, samples, size), run, size)
+            results["results"].append(record)
+            report(f"{name:<20} {record['calls']:>6} {record['errors']:>6} {record['ops_per_sec']:>11.0f} {record['p50_us']:>9.1f} "
+                   f"{record['p95_us']:>9.1f} {record['p99_us']:>9.1f} {record['max_us']:>10.1f}")
+        del library
+    return results
+
+
+# Function that compares results with a baseline. Returns a list of (size, what, baseline value, new value, change) that got worse by more than the threshold.
+def find_regressions(results, baseline, threshold=0.25):
+    regressions = []
+    previous = {(record["size"], record["operation"]): record for record in baseline.get("results", [])}
+    for record in results["results"]:
+        old = previous.get((record["size"], record["operation"]))
+        if old is None:
+            continue
+        if old["p50_us"] and record["p50_us"] > old["p50_us"] * (1 + threshold):        # Slower calls
+            regressions.append((record["size"], f"{record['operation']} p50_us", old["p50_us"], record["p50_us"],
+                                record["p50_us"] / old["p50_us"] - 1))
+        if record["ops_per_sec"] and old["ops_per_sec"] > record["ops_per_sec"] * (1 + threshold):   # Fewer calls per second
+            regressions.append((record["size"], f"{record['operation']} ops_per_sec", old["ops_per_sec"], record["ops_per_sec"],
+                                record["ops_per_sec"] / old["ops_per_sec"] - 1))
+    for size, peak in results["memory"].items():
+        old = baseline.get("memory", {}).get(size)
+        if old and peak > old * (1 + threshold):                             # More memory
+            regressions.append((int(size), "peak memory", old, peak, peak / old - 1))
+    return regressions
+
+
+# Function that checks that building a library takes about the same time per book at every size. Returns a list of (size, smallest size, change) for the sizes whose time per book grew by more than the limit.
+def find_superlinear(results, limit=SCALING_LIMIT):
+    per_book = sorted((int(size), us) for size, us in results.get("build", {}).items())
+    if len(per_book) < 2:
+        return []
+    smallest, base = per_book[0]
+    return [(size, smallest, us / base - 1) for size, us in per_book[1:] if us > base * limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Library operations on synthetic libraries of several sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="numbers of books to build libraries with")
+    parser.add_argument("--samples", type=int, default=1000, help="calls timed for every operation and size")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument("--operations", nargs="+", choices=[name for name, _, _ in CASES], help="only time these operations")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) peak memory measurement")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.25, help="change that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--scaling", type=float, default=SCALING_LIMIT, help="times the build time per book may grow from the smallest size")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.samples, args.seed, args.operations, memory=not args.no_memory)
+    for size, smallest, change in find_superlinear(results, args.scaling):
+        print(f"\nBuilding {size} books took {change:.0%} more time per book than building {smallest}: slower than linear.")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = find_regressions(results, json.load(file), args.threshold)
+        if not regressions:
+            print(f"\nNo regressions against {args.compare} (threshold {args.threshold:.0%}).")
+            return 0
+        print(f"\n{len(regressions)} regression(s) against {args.compare} (threshold {args.threshold:.0%}):")
+        for size, what, old, new, change in regressions:
+            print(f"  {size:>9} books  {what:<32} {old:>12.1f} -> {new:>12.1f}  ({change:+.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Memory Benchmark
+==========================
+Measures how many bytes each book takes in the Library Management System with two layouts:
+
+- dict:     books as plain objects with a __dict__ (the layout Book used before it had __slots__)
+- slots:    books as Book objects with __slots__
+
+Titles and authors are created while the catalog is being built, as they would be when reading a file,
+so the numbers include the strings as well as the objects and the containers holding them.
+
+Usage:
+    python3 bench_memory.py --books 200000 --authors 5000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from Library_cli import Book
+
+
+# Class with the layout Book had before it used __slots__.
+class DictBook:
+    def __init__(self, book_id, title, author, copies):
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self.copies = copies
+
+
+# Function that measures the memory allocated by build(count, authors) while the result is kept alive.
+def measure(build, count, authors):
+    gc.collect()
+    tracemalloc.start()
+    catalog = build(count, authors)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del catalog
+    return allocated
+
+
+# Function that builds a catalog of DictBook objects keyed by ID.
+def build_dict(count, authors):
+    return {book_id: DictBook(book_id, f"Title {book_id}", f"Author {book_id % authors}", 1 + book_id % 5)
+            for book_id in range(count)}
+
+
+# Function that builds a catalog of Book objects keyed by ID.
+def build_slots(count, authors):
+    return {book_id: Book(book_id, f"Title {book_id}", f"Author {book_id % authors}", 1 + book_id % 5)
+            for book_id in range(count)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory used per book by each catalog layout.")
+    parser.add_argument("--books", type=int, default=200000, help="number of books in the catalog")
+    parser.add_argument("--authors", type=int, default=5000, help="number of distinct authors")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    print(f"{'layout':<10} {'bytes/book':>12} {'vs dict':>8}")
+    for name, build in (("dict", build_dict), ("slots", build_slots)):
+        per_book = measure(build, args.books, args.authors) / args.books
+        baseline = baseline or per_book
+        print(f"{name:<10} {per_book:>12.1f} {per_book / baseline:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Server Load Generator
+==========================
+Opens several connections to a library server and keeps a number of requests in flight on each of them
+(pipelining), then reports the requests per second and the latency percentiles.
+
+Without --host it starts its own server in the same process, filled with --books books and --members members.
+The mix of requests is mostly searches and lookups with some issue_book/return_book calls.
+
+Usage:
+    python3 bench_server.py --connections 16 --depth 8 --requests 50000
+    python3 bench_server.py --host 127.0.0.1 --port 8765 --connections 64 --depth 1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from Library_cli import Book, Library, Member
+from library_metrics import percentile
+from library_server import LibraryServer
+
+
+# Function that builds a random request.
+def make_request(generator, request_id, books, members):
+    choice = generator.random()
+    book_id, member_id = generator.randrange(books), generator.randrange(members)
+    if choice < 0.4:
+        return {"id": request_id, "op": "get_book", "args": [book_id]}
+    if choice < 0.6:
+        return {"id": request_id, "op": "search_books_prefix", "args": [f"Title {book_id}", 5]}
+    if choice < 0.8:
+        return {"id": request_id, "op": "issue_book", "args": [member_id, book_id]}
+    return {"id": request_id, "op": "return_book", "args": [member_id, book_id]}
+
+
+# Function that sends requests on one connection, keeping "depth" of them in flight, and collects their latencies.
+async def run_connection(host, port, requests, depth, books, members, seed, latencies):
+    generator = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    sent_at = {}                                                             # Time each request in flight was sent, keyed by request ID
+    sent = received = 0
+    try:
+        while received < requests:
+            lines = []
+            while sent < requests and sent - received < depth:              # Tops the pipeline up and sends the new requests in one write.
+                sent_at[sent] = time.perf_counter()
+                lines.append(json.dumps(make_request(generator, sent, books, members)))
+                sent += 1
+            if lines:
+                writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+                await writer.drain()
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            latencies.append(time.perf_counter() - sent_at.pop(json.loads(line)["id"]))
+            received += 1
+    finally:
+        writer.close()
+
+
+# Function that runs the whole load test and returns (elapsed seconds, sorted latencies).
+async def run_load(host, port, connections, depth, total, books, members):
+    latencies = []
+    share = total // connections
+    started = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, share, depth, books, members, seed, latencies)
+                           for seed in range(connections)))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+async def run(args):
+    server = None
+    host, port = args.host, args.port
+    if host is None:                                                         # Starts an in-process server with a generated library.
+        library = Library()
+        library.add_books(Book(book_id, f"Title {book_id}", f"Author {book_id % 100}", 3) for book_id in range(args.books))
+        library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(args.members))
+        server = await LibraryServer(library, "127.0.0.1", 0).start()
+        host, port = server.host, server.port
+    try:
+        elapsed, latencies = await run_load(host, port, args.connections, args.depth, args.requests, args.books, args.members)
+    finally:
+        if server is not None:
+            await server.close()
+    milliseconds = [latency * 1000 for latency in latencies]
+    print(f"{len(latencies)} requests over {args.connections} connections (depth {args.depth}) in {elapsed:.2f}s")
+    print(f"{'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print(f"{len(latencies) / elapsed:>10.0f} {percentile(milliseconds, 0.50):>8.2f} {percentile(milliseconds, 0.95):>8.2f} "
+          f"{percentile(milliseconds, 0.99):>8.2f} {milliseconds[-1] if milliseconds else 0.0:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the throughput and latency of a library server.")
+    parser.add_argument("--host", help="server to test (an in-process server is started if left out)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=8, help="requests in flight on each connection")
+    parser.add_argument("--requests", type=int, default=50000, help="requests in total")
+    parser.add_argument("--books", type=int, default=10000, help="books in the generated library (and the range of book IDs requested)")
+    parser.add_argument("--members", type=int, default=1000, help="members in the generated library (and the range of member IDs requested)")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Circulation Analytics
+==========================
+Keeps circulation reports for a library up to date as books are borrowed and returned:
+
+- the most-borrowed books and the demand for each author (number of borrows)
+- the number of active borrowers (members with at least one book out)
+- utilization: copies out compared with the copies on the shelf, per book and for the whole library
+- borrows and returns per time bucket (a day by default)
+
+CirculationAnalytics listens to the library's change events and updates the aggregates with a few dictionary
+operations per event, so the reports are read without scanning anything: the top books and authors are
+kept in order as they change, and totals are kept as running counts.
+
+recompute() rebuilds everything in bulk from the library's TransactionLog arrays and current loans, for
+example after loading a saved library or importing history. It uses NumPy when it is installed (a few
+vectorized passes over the arrays) and plain Python counting otherwise; both give the same result.
+"""
+
+import heapq
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import compress
+
+from Library_cli import NO_LOCK, Ebook
+from library_transactions import RETURN
+
+try:
+    import numpy
+except ImportError:                                                          # NumPy is optional; recompute() falls back to plain Python.
+    numpy = None
+
+BUCKET_SECONDS = 86400                                                       # Width of a time bucket of the borrow/return rates (a day)
+TOP_SIZE = 10                                                                # Books and authors kept in order for most_borrowed and top_authors
+
+
+# Function that counts one more for a key and keeps "top" (the keys with the highest counts, highest first) in order.
+def bump(counts, top, key, top_size):
+    count = counts[key] = counts.get(key, 0) + 1
+    if key in top:
+        position = top.index(key)
+    elif len(top) < top_size:
+        top.append(key)
+        position = len(top) - 1
+    elif count > counts[top[-1]]:                                            # Counts only grow by one, so a key outside the top can only pass the last one.
+        top[-1] = key
+        position = len(top) - 1
+    else:
+        return
+    while position and counts[top[position - 1]] < count:                   # Moves the key up past keys with lower counts.
+        top[position - 1], top[position] = top[position], top[position - 1]
+        position -= 1
+
+
+# Function that counts the borrows and returns of each book and of each time bucket in a TransactionLog.
+def count_history(log, bucket_seconds=BUCKET_SECONDS, use_numpy=None):
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy and len(log):
+        operations = numpy.frombuffer(log.operations, dtype=numpy.int8)
+        book_ids = numpy.frombuffer(log.book_ids, dtype=numpy.int64)
+        buckets = numpy.frombuffer(log.timestamps, dtype=numpy.int64) // bucket_seconds * bucket_seconds
+        borrowed = operations != RETURN
+        keys, counts = numpy.unique(book_ids[borrowed], return_counts=True)
+        borrows = dict(zip(keys.tolist(), counts.tolist()))
+        keys, counts = numpy.unique(book_ids[~borrowed], return_counts=True)
+        returns = dict(zip(keys.tolist(), counts.tolist()))
+        rates = {}
+        for mask, column in ((borrowed, 0), (~borrowed, 1)):
+            keys, counts = numpy.unique(buckets[mask], return_counts=True)
+            for bucket, count in zip(keys.tolist(), counts.tolist()):
+                rates.setdefault(bucket, [0, 0])[column] = count
+        return borrows, returns, rates, int(borrowed.sum())
+    borrowed = [operation != RETURN for operation in log.operations]
+    borrows = Counter(compress(log.book_ids, borrowed))
+    returns = Counter(compress(log.book_ids, (not is_borrow for is_borrow in borrowed)))
+    rates = {}
+    for (bucket, is_borrow), count in Counter(zip((timestamp // bucket_seconds * bucket_seconds for timestamp in log.timestamps),
+                                                  borrowed)).items():
+        rates.setdefault(bucket, [0, 0])[0 if is_borrow else 1] = count
+    return dict(borrows), dict(returns), rates, sum(borrowed)
+
+
+####################################################################################################################################################################################
+
+
+# Class that keeps circulation aggregates of a Library up to date.
+class CirculationAnalytics:
+    def __init__(self, library, bucket_seconds=BUCKET_SECONDS, top_size=TOP_SIZE):
+        self.library = library
+        self.bucket_seconds = bucket_seconds
+        self.top_size = top_size
+        self.lock = threading.Lock() if getattr(library, "stripes", None) is not None else NO_LOCK  # Events come from several threads in a thread-safe library.
+        self.recompute()
+        library.add_listener(self.on_event)
+
+    # Method that rebuilds every aggregate from the transaction log, the loans and the catalog of the library.
+    def recompute(self, use_numpy=None):
+        library = self.library
+        borrows, _, rates, total_borrows = count_history(library.transactions, self.bucket_seconds, use_numpy)
+        book_authors = {book.book_id: book.author for book in library.book_index.values()}
+        authors = {}
+        for book_id, count in borrows.items():
+            author = book_authors.get(book_id)
+            if author is not None:                                           # Borrows of removed books count for the book only.
+                authors[author] = authors.get(author, 0) + count
+        member_out = {member_id: len(loans) for member_id, loans in library.loans.by_member.items() if loans}
+        shelf = {book.book_id: book.copies for book in library.book_index.values() if not isinstance(book, Ebook)}
+        book_out = {}
+        for book_id in shelf:                                                # Copies out are the current loans, whatever history was imported.
+            out = len(library.loans.of_book(book_id))
+            if out:
+                book_out[book_id] = out
+        with self.lock:
+            self.borrows = borrows                                           # Borrows of each book, keyed by book ID
+            self.author_borrows = authors                                    # Borrows of each author's books, keyed by author
+            self.book_authors = book_authors                                 # Author each book's borrows count for, keyed by book ID
+            self.top_book_ids = heapq.nlargest(self.top_size, borrows, key=borrows.get)        # Most-borrowed book IDs, most first
+            self.top_author_names = heapq.nlargest(self.top_size, authors, key=authors.get)    # Most-borrowed authors, most first
+            self.rates = rates                                               # [borrows, returns] of each time bucket, keyed by the bucket's start time
+            self.total_borrows = total_borrows
+            self.total_returns = len(library.transactions) - total_borrows
+            self.member_out = member_out                                     # Books out of each member with any, keyed by member ID
+            self.book_out = book_out                                         # Copies out of each physical book with any, keyed by book ID
+            self.copies_out = sum(book_out.values())                         # Copies of physical books out
+            self.shelf = shelf                                               # Copies on the shelf of each physical book, keyed by book ID
+            self.shelf_total = sum(shelf.values())                           # Copies of physical books on the shelf
+
+    # Method that updates the aggregates after a change to the library (registered as a library listener).
+    def on_event(self, event, *details):
+        handler = self.HANDLERS.get(event)
+        if handler is not None:
+            with self.lock:
+                handler(self, *details)
+
+    # Method that counts a borrow or return in its time bucket.
+    def count_rate(self, timestamp, column):
+        bucket = int(timestamp) // self.bucket_seconds * self.bucket_seconds
+        counts = self.rates.get(bucket)
+        if counts is None:
+            counts = self.rates[bucket] = [0, 0]
+        counts[column] += 1
+
+    # Method that counts a borrow of a book.
+    def count_borrow(self, book_id, timestamp):
+        self.total_borrows += 1
+        bump(self.borrows, self.top_book_ids, book_id, self.top_size)
+        author = self.book_authors.get(book_id)
+        if author is not None:
+            bump(self.author_borrows, self.top_author_names, author, self.top_size)
+        self.count_rate(timestamp, 0)
+
+    # Method that moves the borrows of a book from its old author to a new one (None when the book is removed).
+    def move_author(self, book_id, author):
+        old = self.book_authors.pop(book_id, None)
+        if author is not None:
+            self.book_authors[book_id] = author
+        borrows = self.borrows.get(book_id, 0)
+        if old == author or not borrows:
+            return
+        if old is not None:
+            left = self.author_borrows[old] - borrows
+            if left:
+                self.author_borrows[old] = left
+            else:
+                del self.author_borrows[old]
+        if author is not None:
+            self.author_borrows[author] = self.author_borrows.get(author, 0) + borrows
+        self.top_author_names = heapq.nlargest(self.top_size, self.author_borrows, key=self.author_borrows.get)  # A count went down, which bump cannot handle.
+
+    # Method that changes the number of copies out of a physical book.
+    def count_out(self, book_id, change):
+        if book_id not in self.shelf:                                        # E-books (and removed books) have no copies to count.
+            return
+        out = self.book_out.pop(book_id, 0) + change
+        if out:
+            self.book_out[book_id] = out
+        self.copies_out += change
+
+    # Method that sets the number of copies of a physical book on the shelf.
+    def set_shelf(self, book_id, copies):
+        self.shelf_total += copies - self.shelf[book_id]
+        self.shelf[book_id] = copies
+
+    # Method that applies a borrow.
+    def issued(self, member_id, book_id, when):
+        self.count_borrow(book_id, when.timestamp())
+        self.member_out[member_id] = self.member_out.get(member_id, 0) + 1
+        if book_id in self.shelf:
+            self.count_out(book_id, 1)
+            self.set_shelf(book_id, self.library.get_book(book_id).copies)
+
+    # Method that applies a return.
+    def returned(self, member_id, book_id, when):
+        self.total_returns += 1
+        self.count_rate(when.timestamp(), 1)
+        out = self.member_out.pop(member_id, 0) - 1
+        if out > 0:
+            self.member_out[member_id] = out
+        if book_id in self.shelf:
+            self.count_out(book_id, -1)
+            self.set_shelf(book_id, self.library.get_book(book_id).copies)
+
+    # Method that puts the copies of a new book on the shelf.
+    def book_added(self, book):
+        self.book_authors[book.book_id] = book.author
+        if not isinstance(book, Ebook):
+            self.shelf[book.book_id] = 0
+            self.set_shelf(book.book_id, book.copies)
+
+    # Method that applies a change of author or of the number of copies on the shelf.
+    def book_updated(self, book_id, title, author, copies, file_size, when=None):
+        if author:
+            self.move_author(book_id, author)
+        if copies is not None:
+            self.hold_changed(None, book_id)
+
+    # Method that reads the copies on the shelf again after a copy set aside for a hold went back or on to another member.
+    def hold_changed(self, member_id, book_id, when=None):
+        if book_id in self.shelf:
+            self.set_shelf(book_id, self.library.get_book(book_id).copies)
+
+    # Method that forgets a removed book's copies and takes its borrows off its author.
+    def book_removed(self, book_id):
+        self.move_author(book_id, None)
+        self.copies_out -= self.book_out.pop(book_id, 0)
+        self.shelf_total -= self.shelf.pop(book_id, 0)
+
+    # Method that forgets a removed member's books out.
+    def member_removed(self, member_id):
+        self.member_out.pop(member_id, None)                                 # Only members with no books borrowed can be removed.
+
+    # Method that counts an imported transaction.
+    def transaction_added(self, operation, member_id, book_id, timestamp, title):
+        if operation == RETURN:                                              # Imported history changes the counts but no loans or shelves.
+            self.total_returns += 1
+            self.count_rate(timestamp, 1)
+        else:
+            self.count_borrow(book_id, timestamp)
+
+    HANDLERS = {                                                             # Library event -> method that applies it
+        "issue_book": issued,
+        "return_book": returned,
+        "add_book": book_added,
+        "update_book": book_updated,
+        "remove_book": book_removed,
+        "remove_member": member_removed,
+        "add_transaction": transaction_added,
+        "cancel_hold": hold_changed,
+        "expire_hold": hold_changed,
+    }
+
+    # Method that returns the most-borrowed books as (book ID, title, borrows), most first.
+    def most_borrowed(self, count=TOP_SIZE):
+        with self.lock:
+            book_ids = self.top_book_ids[:count] if count <= self.top_size else heapq.nlargest(count, self.borrows, key=self.borrows.get)
+            return [(book_id, self.title_of(book_id), self.borrows[book_id]) for book_id in book_ids]
+
+    # Method that returns the current title of a book, or its title in the transaction log if it was removed.
+    def title_of(self, book_id):
+        book = self.library.get_book(book_id)
+        if book is not None:
+            return book.title
+        title = self.library.transactions.title_of(book_id)
+        return f"#{book_id}" if title is None else title
+
+    # Method that returns the authors whose books are borrowed most as (author, borrows), most first.
+    def top_authors(self, count=TOP_SIZE):
+        with self.lock:
+            authors = self.top_author_names[:count] if count <= self.top_size else heapq.nlargest(count, self.author_borrows, key=self.author_borrows.get)
+            return [(author, self.author_borrows[author]) for author in authors]
+
+    # Method that returns the number of times books by an author were borrowed.
+    def author_demand(self, author):
+        return self.author_borrows.get(author, 0)
+
+    # Method that returns the number of members with at least one book out.
+    def active_borrowers(self):
+        return len(self.member_out)
+
+    # Method that returns the share (0 to 1) of the copies of a physical book, or of all physical books, that are out.
+    def utilization(self, book_id=None):
+        if book_id is None:
+            out, on_shelf = self.copies_out, self.shelf_total
+        else:
+            out, on_shelf = self.book_out.get(book_id, 0), self.shelf.get(book_id, 0)
+        return out / (out + on_shelf) if out + on_shelf else 0.0
+
+    # Method that returns (bucket start, borrows, returns) for the time buckets between start (included) and end (excluded), oldest first.
+    def rates_between(self, start=None, end=None):
+        with self.lock:
+            return [(bucket, borrows, returns) for bucket, (borrows, returns) in sorted(self.rates.items())
+                    if (start is None or bucket >= start) and (end is None or bucket < end)]
+
+    # Method that returns the main figures as a JSON-friendly dictionary, for dashboards and the server.
+    def summary(self, count=TOP_SIZE):
+        return {
+            "borrows": self.total_borrows,
+            "returns": self.total_returns,
+            "active_borrowers": self.active_borrowers(),
+            "copies_out": self.copies_out,
+            "utilization": self.utilization(),
+            "most_borrowed": [{"book_id": book_id, "title": title, "borrows": borrows} for book_id, title, borrows in self.most_borrowed(count)],
+            "top_authors": [{"author": author, "borrows": borrows} for author, borrows in self.top_authors(count)],
+            "rates": [{"start": datetime.fromtimestamp(bucket, timezone.utc).isoformat(), "borrows": borrows, "returns": returns}
+                      for bucket, borrows, returns in self.rates_between()[-count:]],
+        }
@@ -0,0 +1,134 @@
+"""
+Batch Mode
+==========================
+Runs a script of library commands without any prompts, for example to load data overnight or to replay traffic.
+
+A script has one command per line; words are split like a shell does, so titles with spaces are quoted.
+Empty lines and lines starting with "#" are skipped. The menu numbers of the interactive program can be used
+instead of the command names, so a recorded session can be replayed as it was typed.
+
+    add_book 1 "Python Programming" "John Doe" 3
+    add_member 1 Alice
+    issue_book 1 1
+    # the same as issue_book 1 1:
+    5 1 1
+
+The script is read a line at a time and the messages of the commands are collected in a buffer that is written
+out in large blocks, so memory use stays small however long the script is. The run ends with a BatchReport that
+counts the commands that succeeded and failed.
+"""
+
+import shlex
+import sys
+import time
+
+from Library_cli import Book, Ebook, LibraryError, Member
+from library_render import Console
+
+MAX_REPORTED_ERRORS = 100                                                    # Failures kept with their message; the rest are only counted
+
+COMMANDS = {                                                                 # Command name -> (function(console, *args), type of each argument)
+    "add_ebook": (lambda console, book_id, title, author, file_size: console.perform("add_book", Ebook(book_id, title, author, file_size)), (int, str, str, int)),
+    "add_book": (lambda console, book_id, title, author, copies: console.perform("add_book", Book(book_id, title, author, copies)), (int, str, str, int)),
+    "add_member": (lambda console, member_id, name: console.perform("add_member", Member(member_id, name)), (int, str)),
+    "display_books": (lambda console: console.show_books(), ()),
+    "display_members": (lambda console: console.show_members(), ()),
+    "issue_book": (lambda console, member_id, book_id: console.perform("issue_book", member_id, book_id), (int, int)),
+    "return_book": (lambda console, member_id, book_id: console.perform("return_book", member_id, book_id), (int, int)),
+    "display_history": (lambda console: console.show_history(), ()),
+    "remove_member": (lambda console, member_id: console.perform("remove_member", member_id), (int,)),
+    "update_member": (lambda console, member_id, new_name: console.perform("update_member", member_id, new_name), (int, str)),
+    "update_book": (lambda console, book_id, title, author, copies: console.perform("update_book", book_id, title, author, copies), (int, str, str, int)),
+    "search_books": (lambda console, search_term: console.show_search(search_term), (str,)),
+    "remove_book": (lambda console, book_id: console.perform("remove_book", book_id), (int,)),
+    "place_hold": (lambda console, member_id, book_id: console.perform("place_hold", member_id, book_id), (int, int)),
+    "cancel_hold": (lambda console, member_id, book_id: console.perform("cancel_hold", member_id, book_id), (int, int)),
+    "display_overdue": (lambda console: console.show_overdue(), ()),
+}
+MENU_NUMBERS = dict(zip(map(str, range(13)), COMMANDS))                     # Menu choice -> command name, in the order of the interactive menu (the hold commands have no number)
+
+
+####################################################################################################################################################################################
+
+
+# Class that collects the outcome of a batch run.
+class BatchReport:
+    def __init__(self):
+        self.commands = 0                                                    # Number of commands run
+        self.succeeded = 0                                                   # Number of commands that did what they were asked
+        self.failure_count = 0                                               # Number of commands that failed or could not be read
+        self.failures = []                                                   # (line number, message) of the first MAX_REPORTED_ERRORS failures
+        self.elapsed = 0.0                                                   # Time taken in seconds
+
+    # Method that records a command that failed.
+    def add_failure(self, line_number, message):
+        self.failure_count += 1
+        if len(self.failures) < MAX_REPORTED_ERRORS:
+            self.failures.append((line_number, message))
+
+    # Method that describes the run in one line.
+    def summary(self):
+        rate = self.commands / self.elapsed if self.elapsed else 0.0
+        return (f"Ran {self.commands} commands in {self.elapsed:.2f}s ({rate:.0f}/s): "
+                f"{self.succeeded} succeeded, {self.failure_count} failed.")
+
+
+# Function that turns a script line into a command name and its arguments. Returns None for empty lines and comments.
+def parse_command(line):
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    words = shlex.split(line) if '"' in line or "'" in line or "\\" in line else line.split()  # Plain lines skip the slower shell-style split.
+    name = MENU_NUMBERS.get(words[0], words[0])
+    if name not in COMMANDS:
+        raise ValueError(f"unknown command {words[0]!r}")
+    types = COMMANDS[name][1]
+    if len(words) - 1 != len(types):
+        raise ValueError(f"{name} takes {len(types)} arguments, got {len(words) - 1}")
+    try:
+        return name, [convert(word) for convert, word in zip(types, words[1:])]
+    except ValueError:
+        raise ValueError(f"{name} expects whole numbers for its IDs, copies and file size") from None
+
+
+# Function that runs every command of a script against a library. Returns a BatchReport.
+def run_batch(library, lines, output=None, stop_on_error=False):
+    report = BatchReport()
+    console = Console(library, output)                                       # Collects the messages and listings in a buffer.
+    started = time.perf_counter()
+    try:
+        for line_number, line in enumerate(lines, 1):
+            try:
+                command = parse_command(line)
+                if command is None:
+                    continue
+                name, arguments = command
+                COMMANDS[name][0](console, *arguments)
+            except ValueError as error:                                      # The line could not be read.
+                failure = str(error)
+            except LibraryError as error:                                    # The library refused the command.
+                failure = str(error)
+                console.say(failure)
+            except Exception as error:                                       # Any other failure is recorded on its line too, so the rest of the script still runs.
+                failure = f"{type(error).__name__}: {error}"
+                console.say(failure)
+            else:
+                report.commands += 1
+                report.succeeded += 1
+                continue
+            report.commands += 1
+            report.add_failure(line_number, failure)
+            if stop_on_error:
+                break
+    finally:
+        console.flush()                                                      # Writes what the commands before a failure printed, whatever happens.
+        report.elapsed = time.perf_counter() - started
+    return report
+
+
+# Function that runs a script file ("-" for standard input) against a library. Returns a BatchReport.
+def run_script(library, path, output=None, stop_on_error=False):
+    if path == "-":
+        return run_batch(library, sys.stdin, output, stop_on_error)
+    with open(path, encoding="utf-8", buffering=1 << 16) as file:
+        return run_batch(library, file, output, stop_on_error)
@@ -0,0 +1,332 @@
+"""
+Library Federation
+==========================
+Runs one library as several Library shards, so a network of branches (or one very large catalog) can use
+several processor cores. Each shard is a plain Library that lives in a worker process of its own (or, with
+processes=False, in this process, which is what the tests use).
+
+Books are split between the shards: by branch when the federation is made with branches (every book is
+added to a branch and stays there), otherwise by the hash of the book ID. Members are copied to every shard,
+so a member can borrow from any of them. Calls about one book (issue_book, return_book, holds, updates) go to
+the shard that owns it; searches, histories and due-date processing are sent to every shard at once and the
+answers are merged. The shards work on a fanned-out call at the same time, so a search of a catalog split
+over four processes takes about a quarter of the time of a search of one Library.
+
+The Federation offers the methods of a Library under the same names, with these differences:
+- results that combine several shards are in book ID order (search_books, search_books_prefix) or in time
+  order (query_transactions, member_history, process_due, overdue_loans); ranked results with equal scores
+  are also in book ID order
+- members are not returned with their loans; borrowed_books(member_id) and member_history(member_id) collect
+  them from every shard
+- in process mode, books, loans and holds are copies: change them through the federation, not directly
+
+The Library class itself is unchanged and can still be used on its own.
+"""
+
+import contextlib
+import heapq
+import multiprocessing
+import threading
+from itertools import chain, islice
+
+from Library_cli import DuplicateIdError, Library, Member, MemberNotFoundError
+
+STOP_TIMEOUT = 5                                                             # Seconds a worker process is given to stop before it is terminated
+
+
+# Function that lists the text of a member's transactions in a shard as (timestamp, text) pairs.
+def member_history(library, member_id):
+    if library.get_member(member_id) is None:
+        raise MemberNotFoundError(member_id)
+    log = library.transactions
+    return [(log.timestamps[position], log.format(position)) for position in log.find(member_id=member_id)]
+
+
+# Function that lists the books a member has borrowed from a shard as (borrowed_at, title) pairs.
+def borrowed_books(library, member_id):
+    member = library.get_member(member_id)
+    if member is None:
+        raise MemberNotFoundError(member_id)
+    return [(loan.borrowed_at, loan.book.title) for loan in member.loans.values()]
+
+
+# Function that returns the best matches of a query in a shard as (score, book) pairs, best first.
+def search_books_scored(library, query, limit):
+    with library.index_lock:
+        scores = library.search_index.scores(query)
+    best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, library.book_index[book_id]) for book_id, score in best if book_id in library.book_index]
+
+
+SHARD_CALLS = {                                                              # Call name -> function(library, *args) for calls that are not plain Library methods
+    "add_book": lambda library, book: library.add_book(book).book_id,       # Only the ID comes back; the caller already has the book.
+    "add_member": lambda library, member_id, name: library.add_member(Member(member_id, name)).member_id,
+    "add_members": lambda library, rows: library.add_members(Member(member_id, name) for member_id, name in rows),
+    "check_no_loans": lambda library, member_id: library.check_no_loans(member_id).name,
+    "remove_member": lambda library, member_id: library.remove_member(member_id).name,
+    "update_member": lambda library, member_id, new_name: library.update_member(member_id, new_name).name,
+    "list_books": lambda library: list(library.book_index.values()),
+    "search_books_prefix": lambda library, prefix, limit: sorted(library.search_books_prefix(prefix, None), key=lambda book: book.book_id)[:limit],
+    "search_books_scored": search_books_scored,
+    "member_history": member_history,
+    "borrowed_books": borrowed_books,
+}
+
+
+# Function that carries out a call on a shard's library. Returns (True, result), or (False, exception) if it failed.
+def carry_out(library, name, args):
+    try:
+        call = SHARD_CALLS.get(name)
+        if call is None:
+            return True, getattr(library, name)(*args)                       # Any other call is the Library method of that name.
+        return True, call(library, *args)
+    except Exception as error:                                               # Passed back to the caller and raised there.
+        return False, error
+
+
+# Function that returns the result of a reply, or raises the exception it carries.
+def unpack(reply):
+    ok, value = reply
+    if not ok:
+        raise value
+    return value
+
+
+# Function that runs a shard in a worker process: carries out the calls that arrive on a connection until it is told to stop.
+def serve_shard(connection, library_options):
+    library = Library(**library_options)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:                                                     # The federation went away.
+            break
+        if request is None:
+            break
+        reply = carry_out(library, *request)
+        try:
+            connection.send(reply)
+        except Exception as error:                                           # The result or exception could not be pickled.
+            connection.send((False, RuntimeError(f"The shard could not send its answer: {error!r}")))
+    connection.close()
+
+
+####################################################################################################################################################################################
+
+
+# Class that keeps a shard's Library in this process and carries out its calls right away.
+class LocalShard:
+    def __init__(self, library_options):
+        self.library = Library(**library_options)
+        self.lock = threading.Lock()                                         # Held from sending a call until its reply is received
+        self.reply = None                                                    # Reply to the last call, until it is received
+
+    # Method that carries out a call.
+    def send(self, name, args):
+        self.reply = carry_out(self.library, name, args)
+
+    # Method that returns the reply to the last call.
+    def receive(self):
+        reply, self.reply = self.reply, None
+        return reply
+
+    def close(self):
+        pass
+
+
+# Class that keeps a shard's Library in a worker process and sends it calls over a pipe.
+class ProcessShard:
+    def __init__(self, library_options, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=serve_shard, args=(child, library_options), daemon=True)
+        self.process.start()
+        child.close()                                                        # The worker's end belongs to the worker now.
+        self.lock = threading.Lock()                                         # Held from sending a call until its reply is received
+
+    # Method that sends a call to the worker without waiting for it to finish.
+    def send(self, name, args):
+        self.connection.send((name, args))
+
+    # Method that waits for the reply to the last call.
+    def receive(self):
+        return self.connection.recv()
+
+    # Method that stops the worker process.
+    def close(self):
+        with contextlib.suppress(OSError):
+            self.connection.send(None)
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+
+####################################################################################################################################################################################
+
+
+# Class that spreads a library over several Library shards and offers the Library methods on top of them.
+class Federation:
+    def __init__(self, shards=4, branches=None, processes=True, **library_options):  # library_options are passed to every shard's Library (and must pickle in process mode).
+        if branches is not None:
+            shards = len(branches)
+        self.branches = {branch: index for index, branch in enumerate(branches or ())}  # Shard index keyed by branch name (empty when books are hashed)
+        self.placement = {}                                                  # Shard index of each book, keyed by book ID (only with branches)
+        context = multiprocessing.get_context()
+        self.shards = [ProcessShard(library_options, context) if processes else LocalShard(library_options) for _ in range(shards)]
+
+    # Method that stops the worker processes. The federation cannot be used afterwards.
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    # Method that returns the shard that owns a book.
+    def shard_of(self, book_id):
+        if self.branches:
+            return self.shards[self.placement.get(book_id, 0)]               # A book that is not in any branch is looked for (and not found) in the first one.
+        return self.shards[hash(book_id) % len(self.shards)]
+
+    # Method that returns the shard of a branch, or raises ValueError.
+    def shard_of_branch(self, branch):
+        if branch not in self.branches:
+            raise ValueError(f"Unknown branch {branch!r}, expected one of {', '.join(map(str, self.branches))}." if self.branches
+                             else "This federation hashes books to shards; it has no branches.")
+        return self.branches[branch]
+
+    # Method that carries out a call on one shard. Returns its result, or raises its exception.
+    def call(self, shard, name, *args):
+        with shard.lock:
+            shard.send(name, args)
+            return unpack(shard.receive())
+
+    # Method that sends calls to several shards at once and waits for all of them. calls lists (shard, name, args) in shard order, one per shard. Returns the results in order, or raises the first exception.
+    def scatter(self, calls):
+        with contextlib.ExitStack() as stack:
+            for shard, name, args in calls:                                  # Locks are taken in shard order, so two fan-outs never wait on each other.
+                stack.enter_context(shard.lock)
+                shard.send(name, args)                                       # The shard starts working while the next call is sent.
+            replies = [shard.receive() for shard, _, _ in calls]             # Every reply is read, even after a failure, so no answer is left in a pipe.
+        return [unpack(reply) for reply in replies]
+
+    # Method that sends the same call to every shard. Returns their results in shard order.
+    def fan_out(self, name, *args):
+        return self.scatter([(shard, name, args) for shard in self.shards])
+
+    # Method that adds a book, to a branch if the federation has branches. Returns the book, or raises DuplicateIdError.
+    def add_book(self, book, branch=None):
+        if not self.branches:
+            self.call(self.shard_of(book.book_id), "add_book", book)
+            return book
+        index = self.shard_of_branch(branch)
+        if book.book_id in self.placement:
+            raise DuplicateIdError("Book/Ebook", book.book_id)
+        self.call(self.shards[index], "add_book", book)
+        self.placement[book.book_id] = index
+        return book
+
+    # Method that adds many books at once, skipping IDs that already exist. Returns the number of books added.
+    def add_books(self, books, branch=None):
+        batches = {}                                                         # Books for each shard, keyed by shard index
+        if self.branches:
+            index = self.shard_of_branch(branch)
+            for book in books:
+                if book.book_id not in self.placement:
+                    self.placement[book.book_id] = index
+                    batches.setdefault(index, []).append(book)
+        else:
+            for book in books:
+                batches.setdefault(hash(book.book_id) % len(self.shards), []).append(book)
+        return sum(self.scatter([(self.shards[index], "add_books", (batches[index],)) for index in sorted(batches)]))
+
+    # Method that removes a book. Returns the removed book, or raises BookNotFoundError or BookOnLoanError.
+    def remove_book(self, book_id):
+        book = self.call(self.shard_of(book_id), "remove_book", book_id)
+        self.placement.pop(book_id, None)
+        return book
+
+    # Method that updates a book's title, author and number of copies or file size. Returns the book, or raises BookNotFoundError.
+    def update_book(self, book_id, title=None, author=None, copies=None, file_size=None, when=None):
+        return self.call(self.shard_of(book_id), "update_book", book_id, title, author, copies, file_size, when)
+
+    # Method that finds a book by its ID. Returns the book, or None.
+    def get_book(self, book_id):
+        return self.call(self.shard_of(book_id), "get_book", book_id)
+
+    # Method that yields every book, one shard after the other.
+    def iter_books(self):
+        return chain.from_iterable(self.fan_out("list_books"))
+
+    # Method that adds a member to every shard. Returns the member, or raises DuplicateIdError.
+    def add_member(self, member):
+        self.fan_out("add_member", member.member_id, member.name)
+        return member
+
+    # Method that adds many members to every shard, skipping IDs that already exist. Returns the number of members added.
+    def add_members(self, members):
+        rows = [(member.member_id, member.name) for member in members]
+        return self.fan_out("add_members", rows)[0]                          # Every shard has the same members, so they all add the same number.
+
+    # Method that removes a member from every shard. Returns the removed member (without loans), or raises MemberNotFoundError or MemberHasLoansError.
+    def remove_member(self, member_id):
+        self.fan_out("check_no_loans", member_id)                            # Every shard is asked first, so the member is not removed from only some of them.
+        return Member(member_id, self.fan_out("remove_member", member_id)[0])
+
+    # Method that renames a member in every shard. Returns the member (without loans), or raises MemberNotFoundError.
+    def update_member(self, member_id, new_name):
+        return Member(member_id, self.fan_out("update_member", member_id, new_name)[0])
+
+    # Method that lends a book to a member. Returns the Transaction, or raises a LibraryError.
+    def issue_book(self, member_id, book_id, when=None):
+        return self.call(self.shard_of(book_id), "issue_book", member_id, book_id, when)
+
+    # Method that takes a book back from a member. Returns the Transaction, or raises a LibraryError.
+    def return_book(self, member_id, book_id, when=None):
+        return self.call(self.shard_of(book_id), "return_book", member_id, book_id, when)
+
+    # Method that places a hold on a book that has no copies on the shelf. Returns the Hold, or raises a LibraryError.
+    def place_hold(self, member_id, book_id, priority=0, when=None):
+        return self.call(self.shard_of(book_id), "place_hold", member_id, book_id, priority, when)
+
+    # Method that cancels a hold. Returns the Hold, or raises a LibraryError.
+    def cancel_hold(self, member_id, book_id, when=None):
+        return self.call(self.shard_of(book_id), "cancel_hold", member_id, book_id, when)
+
+    # Method that returns the holds still waiting for a book, in the order they will be served.
+    def waiting_for(self, book_id):
+        return self.call(self.shard_of(book_id), "waiting_for", book_id)
+
+    # Method that returns the books whose title or author contains the search term, in book ID order.
+    def search_books(self, search_term):
+        return sorted(chain.from_iterable(self.fan_out("search_books", search_term)), key=lambda book: book.book_id)
+
+    # Method that returns the books matching any word of a query, best matches first.
+    def search_books_ranked(self, query, limit=10):
+        best = heapq.nsmallest(limit, chain.from_iterable(self.fan_out("search_books_scored", query, limit)),
+                               key=lambda match: (-match[0], match[1].book_id))  # Each shard sends its own best, so the overall best are among them.
+        return [book for _, book in best]
+
+    # Method that returns the books with a word in the title or author starting with a prefix, in book ID order.
+    def search_books_prefix(self, prefix, limit=10):
+        return sorted(chain.from_iterable(self.fan_out("search_books_prefix", prefix, limit)), key=lambda book: book.book_id)[:limit]
+
+    # Method that returns transactions, optionally only those of a member, of a book and/or between two epoch times, in time order, a page at a time.
+    def query_transactions(self, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+        if book_id is not None:                                              # A book's transactions are all in its shard.
+            return self.call(self.shard_of(book_id), "query_transactions", member_id, book_id, start, end, offset, limit)
+        stop = None if limit is None else offset + limit                     # Every shard sends enough for the page, since any of them may hold all of it.
+        found = self.fan_out("query_transactions", member_id, None, start, end, 0, stop)
+        return list(islice(sorted(chain.from_iterable(found), key=lambda transaction: transaction.timestamp), offset, stop))
+
+    # Method that lists a member's transactions as text, in time order, or raises MemberNotFoundError.
+    def member_history(self, member_id):
+        return [text for _, text in sorted(chain.from_iterable(self.fan_out("member_history", member_id)), key=lambda entry: entry[0])]
+
+    # Method that lists the titles of the books a member has borrowed, in the order they were borrowed, or raises MemberNotFoundError.
+    def borrowed_books(self, member_id):
+        return [title for _, title in sorted(chain.from_iterable(self.fan_out("borrowed_books", member_id)), key=lambda entry: entry[0])]
+
+    # Method that handles the scheduled events of every shard up to a time. Returns the notices since the last call, in time order.
+    def process_due(self, now=None):
+        return sorted(chain.from_iterable(self.fan_out("process_due", now)), key=lambda notice: notice.at)
+
+    # Method that returns the loans of every shard that are overdue at a time, the longest overdue first.
+    def overdue_loans(self, now=None):
+        return sorted(chain.from_iterable(self.fan_out("overdue_loans", now)), key=lambda loan: loan.due_at)
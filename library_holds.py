@@ -0,0 +1,141 @@
+"""
+Holds and Scheduler
+==========================
+Holds let members queue for a book that has no copies on the shelf. Each book has its own queue, ordered by
+priority (lower numbers first) and then by the order the holds were placed. When a copy comes back it is set
+aside for the first member in the queue, whose hold is then "ready" until it expires.
+
+The Scheduler keeps future events (loans falling due, ready holds expiring) in a heap ordered by time, so
+finding the events that are due costs O(log n) per event instead of a scan of every loan and hold. Entries
+are never removed early: when a loan is returned or a hold is collected, its entry stays in the heap and is
+ignored when it comes up, because the loan or hold it names is gone or has a different time.
+"""
+
+import heapq
+from collections import namedtuple
+from itertools import count
+
+DUE, HOLD_EXPIRY = "due", "hold_expiry"                                      # Kinds of scheduled events
+
+Notice = namedtuple("Notice", ["kind", "member_id", "book_id", "at"])        # kind is "overdue", "hold_ready" or "hold_expired"; at is an epoch time
+
+
+# Class that represents a member waiting for a book.
+class Hold:
+    __slots__ = ("member_id", "book_id", "priority", "placed_at", "expires_at")
+
+    def __init__(self, member_id, book_id, priority, placed_at, expires_at=None):
+        self.member_id = member_id                                           # ID of the member waiting
+        self.book_id = book_id                                               # ID of the book waited for
+        self.priority = priority                                             # Lower numbers are served first
+        self.placed_at = placed_at                                           # Time the hold was placed, in seconds since the epoch
+        self.expires_at = expires_at                                         # Time a ready hold must be collected by (None while waiting)
+
+    # Property that tells whether a copy has been set aside for the hold.
+    @property
+    def ready(self):
+        return self.expires_at is not None
+
+
+# Class that stores the holds of a library, indexed by member and by book, with a queue of waiting holds for each book.
+class HoldTable:
+    def __init__(self):
+        self.by_member = {}                                                  # {book ID: Hold} of each member, keyed by member ID
+        self.by_book = {}                                                    # {member ID: Hold} of each book, keyed by book ID
+        self.queues = {}                                                     # Heap of (priority, order, Hold) of the waiting holds of each book, keyed by book ID
+        self.order = count()                                                 # Order the holds were placed in, to serve equal priorities first come first served
+
+    def __len__(self):
+        return sum(len(holds) for holds in self.by_member.values())
+
+    # Method that finds the hold of a member on a book, or returns None.
+    def get(self, member_id, book_id):
+        return self.by_member.get(member_id, {}).get(book_id)
+
+    # Method that adds a hold: a waiting hold joins its book's queue.
+    def add(self, hold):
+        self.by_member.setdefault(hold.member_id, {})[hold.book_id] = hold
+        self.by_book.setdefault(hold.book_id, {})[hold.member_id] = hold
+        if not hold.ready:
+            heapq.heappush(self.queues.setdefault(hold.book_id, []), (hold.priority, next(self.order), hold))
+
+    # Method that removes the hold of a member on a book. Returns the Hold, or None if there was none.
+    def remove(self, member_id, book_id):
+        hold = self.by_member.get(member_id, {}).pop(book_id, None)
+        if hold is not None:
+            del self.by_book[book_id][member_id]                             # A waiting hold is left in its queue and skipped when it comes up.
+        return hold
+
+    # Method that takes the next waiting hold off a book's queue. Returns the Hold, or None if nobody is waiting.
+    def next_waiting(self, book_id):
+        queue = self.queues.get(book_id)
+        while queue:
+            hold = heapq.heappop(queue)[2]
+            if self.get(hold.member_id, book_id) is hold:                    # Skips holds that were cancelled.
+                return hold
+        self.queues.pop(book_id, None)
+        return None
+
+    # Method that returns the holds of a book that are still waiting, in the order they will be served.
+    def waiting(self, book_id):
+        return [hold for _, _, hold in sorted(self.queues.get(book_id, ()), key=lambda entry: entry[:2])
+                if self.get(hold.member_id, book_id) is hold]
+
+    # Method that yields every hold: the ready ones, then the waiting ones of each book in the order they will be served.
+    def in_order(self):
+        for holds in self.by_book.values():
+            yield from (hold for hold in holds.values() if hold.ready)
+        for book_id in self.queues:
+            yield from self.waiting(book_id)
+
+    # Method that returns the holds of a member, keyed by book ID.
+    def of_member(self, member_id):
+        return self.by_member.get(member_id, {})
+
+    # Method that returns the holds on a book, keyed by member ID.
+    def of_book(self, book_id):
+        return self.by_book.get(book_id, {})
+
+    # Method that removes every hold on a book. Returns the removed holds.
+    def remove_book(self, book_id):
+        holds = list(self.by_book.pop(book_id, {}).values())
+        for hold in holds:
+            del self.by_member[hold.member_id][book_id]
+        self.queues.pop(book_id, None)
+        return holds
+
+    # Method that removes every hold of a member. Returns the removed holds.
+    def remove_member(self, member_id):
+        holds = list(self.by_member.pop(member_id, {}).values())
+        for hold in holds:
+            del self.by_book[hold.book_id][member_id]
+        return holds
+
+
+####################################################################################################################################################################################
+
+
+# Class that keeps future events in time order.
+class Scheduler:
+    def __init__(self):
+        self.heap = []                                                       # (time, order, kind, key) of every scheduled event
+        self.order = count()                                                 # Keeps events at the same time in the order they were scheduled
+
+    def __len__(self):
+        return len(self.heap)
+
+    # Method that schedules an event of a kind (DUE or HOLD_EXPIRY) for a key at an epoch time.
+    def schedule(self, at, kind, key):
+        heapq.heappush(self.heap, (at, next(self.order), kind, key))
+
+    # Method that removes and returns the (time, kind, key) of every event at or before an epoch time, earliest first.
+    def pop_due(self, now):
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            at, _, kind, key = heapq.heappop(self.heap)
+            due.append((at, kind, key))
+        return due
+
+    # Method that returns the time of the next event, or None if nothing is scheduled.
+    def next_time(self):
+        return self.heap[0][0] if self.heap else None
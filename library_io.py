@@ -0,0 +1,261 @@
+"""
+Import and Export
+==========================
+Streaming bulk import and export for the Library Management System.
+
+Kinds of records:
+- books:   kind, book_id, title, author, copies, file_size (kind is "book" or "ebook")
+- members: member_id, name
+- history: member_id, book_id, operation, timestamp, title (operation is "borrow", "borrow_ebook" or "return",
+           timestamp is in seconds since the epoch)
+
+Files can be CSV or JSONL (one JSON object per line), and "-" means standard input or output. Input is read
+in chunks, so memory use depends on the chunk size and not on the size of the file. Rows that fail
+validation are counted and reported with their line number instead of being printed one by one.
+"""
+
+import contextlib
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from Library_cli import Book, Ebook, Member
+from library_transactions import OPERATION_CODES, OPERATION_NAMES
+
+KINDS = ("books", "members", "history")
+FORMATS = ("csv", "jsonl")
+FIELDS = {                                                                   # Columns written for each kind of record
+    "books": ["kind", "book_id", "title", "author", "copies", "file_size"],
+    "members": ["member_id", "name"],
+    "history": ["member_id", "book_id", "operation", "timestamp", "title"],
+}
+MAX_REPORTED_ERRORS = 100                                                    # Errors kept with their message; the rest are only counted
+
+
+# Function that works out the file format from an explicit choice or the file extension.
+def detect_format(path, file_format=None):
+    if file_format:
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format '{file_format}', expected one of {', '.join(FORMATS)}.")
+        return file_format
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of '{path}', please give it with --format.")
+
+
+# Function that opens a file, or standard input/output for "-".
+@contextlib.contextmanager
+def open_text(path, mode):
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    else:
+        with open(path, mode, newline="", encoding="utf-8", buffering=1 << 16) as file:
+            yield file
+
+
+# Function that yields (line number, row, error) for every record in a file.
+def read_rows(file, file_format):
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f"invalid JSON ({error})"
+            continue
+        if isinstance(row, dict):
+            yield line_number, row, None
+        else:
+            yield line_number, None, "expected a JSON object"
+
+
+# Function that splits an iterable into lists of at most size items.
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Function that reads a whole number from a row, raising ValueError with a readable message.
+def parse_int(row, field, required=True):
+    value = row.get(field)
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"missing {field}")
+        return None
+    if type(value) is int:                                                   # JSON numbers; bools and floats such as 2.7 are refused below.
+        return value
+    if isinstance(value, str):
+        digits = value.strip()
+        if digits[:1] in ("-", "+"):                                         # Allows a sign, so negative copies get their own message.
+            digits = digits[1:]
+        if digits.isdecimal():
+            return int(value)
+    raise ValueError(f"{field} must be a whole number, got {value!r}")
+
+
+# Function that reads a required text field from a row.
+def parse_text(row, field):
+    value = row.get(field)
+    if value is None or not str(value).strip():
+        raise ValueError(f"missing {field}")
+    return str(value)
+
+
+# Function that turns a row into a Book or Ebook.
+def parse_book(row):
+    kind = str(row.get("kind") or "").lower()
+    if not kind:                                                             # Rows without a kind are e-books if they have a file size.
+        kind = "ebook" if row.get("file_size") not in (None, "") else "book"
+    book_id, title, author = parse_int(row, "book_id"), parse_text(row, "title"), parse_text(row, "author")
+    if kind == "ebook":
+        file_size = parse_int(row, "file_size")
+        if file_size < 0:
+            raise ValueError("file_size cannot be negative")
+        return Ebook(book_id, title, author, file_size)
+    if kind == "book":
+        copies = parse_int(row, "copies")
+        if copies < 0:
+            raise ValueError("copies cannot be negative")
+        return Book(book_id, title, author, copies)
+    raise ValueError(f"kind must be 'book' or 'ebook', got {kind!r}")
+
+
+# Function that turns a row into a Member.
+def parse_member(row):
+    return Member(parse_int(row, "member_id"), parse_text(row, "name"))
+
+
+# Function that turns a row into an (operation, member_id, book_id, timestamp, title) transaction record.
+def parse_history(row):
+    operation = OPERATION_CODES.get(row.get("operation"))
+    if operation is None:
+        raise ValueError(f"operation must be one of {', '.join(OPERATION_CODES)}, got {row.get('operation')!r}")
+    return (operation, parse_int(row, "member_id"), parse_int(row, "book_id"),
+            parse_int(row, "timestamp"), parse_text(row, "title"))
+
+
+####################################################################################################################################################################################
+
+
+# Class that collects the outcome of an import.
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind                                                     # Kind of records imported
+        self.rows = 0                                                        # Number of rows read
+        self.imported = 0                                                    # Number of records added to the library
+        self.duplicates = 0                                                  # Number of rows skipped because their ID was already used
+        self.error_count = 0                                                 # Number of rows that failed validation
+        self.errors = []                                                     # (line number, message) of the first MAX_REPORTED_ERRORS errors
+        self.elapsed = 0.0                                                   # Time taken in seconds
+
+    # Method that records a row that failed validation.
+    def add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    # Method that describes the import in one line.
+    def summary(self):
+        return (f"Imported {self.imported} of {self.rows} {self.kind} rows in {self.elapsed:.2f}s "
+                f"({self.duplicates} duplicates, {self.error_count} errors).")
+
+
+# Function that validates one chunk of rows. Returns the valid records, skipping IDs already seen in this import.
+def validate_chunk(chunk, parse, key, seen, report):
+    records = []
+    for line_number, row, error in chunk:
+        report.rows += 1
+        if error is None:
+            try:
+                record = parse(row)
+            except ValueError as parse_error:
+                error = str(parse_error)
+        if error is not None:
+            report.add_error(line_number, error)
+            continue
+        if key is not None:
+            record_id = key(record)
+            if record_id in seen:
+                report.duplicates += 1
+                continue
+            seen.add(record_id)
+        records.append(record)
+    return records
+
+
+# Function that streams records of one kind from a CSV or JSONL file into a library. Returns an ImportReport.
+def import_records(library, kind, path, file_format=None, chunk_size=10000):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {', '.join(KINDS)}.")
+    file_format = detect_format(path, file_format)
+    report = ImportReport(kind)
+    started = time.perf_counter()
+    seen = set()                                                             # IDs read so far, so duplicates inside the file are caught
+    with open_text(path, "r") as file:
+        for chunk in chunked(read_rows(file, file_format), chunk_size):
+            if kind == "books":
+                books = validate_chunk(chunk, parse_book, lambda book: book.book_id, seen, report)
+                added = library.add_books(books)
+                report.duplicates += len(books) - added                      # IDs that were already in the library
+            elif kind == "members":
+                members = validate_chunk(chunk, parse_member, lambda member: member.member_id, seen, report)
+                added = library.add_members(members)
+                report.duplicates += len(members) - added
+            else:
+                records = validate_chunk(chunk, parse_history, None, seen, report)
+                added = library.add_transactions(records)
+                for _ in range(len(records) - added):                        # Records whose member does not exist are not added.
+                    report.add_error(None, "unknown member_id")
+            report.imported += added
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# Function that yields the rows of one kind of record in a library.
+def iter_export_rows(library, kind):
+    if kind == "books":
+        for book in library.iter_books():
+            if isinstance(book, Ebook):
+                yield ["ebook", book.book_id, book.title, book.author, None, book.file_size]
+            else:
+                yield ["book", book.book_id, book.title, book.author, book.copies, None]
+    elif kind == "members":
+        for member in library.iter_members():
+            yield [member.member_id, member.name]
+    else:
+        for operation, member_id, book_id, timestamp, title in library.iter_transaction_records():
+            yield [member_id, book_id, OPERATION_NAMES[operation], timestamp, title]
+
+
+# Function that streams records of one kind from a library to a CSV or JSONL file. Returns the number of records written.
+def export_records(library, kind, path, file_format=None, chunk_size=10000):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {', '.join(KINDS)}.")
+    file_format = detect_format(path, file_format)
+    fields = FIELDS[kind]
+    written = 0
+    with open_text(path, "w") as file:
+        if file_format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            for chunk in chunked(iter_export_rows(library, kind), chunk_size):
+                writer.writerows(chunk)
+                written += len(chunk)
+        else:
+            for chunk in chunked(iter_export_rows(library, kind), chunk_size):
+                file.write("".join(json.dumps(dict(zip(fields, row))) + "\n" for row in chunk))
+                written += len(chunk)
+    return written
@@ -0,0 +1,262 @@
+"""
+Journal
+==========================
+Durable storage for the Library Management System.
+
+Every change to a library is appended as a compact JSON record to a journal file. Snapshots of the whole
+library are written every so often, after which the journal is emptied, so loading a library only has to
+read the latest snapshot and replay the records written after it.
+
+Durability modes:
+- "always": the journal is flushed and fsynced after every record.
+- "group":  records are fsynced in groups (every group_size records or every group_delay seconds).
+- "none":   records are handed to the operating system but never fsynced.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from Library_cli import Book, Ebook, Library, LibraryError, Member
+from library_holds import Hold
+from library_loans import Loan
+
+SNAPSHOT_FILE = "snapshot.json"                                              # Name of the snapshot file in the data directory
+JOURNAL_FILE = "journal.log"                                                 # Name of the journal file in the data directory
+DURABILITY_MODES = ("always", "group", "none")
+TIMED_EVENTS = ("issue_book", "return_book", "update_book", "place_hold", "cancel_hold", "expire_hold")  # Events whose last detail is the time they happened
+
+
+# Function that turns a book into a list that can be stored as JSON.
+def encode_book(book):
+    if isinstance(book, Ebook):
+        return ["ebook", book.book_id, book.title, book.author, book.file_size]
+    return ["book", book.book_id, book.title, book.author, book.copies]
+
+
+# Function that turns a stored list back into a book.
+def decode_book(row):
+    kind, book_id, title, author, amount = row
+    if kind == "ebook":
+        return Ebook(book_id, title, author, amount)
+    return Book(book_id, title, author, amount)
+
+
+# Function that turns a library event into a journal record.
+def encode_event(event, details):
+    if event == "add_book":
+        return [event, *encode_book(details[0])]
+    if event == "add_member":
+        return [event, details[0].member_id, details[0].name]
+    if event in TIMED_EVENTS:
+        *details, when = details
+        return [event, *details, when.timestamp()]                           # Stores the time so a replay keeps the original history.
+    return [event, *details]
+
+
+# Function that applies a journal record to a library.
+def apply_record(library, record):
+    event, details = record[0], record[1:]
+    if event == "add_book":
+        library.add_book(decode_book(details))
+    elif event == "add_member":
+        library.add_member(Member(*details))
+    elif event in TIMED_EVENTS:
+        *details, timestamp = details
+        getattr(library, event)(*details, datetime.fromtimestamp(timestamp))
+    elif event == "add_transaction":
+        library.add_transactions([details])
+    else:
+        getattr(library, event)(*details)
+
+
+# Function that captures the whole state of a library as JSON-friendly data.
+def snapshot_state(library):
+    log = library.transactions
+    return {
+        "books": [encode_book(book) for book in library.book_index.values()],
+        "members": [[member.member_id, member.name] for member in library.member_index.values()],
+        "loans": [[member_id, book_id, loan.borrowed_at, loan.due_at]
+                  for member_id, loans in library.loans.by_member.items() for book_id, loan in loans.items()],
+        "holds": [[hold.member_id, hold.book_id, hold.priority, hold.placed_at, hold.expires_at] for hold in library.holds.in_order()],
+        "overdue": [list(key) for key in library.overdue],                   # Loans already reported overdue, so they are not reported again
+        "transactions": [log.operations.tolist(), log.member_ids.tolist(), log.book_ids.tolist(), log.timestamps.tolist(), log.title_ids.tolist()],
+        "titles": log.titles,
+    }
+
+
+# Function that rebuilds a library from a snapshot, into a new Library made with the given options.
+def restore_state(state, **library_options):
+    library = Library(**library_options)
+    for row in state["books"]:
+        library.insert_book(decode_book(row))
+    for row in state["members"]:
+        library.insert_member(Member(row[0], row[1]))
+    for member_id, book_id, borrowed_at, due_at in state["loans"]:
+        loan = Loan(member_id, library.book_index[book_id], borrowed_at, due_at)
+        library.loans.add(loan)
+        library.track_loan(loan)
+    for row in state["holds"]:
+        library.track_hold(Hold(*row))
+    for member_id, book_id in state["overdue"]:
+        library.overdue[(member_id, book_id)] = library.loans.get(member_id, book_id)
+    titles = state["titles"]
+    for operation, member_id, book_id, timestamp, title_id in zip(*state["transactions"]):  # Rebuilds the transaction log column by column.
+        library.transactions.append(operation, member_id, book_id, timestamp, titles[title_id])
+    return library
+
+
+# Function that makes a rename or truncation in a directory durable.
+def fsync_directory(directory):
+    if os.name != "posix":                                                   # Only POSIX systems allow fsyncing a directory.
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+####################################################################################################################################################################################
+
+
+# Class that keeps a library in a data directory as a snapshot plus an append-only journal.
+class Journal:
+    def __init__(self, directory, durability="group", group_size=100, group_delay=0.05, snapshot_every=10000, library_options=None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode '{durability}', expected one of {', '.join(DURABILITY_MODES)}.")
+        self.directory = directory
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.durability = durability                                         # How eagerly records are fsynced
+        self.group_size = group_size                                         # Number of records fsynced together in "group" mode
+        self.group_delay = group_delay                                       # Longest time (seconds) a record waits to be fsynced in "group" mode
+        self.snapshot_every = snapshot_every                                 # Number of records after which a new snapshot is written (0 turns it off)
+        self.library_options = library_options or {}                         # Keyword arguments of the Library that is loaded (loan_days, clock, ...)
+        self.lock = threading.Lock()                                         # Serializes writes to the journal file
+        self.sequence = 0                                                    # Sequence number of the last record written
+        self.snapshot_sequence = 0                                           # Sequence number of the last record included in the snapshot
+        self.pending = 0                                                     # Number of records written but not yet fsynced
+        self.replayed = 0                                                    # Number of records replayed by the last load
+        self.library = None
+        self.file = None
+        self.stop_flusher = threading.Event()
+        self.flusher = None
+
+    # Method that loads the library from the data directory and starts recording its changes.
+    def load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        library = Library(**self.library_options)
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as snapshot:
+                state = json.load(snapshot)
+            library = restore_state(state, **self.library_options)
+            self.sequence = self.snapshot_sequence = state["sequence"]
+        self.replay(library)
+        library.notices.clear()                                              # The notices of replayed events were given out when they first happened.
+        self.file = open(self.journal_path, "ab")
+        self.library = library
+        library.add_listener(self.record)
+        if self.durability == "group":                                       # Starts the thread that fsyncs groups of records in the background.
+            self.flusher = threading.Thread(target=self.flush_periodically, daemon=True)
+            self.flusher.start()
+        return library
+
+    # Method that replays the journal records written after the snapshot.
+    def replay(self, library):
+        self.replayed = 0
+        if not os.path.exists(self.journal_path):
+            return
+        valid_bytes = 0
+        with open(self.journal_path, "rb") as journal:
+            for line in journal:                                             # Reads one record at a time, so memory stays bounded.
+                if not line.endswith(b"\n"):                                 # Stops at a record that was only partly written.
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                if record[0] <= self.snapshot_sequence:                      # Skips records that are already in the snapshot.
+                    continue
+                try:
+                    apply_record(library, record[1:])
+                except LibraryError:                                         # Only successful changes are journaled, so this is not expected.
+                    pass
+                self.sequence = record[0]
+                self.replayed += 1
+        if valid_bytes < os.path.getsize(self.journal_path):                 # Cuts off a damaged tail so new records follow valid ones.
+            with open(self.journal_path, "r+b") as journal:
+                journal.truncate(valid_bytes)
+
+    # Method that appends a library event to the journal (called by the library as a listener).
+    def record(self, event, *details):
+        with self.lock:
+            self.sequence += 1
+            record = [self.sequence, *encode_event(event, details)]
+            self.file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            self.pending += 1
+            if self.durability == "always" or (self.durability == "group" and self.pending >= self.group_size):
+                self.sync_locked()
+            snapshot_due = self.snapshot_every and self.sequence - self.snapshot_sequence >= self.snapshot_every
+        if snapshot_due:
+            self.snapshot()
+
+    # Method that flushes the journal to disk. The lock must be held.
+    def sync_locked(self):
+        self.file.flush()
+        if self.durability != "none":
+            os.fsync(self.file.fileno())
+        self.pending = 0
+
+    # Method that flushes the journal to disk.
+    def sync(self):
+        with self.lock:
+            self.sync_locked()
+
+    # Method that runs in the background and fsyncs waiting records in "group" mode.
+    def flush_periodically(self):
+        while not self.stop_flusher.wait(self.group_delay):
+            with self.lock:
+                if self.pending and not self.file.closed:
+                    self.sync_locked()
+
+    # Method that writes a snapshot of the library and empties the journal.
+    def snapshot(self):
+        with self.lock:
+            self.sync_locked()
+            state = snapshot_state(self.library)
+            state["sequence"] = self.sequence
+            temporary_path = self.snapshot_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as snapshot:    # Writes a new file first so a crash never leaves half a snapshot.
+                json.dump(state, snapshot, separators=(",", ":"))
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(temporary_path, self.snapshot_path)
+            fsync_directory(self.directory)
+            self.file.close()                                                # The records are now in the snapshot, so the journal can start over.
+            self.file = open(self.journal_path, "wb")
+            os.fsync(self.file.fileno())
+            self.snapshot_sequence = self.sequence
+
+    # Method that stops recording, optionally writing a final snapshot so the next load is fast.
+    def close(self, snapshot=True):
+        if self.file is None:
+            return
+        self.stop_flusher.set()
+        if self.flusher is not None:
+            self.flusher.join()
+        if snapshot:
+            self.snapshot()
+        else:
+            self.sync()
+        self.file.close()
+        self.file = None
+        self.library.listeners.remove(self.record)
+
+
+# Function that opens (or creates) a library stored in a data directory. Returns the library and its journal.
+def open_library(directory, **options):
+    journal = Journal(directory, **options)
+    return journal.load(), journal
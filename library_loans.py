@@ -0,0 +1,76 @@
+"""
+Loan Table
+==========================
+The books members have borrowed and not yet returned, one Loan per (member ID, book ID).
+
+Loans are indexed both ways: by member (which books does this member have?) and by book (who has this
+book?), so both questions, and finding one loan, take constant time however many loans there are. A loan
+keeps a reference to the book itself, so it still shows the right title after the book is renamed.
+"""
+
+
+# Class that represents one book borrowed by one member.
+class Loan:
+    __slots__ = ("member_id", "book", "borrowed_at", "due_at")
+
+    def __init__(self, member_id, book, borrowed_at, due_at=None):
+        self.member_id = member_id                                           # ID of the member who borrowed the book
+        self.book = book                                                     # The book (or e-book) borrowed
+        self.borrowed_at = borrowed_at                                       # Time it was borrowed, in seconds since the epoch
+        self.due_at = due_at                                                 # Time it must be returned by, in seconds since the epoch (set by the library)
+
+    # Property that gives the ID of the borrowed book.
+    @property
+    def book_id(self):
+        return self.book.book_id
+
+
+# Class that stores the current loans of a library, indexed by member and by book.
+class LoanTable:
+    def __init__(self):
+        self.by_member = {}                                                  # {book ID: Loan} of each member, keyed by member ID (in borrowing order)
+        self.by_book = {}                                                    # {member ID: Loan} of each book, keyed by book ID (in borrowing order)
+
+    def __len__(self):
+        return sum(len(loans) for loans in self.by_member.values())
+
+    # Method that finds the loan of a book to a member, or returns None.
+    def get(self, member_id, book_id):
+        return self.by_member.get(member_id, {}).get(book_id)
+
+    # Method that adds a loan. Returns False if the member already has that book.
+    def add(self, loan):
+        loans = self.by_member.setdefault(loan.member_id, {})
+        if loan.book_id in loans:
+            return False
+        loans[loan.book_id] = loan
+        self.by_book.setdefault(loan.book_id, {})[loan.member_id] = loan
+        return True
+
+    # Method that removes the loan of a book to a member. Returns the Loan, or None if there was none.
+    def remove(self, member_id, book_id):
+        loan = self.by_member.get(member_id, {}).pop(book_id, None)
+        if loan is None:
+            return None
+        del self.by_book[book_id][member_id]                                 # The emptied dict stays, so another thread holding it never writes to a lost one.
+        return loan
+
+    # Method that returns the loans of a member, keyed by book ID.
+    def of_member(self, member_id):
+        return self.by_member.get(member_id, {})
+
+    # Method that returns the loans of a book, keyed by member ID.
+    def of_book(self, book_id):
+        return self.by_book.get(book_id, {})
+
+    # Method that forgets a book that nobody has borrowed (after it is removed from the catalog).
+    def remove_book(self, book_id):
+        self.by_book.pop(book_id, None)
+
+    # Method that removes every loan of a member. Returns the removed loans.
+    def remove_member(self, member_id):
+        loans = list(self.by_member.get(member_id, {}).values())
+        for loan in loans:
+            self.remove(member_id, loan.book_id)
+        self.by_member.pop(member_id, None)
+        return loans
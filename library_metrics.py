@@ -0,0 +1,258 @@
+"""
+Library Metrics
+==========================
+Opt-in instrumentation for the Library Management System: counts the calls and failures of every public
+Library (or SQLiteLibrary) method and of the Console listings, and keeps a latency histogram for each of
+them. The numbers can be written as JSON or in the Prometheus text format.
+
+Instrumentation is switched on per library: instrument(library) replaces the methods of that one object
+with timed wrappers and leaves the class alone, so a library that is not instrumented runs exactly the
+same code as before. An instrumented library can be paused with metrics.enabled = False (each call then
+costs one extra function call and a flag check) and restored with uninstrument(library).
+
+Histograms use power-of-two buckets of nanoseconds: recording a call is a bit_length() and a list increment,
+and percentiles are read from the buckets with at most a factor of two of error.
+
+Calls slower than slow_threshold seconds are kept in metrics.slow_calls and passed to on_slow. With
+profile_every=N, one call in N of each operation runs under cProfile, and the profile of any of them that
+turns out to be slow is kept with it.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque, namedtuple
+from functools import wraps
+
+from Library_cli import NO_LOCK
+
+OPERATIONS = ("add_book", "add_books", "remove_book", "remove_books", "update_book", "update_copies",
+              "add_member", "add_members", "remove_member", "remove_members", "update_member",
+              "issue_book", "return_book", "place_hold", "cancel_hold", "process_due", "borrowers_of", "search_books", "search_books_ranked", "search_books_prefix",
+              "query_transactions",
+              "show_books", "show_members", "show_history", "show_search", "show_overdue")  # Methods timed by instrument() (those the object has)
+BUCKETS = 48                                                                 # Histogram buckets: bucket i holds calls that took less than 2**i nanoseconds (2**47 ns is about 39 hours)
+SLOW_CALLS_KEPT = 100                                                        # Slow calls remembered in Metrics.slow_calls
+PROFILE_LINES = 15                                                           # Functions listed in the profile of a slow call
+
+SlowCall = namedtuple("SlowCall", "operation seconds arguments profile")    # profile is the cProfile report as text, or None
+
+
+# Function that returns the value below which a share (0 to 1) of the sorted values fall (exactly, for the benchmarks that keep every timing).
+def percentile(sorted_values, share):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+# Class that holds the counters and the latency histogram of one operation.
+class OperationStats:
+    __slots__ = ("calls", "errors", "error_types", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0                                                       # Number of calls, including failed ones
+        self.errors = 0                                                      # Number of calls that raised an exception
+        self.error_types = {}                                                # Failed calls by exception class name
+        self.total_ns = 0                                                    # Time spent in all calls, in nanoseconds
+        self.max_ns = 0                                                      # Slowest call, in nanoseconds
+        self.buckets = [0] * BUCKETS                                         # Calls by power-of-two duration
+
+    # Method that records one call that took elapsed_ns nanoseconds and, if it failed, raised error.
+    def record(self, elapsed_ns, error=None):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+        if error is not None:
+            self.errors += 1
+            name = type(error).__name__
+            self.error_types[name] = self.error_types.get(name, 0) + 1
+
+    # Method that estimates the duration, in seconds, below which a share (0 to 1) of the calls fall.
+    def percentile(self, share):
+        if not self.calls:
+            return 0.0
+        wanted = share * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted and count:
+                return min(2 ** bucket, self.max_ns) / 1e9                   # The top of the bucket, but never more than the slowest call
+        return self.max_ns / 1e9
+
+    # Method that returns the statistics as a JSON-friendly dictionary.
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_types": dict(self.error_types),
+            "total_seconds": self.total_ns / 1e9,
+            "mean_seconds": self.total_ns / self.calls / 1e9 if self.calls else 0.0,
+            "max_seconds": self.max_ns / 1e9,
+            "p50_seconds": self.percentile(0.50),
+            "p90_seconds": self.percentile(0.90),
+            "p99_seconds": self.percentile(0.99),
+            "buckets": {f"{2 ** bucket / 1e9:g}": count for bucket, count in enumerate(self.buckets) if count},  # Upper bound in seconds -> calls
+        }
+
+
+####################################################################################################################################################################################
+
+
+# Class that collects the statistics of every instrumented operation.
+class Metrics:
+    def __init__(self, slow_threshold=None, profile_every=0, on_slow=None, thread_safe=False):
+        self.enabled = True                                                  # Set to False to stop recording without removing the wrappers.
+        self.stats = {}                                                      # OperationStats keyed by operation name
+        self.slow_ns = float("inf") if slow_threshold is None else int(slow_threshold * 1e9)  # Calls at least this slow are reported (never when None)
+        self.profile_every = profile_every                                   # Profiles one call in this many of each operation (0: never)
+        self.on_slow = on_slow                                               # Function called with a SlowCall for every slow call
+        self.slow_calls = deque(maxlen=SLOW_CALLS_KEPT)                      # The latest slow calls
+        self.lock = threading.Lock() if thread_safe else None                # Guards the counters when several threads use the library
+        self.profile_lock = threading.Lock()                                 # Only one call is profiled at a time (profilers cannot be nested).
+        self.started = time.time()
+
+    # Method that returns the statistics of an operation, creating them on first use.
+    def stats_for(self, operation):
+        return self.stats.setdefault(operation, OperationStats())
+
+    # Method that records one call of an operation.
+    def record(self, operation, stats, elapsed_ns, error, arguments, profiler=None):
+        if self.lock is None:
+            stats.record(elapsed_ns, error)
+        else:
+            with self.lock:
+                stats.record(elapsed_ns, error)
+        if elapsed_ns >= self.slow_ns:
+            self.report_slow(operation, elapsed_ns, arguments, profiler)
+
+    # Method that remembers a slow call and passes it to on_slow.
+    def report_slow(self, operation, elapsed_ns, arguments, profiler):
+        profile = None
+        if profiler is not None:
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            profile = text.getvalue()
+        slow_call = SlowCall(operation, elapsed_ns / 1e9, ", ".join(repr(argument)[:80] for argument in arguments), profile)
+        self.slow_calls.append(slow_call)
+        if self.on_slow is not None:
+            self.on_slow(slow_call)
+
+    # Method that forgets everything recorded so far.
+    def reset(self):
+        with self.lock or NO_LOCK:
+            self.stats.clear()
+            self.slow_calls.clear()
+            self.started = time.time()
+
+    # Method that returns all statistics as a JSON-friendly dictionary.
+    def to_json(self):
+        with self.lock or NO_LOCK:
+            operations = {operation: stats.to_dict() for operation, stats in sorted(self.stats.items())}
+        return {"started": self.started, "uptime_seconds": time.time() - self.started, "operations": operations,
+                "slow_calls": [slow_call._asdict() for slow_call in self.slow_calls]}
+
+    # Method that returns all statistics in the Prometheus text exposition format.
+    def to_prometheus(self, prefix="library"):
+        lines = [f"# HELP {prefix}_operation_calls_total Calls of each library operation.",
+                 f"# TYPE {prefix}_operation_calls_total counter"]
+        with self.lock or NO_LOCK:
+            stats = sorted((operation, stats.calls, stats.errors, dict(stats.error_types), stats.total_ns, list(stats.buckets))
+                           for operation, stats in self.stats.items())
+        lines += [f'{prefix}_operation_calls_total{{operation="{operation}"}} {calls}' for operation, calls, *_ in stats]
+        lines += [f"# HELP {prefix}_operation_errors_total Failed calls of each library operation, by exception.",
+                  f"# TYPE {prefix}_operation_errors_total counter"]
+        lines += [f'{prefix}_operation_errors_total{{operation="{operation}",error="{error}"}} {count}'
+                  for operation, _, _, error_types, _, _ in stats for error, count in sorted(error_types.items())]
+        lines += [f"# HELP {prefix}_operation_duration_seconds Time taken by each library operation.",
+                  f"# TYPE {prefix}_operation_duration_seconds histogram"]
+        for operation, calls, _, _, total_ns, buckets in stats:
+            cumulative = 0
+            last = max((bucket for bucket, count in enumerate(buckets) if count), default=-1)  # Buckets above the slowest call are left out.
+            for bucket, count in enumerate(buckets[:last + 1]):
+                cumulative += count
+                lines.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{operation}",le="{2 ** bucket / 1e9:g}"}} {cumulative}')
+            lines.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{operation}",le="+Inf"}} {calls}')
+            lines.append(f'{prefix}_operation_duration_seconds_sum{{operation="{operation}"}} {total_ns / 1e9}')
+            lines.append(f'{prefix}_operation_duration_seconds_count{{operation="{operation}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+    # Method that writes the statistics to a file: Prometheus text if the name ends in .prom or .txt, JSON otherwise.
+    def write(self, path):
+        if path.endswith((".prom", ".txt")):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_json(), indent=2)
+        temporary_path = path + ".tmp"                                       # Written next to the file and renamed, so readers never see half a file.
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary_path, path)
+
+
+####################################################################################################################################################################################
+
+
+# Function that wraps one method of an object so its calls are recorded in metrics.
+def timed(metrics, operation, method):
+    stats = metrics.stats_for(operation)
+    clock = time.perf_counter_ns
+    calls = 0                                                                # Calls seen by this wrapper, to pick the ones to profile
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        nonlocal calls
+        if not metrics.enabled:
+            return method(*args, **kwargs)
+        calls += 1
+        if metrics.profile_every and calls % metrics.profile_every == 0 and metrics.profile_lock.acquire(blocking=False):
+            return profiled(metrics, operation, stats, method, args, kwargs)
+        started = clock()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as error:
+            metrics.record(operation, stats, clock() - started, error, args)
+            raise
+        metrics.record(operation, stats, clock() - started, None, args)
+        return result
+
+    return wrapper
+
+
+# Function that runs one call of an operation under cProfile and records it. The caller holds metrics.profile_lock.
+def profiled(metrics, operation, stats, method, args, kwargs):
+    profiler = cProfile.Profile()
+    error = None
+    started = time.perf_counter_ns()
+    try:
+        return profiler.runcall(method, *args, **kwargs)
+    except Exception as caught:
+        error = caught
+        raise
+    finally:
+        elapsed_ns = time.perf_counter_ns() - started
+        metrics.profile_lock.release()
+        metrics.record(operation, stats, elapsed_ns, error, args, profiler)
+
+
+# Function that instruments the public methods of a library or console. Returns the Metrics (also set as target.metrics).
+def instrument(target, metrics=None, operations=OPERATIONS):
+    if metrics is None:
+        metrics = Metrics(thread_safe=getattr(target, "stripes", None) is not None)
+    for operation in operations:
+        method = getattr(target, operation, None)
+        if callable(method):
+            setattr(target, operation, timed(metrics, operation, method))   # Set on the object only; other instances are untouched.
+    target.metrics = metrics
+    return metrics
+
+
+# Function that removes the instrumentation from a library or console.
+def uninstrument(target):
+    for operation in OPERATIONS:
+        vars(target).pop(operation, None)                                    # Uncovers the method of the class again.
+    vars(target).pop("metrics", None)
@@ -0,0 +1,192 @@
+"""
+Library Rendering
+==========================
+The presentation layer of the Library Management System: turns books, members, transactions and the results
+of library methods into text. The Library itself never prints; programs that use it directly pay for no
+terminal output at all.
+
+Listings are generators that produce one line at a time, so a large catalog is never turned into text all
+at once. Console writes those lines through a BufferedWriter (one write per block instead of one per line),
+can show a listing one page at a time, and shows the message for the result of each command.
+"""
+
+from datetime import datetime
+from itertools import islice
+
+from Library_cli import Ebook, supported_method
+from library_metrics import instrument
+from library_transactions import BORROW_EBOOK, RETURN
+
+FLUSH_SIZE = 1 << 16                                                         # Characters collected before the output is written out
+PAGE_SIZE = 20                                                               # Lines shown at a time when the console pauses between pages
+
+
+# Class that collects output and writes it to a file in large blocks instead of once per line.
+class BufferedWriter:
+    def __init__(self, file, flush_size=FLUSH_SIZE):
+        self.file = file                                                     # Where the output ends up (None throws it away)
+        self.flush_size = flush_size
+        self.parts = []                                                      # Output not written out yet
+        self.size = 0                                                        # Characters in self.parts
+
+    # Method that collects text, writing it out once enough has been collected.
+    def write(self, text):
+        if self.file is None:
+            return len(text)
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.flush_size:
+            self.flush()
+        return len(text)
+
+    # Method that writes out everything collected so far.
+    def flush(self):
+        if self.parts:
+            self.file.write("".join(self.parts))
+            self.file.flush()
+        self.parts.clear()
+        self.size = 0
+
+
+# Function that describes a transaction the way the interactive program reports it, e.g. "Alice borrowed 'Dune'".
+def describe_transaction(library, transaction):
+    member, book = library.get_member(transaction.member_id), library.get_book(transaction.book_id)
+    name = member.name if member else f"Member {transaction.member_id}"
+    title = book.title if book else f"#{transaction.book_id}"
+    if transaction.operation == RETURN:
+        return f"{name} returned '{title}'"
+    if transaction.operation == BORROW_EBOOK:
+        return f"{name} borrowed Ebook '{title}'"
+    return f"{name} borrowed '{title}'"
+
+
+# Function that describes a change to a hold, e.g. "Alice placed a hold on 'Dune'".
+def describe_hold(library, hold, verb):
+    member, book = library.get_member(hold.member_id), library.get_book(hold.book_id)
+    name = member.name if member else f"Member {hold.member_id}"
+    title = book.title if book else f"#{hold.book_id}"
+    return f"{name} {verb} '{title}'"
+
+
+MESSAGES = {                                                                 # Library method -> function(library, result) giving the message shown when it succeeds
+    "add_book": lambda library, book: f"Book/Ebook '{book.title}' added to the library.",
+    "remove_book": lambda library, book: f"Book '{book.title}' removed from the library.",
+    "update_book": lambda library, book: f"Book '{book.book_id}' updated successfully.",
+    "add_member": lambda library, member: f"Member '{member.name}' added to the library.",
+    "remove_member": lambda library, member: f"Member '{member.name}' removed from the library.",
+    "update_member": lambda library, member, old_name: f"Member '{old_name}' renamed to '{member.name}'.",
+    "issue_book": describe_transaction,
+    "return_book": describe_transaction,
+    "place_hold": lambda library, hold: describe_hold(library, hold, "placed a hold on"),
+    "cancel_hold": lambda library, hold: describe_hold(library, hold, "cancelled their hold on"),
+}
+
+RECALLED = {                                                                 # Library method -> function(library, *args) giving what its message needs from before the change
+    "update_member": lambda library, member_id, new_name: getattr(library.get_member(member_id), "name", None),
+}
+
+
+# Function that yields one line for every book.
+def book_lines(books):
+    for book in books:
+        yield ("[Ebook] " if isinstance(book, Ebook) else "[Book]  ") + book.describe()
+
+
+# Function that yields one line for every member.
+def member_lines(members):
+    for member in members:
+        yield member.describe()
+
+
+# Function that yields the transaction history of every member.
+def history_lines(members):
+    for member in members:
+        yield f"\nTransaction History for {member.name}:"
+        history = member.transaction_history                                 # Formats the transactions only now, when they are shown.
+        if not history:
+            yield "No transaction history."
+        yield from history
+
+
+# Function that yields one line for every overdue loan.
+def overdue_lines(library, loans):
+    for loan in loans:
+        member = library.get_member(loan.member_id)
+        name = member.name if member else f"Member {loan.member_id}"
+        yield f"{name}: '{loan.book.title}' was due {datetime.fromtimestamp(loan.due_at):%Y-%m-%d %H:%M}"
+
+
+####################################################################################################################################################################################
+
+
+# Class that shows a library and the results of commands on a text stream.
+class Console:
+    def __init__(self, library, output=None, page_size=PAGE_SIZE, pause=False):
+        self.library = library
+        self.writer = BufferedWriter(output)                                 # Output goes through a buffer (None throws it away).
+        self.page_size = page_size                                           # Lines shown before pausing (when pause is on)
+        self.pause = pause                                                   # Waits for Enter between pages and after a listing, for a person at a terminal
+        metrics = getattr(library, "metrics", None)
+        if metrics is not None:                                              # The listings of an instrumented library are timed with its other operations.
+            instrument(self, metrics, ("show_books", "show_members", "show_history", "show_search", "show_overdue"))
+
+    # Method that writes one line.
+    def say(self, text):
+        self.writer.write(text + "\n")
+
+    # Method that writes out everything still in the buffer.
+    def flush(self):
+        self.writer.flush()
+
+    # Method that runs a library method and shows the message for its result. Returns the result; a LibraryError is passed on.
+    def perform(self, action, *args):
+        shown = self.writer.file is not None                                 # Only looks up names for the message when it is shown.
+        recall = RECALLED.get(action) if shown else None
+        earlier = recall(self.library, *args) if recall else None           # Read before the change overwrites it, such as a member's old name
+        result = supported_method(self.library, action)(*args)               # Holds are refused by backends that do not have them.
+        if shown:
+            self.say(MESSAGES[action](self.library, result, earlier) if recall else MESSAGES[action](self.library, result))
+        return result
+
+    # Method that shows lines under a heading, a page at a time. offset and limit select part of a listing.
+    def show(self, heading, lines, offset=0, limit=None):
+        if heading:
+            self.say(heading)
+        stop = None if limit is None else offset + limit
+        for count, line in enumerate(islice(lines, offset, stop), 1):
+            self.say(line)
+            if self.pause and count % self.page_size == 0:                   # Lets the reader stop after every page.
+                self.flush()
+                if input("-- Press Enter for more, or q and Enter to stop -- ").strip().lower() == "q":
+                    break
+        if self.pause:
+            self.flush()
+            input("\nPress Enter to continue...")
+
+    # Method that shows the books in the library.
+    def show_books(self, offset=0, limit=None):
+        self.show("\nLibrary Books:", book_lines(self.library.iter_books()), offset, limit)
+
+    # Method that shows the members of the library.
+    def show_members(self, offset=0, limit=None):
+        self.show("\nLibrary Members:", member_lines(self.library.iter_members()), offset, limit)
+
+    # Method that shows the transaction history of every member.
+    def show_history(self, offset=0, limit=None):
+        self.show(None, history_lines(self.library.iter_members()), offset, limit)
+
+    # Method that shows the loans that are overdue, the longest overdue first.
+    def show_overdue(self, offset=0, limit=None):
+        loans = supported_method(self.library, "overdue_loans")()
+        self.show("\nOverdue Loans:", overdue_lines(self.library, loans) if loans else iter(["No overdue loans."]), offset, limit)
+
+    # Method that searches for books and shows what was found. Returns the books found.
+    def show_search(self, search_term):
+        found_books = self.library.search_books(search_term)
+        if found_books:
+            self.say("\nSearch Results:")
+            for line in book_lines(found_books):
+                self.say(line)
+        else:
+            self.say(f"No books found matching '{search_term}'.")
+        return found_books
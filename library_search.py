@@ -0,0 +1,161 @@
+"""
+Search Index
+==========================
+An in-memory search index over book titles and authors for the Library Management System.
+
+Features:
+- Case-insensitive substring search using an index of 3-character grams (trigrams).
+- Ranked multi-term search.
+- Prefix (autocomplete) search over the words of titles and authors.
+- Incremental updates when books are added, updated or removed.
+"""
+
+import re
+from bisect import bisect_left
+
+WORD_PATTERN = re.compile(r"\w+")                                            # Pattern that splits titles and authors into words.
+GRAM_SIZE = 3                                                                # Length of the grams stored in the index
+
+
+# Function that returns every gram (substring of GRAM_SIZE characters) of a text. A shorter text is its own gram.
+def grams_of(text):
+    if len(text) < GRAM_SIZE:
+        return {text} if text else set()
+    return {text[start:start + GRAM_SIZE] for start in range(len(text) - GRAM_SIZE + 1)}
+
+
+# Class that indexes book titles and authors so searches do not scan the whole catalog.
+class SearchIndex:
+    def __init__(self):
+        self.fields = {}                                                     # Lowercased (title, author) keyed by book ID
+        self.order = {}                                                      # Order in which the books were added, keyed by book ID
+        self.grams = {}                                                      # Set of book IDs keyed by gram
+        self.words = []                                                      # Sorted list of the distinct words, brought up to date by sorted_words()
+        self.new_words = []                                                  # Words added since the word list was last sorted
+        self.words_removed = False                                           # Whether words were dropped since the word list was last sorted
+        self.word_books = {}                                                 # Set of book IDs keyed by word
+        self.next_position = 0                                               # Position given to the next new book
+
+    # Method that adds a book to the index, or re-indexes it if it is already there.
+    def add(self, book_id, title, author):
+        position = self.order.get(book_id)                                   # Keeps the original position when a book is re-indexed.
+        if position is not None:
+            self.remove(book_id)
+        else:
+            position = self.next_position
+            self.next_position += 1
+        title, author = title.lower(), author.lower()
+        self.fields[book_id] = (title, author)
+        self.order[book_id] = position
+        for gram in grams_of(title) | grams_of(author):                      # Adds the book to the posting set of each of its grams.
+            self.grams.setdefault(gram, set()).add(book_id)
+        for word in set(WORD_PATTERN.findall(title + " " + author)):         # Adds the book to the posting set of each of its words.
+            books = self.word_books.get(word)
+            if books is None:
+                books = self.word_books[word] = set()
+                self.new_words.append(word)                                  # Sorted in by the next prefix lookup, so bulk loads do not shift the list once per word.
+            books.add(book_id)
+
+    # Method that removes a book from the index.
+    def remove(self, book_id):
+        fields = self.fields.pop(book_id, None)
+        if fields is None:
+            return
+        del self.order[book_id]
+        title, author = fields
+        for gram in grams_of(title) | grams_of(author):
+            books = self.grams[gram]
+            books.discard(book_id)
+            if not books:                                                    # Drops grams that no longer match any book.
+                del self.grams[gram]
+        for word in set(WORD_PATTERN.findall(title + " " + author)):
+            books = self.word_books[word]
+            books.discard(book_id)
+            if not books:                                                    # Drops words that no longer match any book.
+                del self.word_books[word]
+                self.words_removed = True
+
+    # Method that sorts book IDs into the order the books were added.
+    def in_order(self, book_ids):
+        return sorted(book_ids, key=self.order.__getitem__)
+
+    # Method that returns the IDs of books whose title or author contains the search term.
+    def substring(self, search_term):
+        term = search_term.lower()
+        if not term:                                                         # An empty search term matches every book.
+            return self.in_order(self.fields)
+        if len(term) == GRAM_SIZE:                                           # The term is a gram itself, so its posting set is the answer.
+            return self.in_order(self.grams.get(term, ()))
+        if len(term) < GRAM_SIZE:                                            # Shorter terms match the books of every gram that contains them.
+            matches = set()
+            for gram, books in self.grams.items():
+                if term in gram:
+                    matches.update(books)
+            return self.in_order(matches)
+        postings = []
+        for start in range(len(term) - GRAM_SIZE + 1):                       # Collects the posting set of every gram in the term.
+            books = self.grams.get(term[start:start + GRAM_SIZE])
+            if not books:
+                return []
+            postings.append(books)
+        postings.sort(key=len)                                               # Intersects starting from the smallest posting set.
+        candidates = postings[0].intersection(*postings[1:])
+        matches = []
+        for book_id in candidates:                                           # Checks each candidate, since grams can match out of order.
+            title, author = self.fields[book_id]
+            if term in title or term in author:
+                matches.append(book_id)
+        return self.in_order(matches)
+
+    # Method that returns the sorted list of the distinct words in the index, sorting in the changes made since the last call.
+    def sorted_words(self):
+        if self.words_removed:                                               # Words that were removed (and maybe added again) mean sorting afresh.
+            self.words = sorted(self.word_books)
+        elif self.new_words:
+            self.words.extend(self.new_words)
+            self.words.sort()                                                # The list is already sorted, so this merges in the new words.
+        self.new_words = []
+        self.words_removed = False
+        return self.words
+
+    # Method that returns the words in the index starting with a prefix, in alphabetical order.
+    def suggest(self, prefix, limit=10):
+        prefix = prefix.lower()
+        words = self.sorted_words()
+        suggestions = []
+        for index in range(bisect_left(words, prefix), len(words)):          # Walks the sorted words from the first one at or after the prefix.
+            word = words[index]
+            if not word.startswith(prefix) or len(suggestions) == limit:
+                break
+            suggestions.append(word)
+        return suggestions
+
+    # Method that returns the IDs of books with a word in the title or author starting with a prefix.
+    def prefix(self, prefix, limit=None):
+        prefix = prefix.lower()
+        words = self.sorted_words()
+        matches = set()
+        for index in range(bisect_left(words, prefix), len(words)):
+            word = words[index]
+            if not word.startswith(prefix):
+                break
+            matches.update(self.word_books[word])
+        return self.in_order(matches)[:limit]
+
+    # Method that returns the IDs of books matching any word of a query, best matches first.
+    def ranked(self, query, limit=None):
+        scores = self.scores(query)
+        ranking = sorted(scores, key=lambda book_id: (-scores[book_id], self.order[book_id]))
+        return ranking[:limit]
+
+    # Method that scores the books matching any word of a query. Returns {book ID: score}.
+    def scores(self, query):
+        scores = {}
+        for term in set(WORD_PATTERN.findall(query.lower())):                # Scores each word of the query separately.
+            for book_id in self.substring(term):
+                title, author = self.fields[book_id]
+                score = 2 if term in title else 1                            # Title matches count more than author matches.
+                if book_id in self.word_books.get(term, ()):
+                    score += 1                                               # Whole-word matches count more than partial matches.
+                scores[book_id] = scores.get(book_id, 0) + score
+        return scores
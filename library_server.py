@@ -0,0 +1,284 @@
+"""
+Library Server
+==========================
+An asyncio network service that lets many clients use one Library at the same time.
+
+Clients connect over TCP and send one JSON request per line; the server answers every request with one JSON
+line, in the order the requests arrived. Clients may send many requests without waiting for the answers
+(pipelining), and the "batch" operation runs a list of requests in one round trip (a batch cannot hold
+another batch).
+
+Request:  {"id": 1, "op": "issue_book", "args": {"member_id": 1, "book_id": 2}}
+Answer:   {"id": 1, "ok": true, "result": true}
+Failure:  {"id": 1, "ok": false, "error": "Sorry, 'Dune' is not available.", "type": "NotAvailableError"}
+Batch:    {"id": 2, "op": "batch", "requests": [{"op": "get_book", "args": [2]}, ...]}
+
+"args" can be an object of keyword arguments or a list of positional arguments.
+"""
+
+import asyncio
+import json
+from itertools import islice
+
+from Library_cli import Book, Ebook, LibraryError, Member, MemberNotFoundError, supported_method
+from library_holds import Hold, Notice
+from library_loans import Loan
+from library_transactions import Transaction
+
+MAX_LINE_BYTES = 1 << 20                                                     # Longest request accepted, so one client cannot exhaust memory
+READ_SIZE = 1 << 16                                                          # Bytes read from a connection at a time
+
+
+# Class for requests that cannot be carried out; its message is sent back to the client.
+class RequestError(Exception):
+    pass
+
+
+# Function that turns a book into a JSON-friendly dictionary.
+def book_to_json(book):
+    if isinstance(book, Ebook):
+        return {"kind": "ebook", "book_id": book.book_id, "title": book.title, "author": book.author, "file_size": book.file_size}
+    return {"kind": "book", "book_id": book.book_id, "title": book.title, "author": book.author, "copies": book.copies}
+
+
+# Function that turns a member into a JSON-friendly dictionary.
+def member_to_json(member):
+    return {"member_id": member.member_id, "name": member.name, "borrowed_books": list(member.borrowed_books)}
+
+
+# Function that turns the result of a library method into JSON-friendly data.
+def to_json(result):
+    if isinstance(result, Book):
+        return book_to_json(result)
+    if isinstance(result, Member):
+        return member_to_json(result)
+    if isinstance(result, (Transaction, Notice)):
+        return result._asdict()
+    if isinstance(result, Loan):
+        return {"member_id": result.member_id, "book_id": result.book_id, "borrowed_at": result.borrowed_at, "due_at": result.due_at}
+    if isinstance(result, Hold):
+        return {"member_id": result.member_id, "book_id": result.book_id, "priority": result.priority,
+                "placed_at": result.placed_at, "expires_at": result.expires_at}
+    if isinstance(result, list):
+        return [to_json(item) for item in result]
+    return result
+
+
+# Function that checks that a request argument is a whole number (JSON floats, booleans and strings are refused). Returns the number.
+def whole_number(value, name, minimum=None):
+    if type(value) is not int:
+        raise RequestError(f"{name} must be a whole number, got {value!r}")
+    if minimum is not None and value < minimum:
+        raise RequestError(f"{name} must be at least {minimum}, got {value}")
+    return value
+
+
+# Function that checks a request argument that may be left out (None). Returns the value.
+def optional_number(value, name, minimum=None):
+    return None if value is None else whole_number(value, name, minimum)
+
+
+# Function that checks that a request argument is a string. Returns the string.
+def text(value, name):
+    if not isinstance(value, str):
+        raise RequestError(f"{name} must be a string, got {value!r}")
+    return value
+
+
+# Function that adds a book, or an e-book when a file size is given.
+def add_book(library, book_id, title, author, copies=None, file_size=None):
+    book_id, title, author = whole_number(book_id, "book_id"), text(title, "title"), text(author, "author")
+    if file_size is not None:
+        return library.add_book(Ebook(book_id, title, author, whole_number(file_size, "file_size", 0)))
+    if copies is None:
+        raise RequestError("add_book needs copies (or file_size for an e-book)")
+    return library.add_book(Book(book_id, title, author, whole_number(copies, "copies", 0)))
+
+
+# Function that updates a book's title, author and number of copies or file size.
+def update_book(library, book_id, title=None, author=None, copies=None, file_size=None):
+    return library.update_book(whole_number(book_id, "book_id"), None if title is None else text(title, "title"),
+                               None if author is None else text(author, "author"),
+                               optional_number(copies, "copies", 0), optional_number(file_size, "file_size", 0))
+
+
+# Function that lists one page of books.
+def list_books(library, offset=0, limit=100):
+    offset = whole_number(offset, "offset", 0)
+    return list(islice(library.iter_books(), offset, offset + whole_number(limit, "limit", 0)))
+
+
+# Function that lists one page of members.
+def list_members(library, offset=0, limit=100):
+    offset = whole_number(offset, "offset", 0)
+    return list(islice(library.iter_members(), offset, offset + whole_number(limit, "limit", 0)))
+
+
+# Function that returns one page of a member's transaction history as text.
+def member_history(library, member_id, offset=0, limit=100):
+    offset, limit = whole_number(offset, "offset", 0), whole_number(limit, "limit", 0)
+    member = library.get_member(whole_number(member_id, "member_id"))
+    if member is None:
+        raise MemberNotFoundError(member_id)
+    return member.transaction_history[offset:offset + limit]
+
+
+# Function that returns transactions, optionally only those of a member, of a book and/or between two epoch times, a page at a time.
+def query_transactions(library, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+    return library.query_transactions(optional_number(member_id, "member_id"), optional_number(book_id, "book_id"),
+                                      optional_number(start, "start"), optional_number(end, "end"),
+                                      whole_number(offset, "offset", 0), optional_number(limit, "limit", 0))
+
+
+# Function that returns the operation metrics of an instrumented library (see library_metrics.py).
+def metrics(library, format="json"):
+    collected = getattr(library, "metrics", None)
+    if collected is None:
+        raise RequestError("metrics are not enabled (start the server with --metrics)")
+    return collected.to_prometheus() if format == "prometheus" else collected.to_json()
+
+
+# Function that returns the circulation report of a library served with analytics (see library_analytics.py).
+def analytics(library, count=10):
+    collected = getattr(library, "analytics", None)
+    if collected is None:
+        raise RequestError("analytics are not enabled (start the server with --analytics)")
+    return collected.summary(count)
+
+
+OPERATIONS = {                                                               # Operation name -> function(library, *args, **kwargs)
+    "add_book": add_book,
+    "update_book": update_book,
+    "remove_book": lambda library, book_id: library.remove_book(whole_number(book_id, "book_id")),
+    "get_book": lambda library, book_id: library.get_book(whole_number(book_id, "book_id")),
+    "list_books": list_books,
+    "add_member": lambda library, member_id, name: library.add_member(Member(whole_number(member_id, "member_id"), text(name, "name"))),
+    "update_member": lambda library, member_id, new_name: library.update_member(whole_number(member_id, "member_id"), text(new_name, "new_name")),
+    "remove_member": lambda library, member_id: library.remove_member(whole_number(member_id, "member_id")),
+    "get_member": lambda library, member_id: library.get_member(whole_number(member_id, "member_id")),
+    "list_members": list_members,
+    "issue_book": lambda library, member_id, book_id: library.issue_book(whole_number(member_id, "member_id"), whole_number(book_id, "book_id")),
+    "return_book": lambda library, member_id, book_id: library.return_book(whole_number(member_id, "member_id"), whole_number(book_id, "book_id")),
+    "place_hold": lambda library, member_id, book_id, priority=0: supported_method(library, "place_hold")(
+        whole_number(member_id, "member_id"), whole_number(book_id, "book_id"), whole_number(priority, "priority")),
+    "cancel_hold": lambda library, member_id, book_id: supported_method(library, "cancel_hold")(whole_number(member_id, "member_id"), whole_number(book_id, "book_id")),
+    "waiting_for": lambda library, book_id: supported_method(library, "waiting_for")(whole_number(book_id, "book_id")),
+    "process_due": lambda library: supported_method(library, "process_due")(),
+    "overdue_loans": lambda library: supported_method(library, "overdue_loans")(),
+    "borrowers_of": lambda library, book_id: library.borrowers_of(whole_number(book_id, "book_id")),
+    "search_books": lambda library, search_term: library.search_books(text(search_term, "search_term")),
+    "search_books_ranked": lambda library, query, limit=10: library.search_books_ranked(text(query, "query"), whole_number(limit, "limit", 0)),
+    "search_books_prefix": lambda library, prefix, limit=10: library.search_books_prefix(text(prefix, "prefix"), whole_number(limit, "limit", 0)),
+    "query_transactions": query_transactions,
+    "member_history": member_history,
+    "metrics": metrics,
+    "analytics": analytics,
+}
+
+
+####################################################################################################################################################################################
+
+
+# Class that serves a library to many clients over TCP.
+class LibraryServer:
+    def __init__(self, library, host="127.0.0.1", port=8765):
+        self.library = library
+        self.host = host
+        self.port = port                                                     # Port to listen on (0 picks a free port, see self.port after start)
+        self.server = None
+        self.requests = 0                                                    # Number of requests answered
+
+    # Method that carries out one request and returns the answer as a dictionary. in_batch is True for the requests of a batch.
+    def execute(self, request, in_batch=False):
+        if not isinstance(request, dict):
+            return {"id": None, "ok": False, "error": "a request must be a JSON object"}
+        request_id, operation = request.get("id"), request.get("op")
+        self.requests += 1
+        if operation == "batch":                                             # Runs a list of requests in one round trip.
+            if in_batch:                                                     # Batches inside batches could nest deeper than the stack.
+                return {"id": request_id, "ok": False, "error": "a batch cannot contain another batch"}
+            requests = request.get("requests")
+            if not isinstance(requests, list):
+                return {"id": request_id, "ok": False, "error": "batch needs a list of requests"}
+            return {"id": request_id, "ok": True, "result": [self.execute(inner, True) for inner in requests]}
+        handler = OPERATIONS.get(operation)
+        if handler is None:
+            return {"id": request_id, "ok": False, "error": f"unknown operation {operation!r}"}
+        args = request.get("args", {})
+        try:
+            result = to_json(handler(self.library, *args) if isinstance(args, list) else handler(self.library, **args))
+        except (LibraryError, RequestError) as error:                        # The library refused the request.
+            return {"id": request_id, "ok": False, "error": str(error), "type": type(error).__name__}
+        except TypeError as error:                                           # Missing or unexpected arguments.
+            return {"id": request_id, "ok": False, "error": f"bad arguments for {operation}: {error}"}
+        except Exception as error:                                           # Any other failure is answered too, so the connection and the requests pipelined after it survive.
+            return {"id": request_id, "ok": False, "error": f"{operation} failed: {type(error).__name__}: {error}", "type": type(error).__name__}
+        return {"id": request_id, "ok": True, "result": result}
+
+    # Method that turns one request line into one answer line.
+    def answer(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"id": None, "ok": False, "error": "invalid JSON"}
+        except RecursionError:                                               # Arrays or objects nested thousands deep
+            response = {"id": None, "ok": False, "error": "request nested too deeply"}
+        else:
+            response = self.execute(request)
+        try:
+            return json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n"
+        except (ValueError, RecursionError):                                 # An id that cannot be sent back (nested too deeply, or circular)
+            return json.dumps({"id": None, "ok": False, "error": "the answer could not be encoded"}).encode("utf-8") + b"\n"
+
+    # Method that serves one connection until the client disconnects.
+    async def handle_connection(self, reader, writer):
+        pending = b""                                                        # Start of a request whose end has not arrived yet
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                if len(pending) > MAX_LINE_BYTES:
+                    writer.write(json.dumps({"id": None, "ok": False, "error": "request too long"}).encode("utf-8") + b"\n")
+                    break
+                if lines:                                                    # Answers every complete request read so far with a single write.
+                    writer.write(b"".join(self.answer(line) for line in lines if line.strip()))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # Method that starts listening for connections.
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    # Method that serves connections until the task is cancelled.
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    # Method that stops listening.
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+# Function that runs a server for a library until interrupted with Ctrl+C.
+def serve(library, host="127.0.0.1", port=8765):
+    server = LibraryServer(library, host, port)
+
+    async def run():
+        await server.start()
+        print(f"Serving the library on {server.host}:{server.port} (Ctrl+C to stop).")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"Stopped after {server.requests} requests.")
@@ -0,0 +1,408 @@
+"""
+SQLite Library
+==========================
+A storage engine for the Library Management System that keeps books, e-books, members, loans and
+transaction history in a SQLite database instead of in memory.
+
+SQLiteLibrary offers the same methods as Library, so the CLI can use either one. The database runs in
+WAL mode, every lookup goes through an index, and the bulk methods (add_books, add_members,
+update_copies, remove_books, remove_members) load or change many records with a single executemany.
+"""
+
+import sqlite3
+from datetime import datetime
+from itertools import islice
+
+from Library_cli import (AlreadyBorrowedError, Book, BookNotFoundError, BookOnLoanError, DuplicateIdError, Ebook, Member,
+                         MemberHasLoansError, MemberNotFoundError, NotAvailableError, NotBorrowedError)
+from library_loans import Loan
+from library_search import WORD_PATTERN
+from library_transactions import BORROW, BORROW_EBOOK, RETURN, Transaction, TransactionLog
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_id   INTEGER NOT NULL UNIQUE,
+    kind      TEXT    NOT NULL,
+    title     TEXT    NOT NULL,
+    author    TEXT    NOT NULL,
+    copies    INTEGER,
+    file_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS books_title ON books (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS books_author ON books (author COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS members (
+    member_id INTEGER NOT NULL UNIQUE,
+    name      TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS loans (
+    id          INTEGER PRIMARY KEY,
+    member_id   INTEGER NOT NULL,
+    book_id     INTEGER NOT NULL,
+    borrowed_at INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS loans_member_book ON loans (member_id, book_id);
+CREATE INDEX IF NOT EXISTS loans_book ON loans (book_id);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id        INTEGER PRIMARY KEY,
+    operation INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    book_id   INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    title     TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_member ON transactions (member_id, id);
+CREATE INDEX IF NOT EXISTS transactions_book ON transactions (book_id, id);
+CREATE INDEX IF NOT EXISTS transactions_time ON transactions (timestamp);
+"""
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS books_search USING fts5 (
+    title, author, content='books', content_rowid='rowid', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS books_words USING fts5 (
+    title, author, content='books', content_rowid='rowid', tokenize='unicode61 remove_diacritics 0', prefix='1 2 3'
+);
+CREATE TRIGGER IF NOT EXISTS books_search_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_search (rowid, title, author) VALUES (new.rowid, new.title, new.author);
+    INSERT INTO books_words (rowid, title, author) VALUES (new.rowid, new.title, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_search_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_search (books_search, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+    INSERT INTO books_words (books_words, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_search_update AFTER UPDATE OF title, author ON books BEGIN
+    INSERT INTO books_search (books_search, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+    INSERT INTO books_search (rowid, title, author) VALUES (new.rowid, new.title, new.author);
+    INSERT INTO books_words (books_words, rowid, title, author) VALUES ('delete', old.rowid, old.title, old.author);
+    INSERT INTO books_words (rowid, title, author) VALUES (new.rowid, new.title, new.author);
+END;
+"""
+
+BOOK_COLUMNS = "book_id, kind, title, author, copies, file_size"
+JOINED_BOOK_COLUMNS = "books.book_id, books.kind, books.title, books.author, books.copies, books.file_size"
+INSERT_TRANSACTION = "INSERT INTO transactions (operation, member_id, book_id, timestamp, title) VALUES (?, ?, ?, ?, ?)"
+
+
+# Function that turns a row of the books table into a Book or Ebook.
+def book_from_row(row):
+    book_id, kind, title, author, copies, file_size = row
+    if kind == "ebook":
+        return Ebook(book_id, title, author, file_size)
+    return Book(book_id, title, author, copies)
+
+
+# Function that turns a Book or Ebook into the parameters of an insert into the books table.
+def book_to_row(book):
+    if isinstance(book, Ebook):
+        return (book.book_id, "ebook", book.title, book.author, None, book.file_size)
+    return (book.book_id, "book", book.title, book.author, book.copies, None)
+
+
+# Function that escapes the wildcards of a LIKE pattern.
+def like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "%" + escaped + "%"
+
+
+####################################################################################################################################################################################
+
+
+# Class that manages books and members stored in a SQLite database.
+class SQLiteLibrary:
+    def __init__(self, path=":memory:"):
+        self.path = path                                                     # Path of the database file (":memory:" for a temporary database)
+        self.connection = sqlite3.connect(path, cached_statements=256)       # Caches the prepared statements of the queries below.
+        self.connection.execute("PRAGMA journal_mode = WAL")                 # Lets readers work while a change is being written.
+        self.connection.execute("PRAGMA synchronous = NORMAL")               # WAL mode stays consistent after a crash without fsyncing every commit.
+        self.connection.executescript(SCHEMA)
+        try:
+            self.connection.executescript(SEARCH_SCHEMA)                     # Uses full-text indexes of trigrams and of words when SQLite has them.
+            self.full_text_search = True
+        except sqlite3.OperationalError:
+            self.full_text_search = False
+        self.listeners = []                                                  # Functions that are told about every change to the library
+
+    # Method that registers a function to be called after every successful change, as listener(event, *details).
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # Method that tells the listeners about a change.
+    def notify(self, event, *details):
+        for listener in self.listeners:
+            listener(event, *details)
+
+    # Method that closes the database.
+    def close(self):
+        self.connection.close()
+
+    # Method that yields the books in the order they were added, without loading them all at once.
+    def iter_books(self):
+        for row in self.connection.execute(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY rowid"):
+            yield book_from_row(row)
+
+    # Method that yields the members in the order they were added, without loading them all at once.
+    def iter_members(self):
+        for member_id, name in self.connection.execute("SELECT member_id, name FROM members ORDER BY rowid"):
+            yield self.load_member(member_id, name)
+
+    # Property that lists the books in the order they were added.
+    @property
+    def books(self):
+        return list(self.iter_books())
+
+    # Property that lists the members in the order they were added.
+    @property
+    def members(self):
+        return list(self.iter_members())
+
+    # Method that finds a book by its ID, or returns None.
+    def get_book(self, book_id):
+        row = self.connection.execute(f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = ?", (book_id,)).fetchone()
+        return book_from_row(row) if row else None
+
+    # Method that finds a member by its ID, or returns None.
+    def get_member(self, member_id):
+        row = self.connection.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+        return self.load_member(member_id, row[0]) if row else None
+
+    # Method that builds a Member with its loans and transaction history.
+    def load_member(self, member_id, name):
+        member = Member(member_id, name)
+        for borrowed_at, *row in self.connection.execute(
+                f"""SELECT loans.borrowed_at, {JOINED_BOOK_COLUMNS} FROM loans JOIN books ON books.book_id = loans.book_id
+                    WHERE loans.member_id = ? ORDER BY loans.id""", (member_id,)):
+            member.loan_table.add(Loan(member_id, book_from_row(row), borrowed_at))
+        member.log = TransactionLog()                                        # Holds a copy of the member's transactions.
+        for record in self.connection.execute(
+                "SELECT operation, member_id, book_id, timestamp, title FROM transactions WHERE member_id = ? ORDER BY id", (member_id,)):
+            member.log.append(*record)
+        return member
+
+    # Method that yields every transaction as an (operation, member_id, book_id, timestamp, title) record, oldest first.
+    def iter_transaction_records(self):
+        return self.connection.execute("SELECT operation, member_id, book_id, timestamp, title FROM transactions ORDER BY id")
+
+    # Method that appends (operation, member_id, book_id, timestamp, title) records to the transaction log. Returns the number of records added.
+    def add_transactions(self, records):
+        with self.connection:
+            return self.connection.executemany(
+                """INSERT INTO transactions (operation, member_id, book_id, timestamp, title)
+                   SELECT ?1, ?2, ?3, ?4, ?5 WHERE EXISTS (SELECT 1 FROM members WHERE member_id = ?2)""",
+                ((operation, member_id, book_id, int(timestamp), title)
+                 for operation, member_id, book_id, timestamp, title in records)).rowcount
+
+    # Method that returns transactions, optionally only those of a member, of a book and/or between two epoch times, a page at a time.
+    def query_transactions(self, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+        conditions, parameters = [], []
+        for condition, value in (("member_id = ?", member_id), ("book_id = ?", book_id),
+                                 ("timestamp >= ?", start), ("timestamp < ?", end)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT operation, member_id, book_id, timestamp FROM transactions {where} ORDER BY id LIMIT ? OFFSET ?",
+            (*parameters, -1 if limit is None else limit, offset))
+        return [Transaction(*row) for row in rows]
+
+    # Method that adds a book to the library. Returns the book, or raises DuplicateIdError.
+    def add_book(self, book):
+        try:
+            with self.connection:
+                self.connection.execute(f"INSERT INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", book_to_row(book))
+        except sqlite3.IntegrityError:                                       # The unique index on book_id rejects duplicates.
+            raise DuplicateIdError("Book/Ebook", book.book_id) from None
+        self.notify("add_book", book)
+        return book
+
+    # Method that adds many books at once, skipping IDs that already exist. Returns the number of books added.
+    def add_books(self, books):
+        with self.connection:
+            return self.connection.executemany(f"INSERT OR IGNORE INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                                               (book_to_row(book) for book in books)).rowcount
+
+    # Method that removes a book. Returns the removed book, or raises BookNotFoundError or BookOnLoanError.
+    def remove_book(self, book_id):
+        with self.connection:
+            row = self.connection.execute(f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = ?", (book_id,)).fetchone()
+            if row is None:
+                raise BookNotFoundError(book_id)
+            (borrowers,) = self.connection.execute("SELECT COUNT(*) FROM loans WHERE book_id = ?", (book_id,)).fetchone()
+            if borrowers:                                                    # Keeps books that members still have to return.
+                raise BookOnLoanError(book_id, row[2], borrowers)
+            self.connection.execute("DELETE FROM books WHERE book_id = ?", (book_id,))
+        self.notify("remove_book", book_id)
+        return book_from_row(row)
+
+    # Method that removes many books at once, skipping books that are on loan. Returns the number of books removed.
+    def remove_books(self, book_ids):
+        with self.connection:
+            return self.connection.executemany(
+                "DELETE FROM books WHERE book_id = ?1 AND NOT EXISTS (SELECT 1 FROM loans WHERE book_id = ?1)",
+                ((book_id,) for book_id in book_ids)).rowcount
+
+    # Method that updates a books title, author and number of copies or file size. Returns the book, or raises BookNotFoundError.
+    def update_book(self, book_id, title=None, author=None, copies=None, file_size=None):
+        with self.connection:
+            row = self.connection.execute("SELECT kind FROM books WHERE book_id = ?", (book_id,)).fetchone()
+            if row is None:
+                raise BookNotFoundError(book_id)
+            if row[0] == "ebook":                                            # E-books have a file size instead of copies.
+                copies = None
+            else:
+                file_size = None
+            self.connection.execute(
+                """UPDATE books SET title = COALESCE(NULLIF(?, ''), title), author = COALESCE(NULLIF(?, ''), author),
+                   copies = COALESCE(?, copies), file_size = COALESCE(?, file_size) WHERE book_id = ?""",
+                (title, author, copies, file_size, book_id))
+        self.notify("update_book", book_id, title, author, copies, file_size)
+        return self.get_book(book_id)
+
+    # Method that sets the number of copies of many books at once from (book_id, copies) pairs. Returns the number of books updated.
+    def update_copies(self, pairs):
+        with self.connection:
+            return self.connection.executemany("UPDATE books SET copies = ? WHERE book_id = ? AND kind = 'book'",
+                                               ((copies, book_id) for book_id, copies in pairs)).rowcount
+
+    # Method that adds a member to the library. Returns the member, or raises DuplicateIdError.
+    def add_member(self, member):
+        try:
+            with self.connection:
+                self.connection.execute("INSERT INTO members (member_id, name) VALUES (?, ?)", (member.member_id, member.name))
+        except sqlite3.IntegrityError:
+            raise DuplicateIdError("Member", member.member_id) from None
+        self.notify("add_member", member)
+        return member
+
+    # Method that adds many members at once, skipping IDs that already exist. Returns the number of members added.
+    def add_members(self, members):
+        with self.connection:
+            return self.connection.executemany("INSERT OR IGNORE INTO members (member_id, name) VALUES (?, ?)",
+                                               ((member.member_id, member.name) for member in members)).rowcount
+
+    # Method that removees a member from the library. Returns the removed member, or raises MemberNotFoundError or MemberHasLoansError.
+    def remove_member(self, member_id):
+        with self.connection:
+            member = self.get_member(member_id)
+            if member is None:
+                raise MemberNotFoundError(member_id)
+            loans = len(member.borrowed_books)
+            if loans:                                                        # Keeps members who still have books to return, so no copy is lost.
+                raise MemberHasLoansError(member_id, member.name, loans)
+            self.connection.execute("DELETE FROM members WHERE member_id = ?", (member_id,))  # The member's transactions stay in the library-wide log.
+        self.notify("remove_member", member_id)
+        return member
+
+    # Method that removes many members at once, skipping those who have books borrowed. Returns the number of members removed.
+    def remove_members(self, member_ids):
+        with self.connection:
+            return self.connection.executemany(
+                "DELETE FROM members WHERE member_id = ?1 AND NOT EXISTS (SELECT 1 FROM loans WHERE member_id = ?1)",
+                ((member_id,) for member_id in member_ids)).rowcount
+
+    # Method that updates a members name. Returns the member, or raises MemberNotFoundError.
+    def update_member(self, member_id, new_name):
+        with self.connection:
+            renamed = self.connection.execute("UPDATE members SET name = ? WHERE member_id = ?", (new_name, member_id)).rowcount
+        if not renamed:
+            raise MemberNotFoundError(member_id)
+        self.notify("update_member", member_id, new_name)
+        return self.get_member(member_id)
+
+    # Method that finds the name of a member and the kind and title of a book, raising MemberNotFoundError or BookNotFoundError.
+    def member_and_book(self, member_id, book_id):
+        member = self.connection.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+        if member is None:
+            raise MemberNotFoundError(member_id)
+        book = self.connection.execute("SELECT kind, title FROM books WHERE book_id = ?", (book_id,)).fetchone()
+        if book is None:
+            raise BookNotFoundError(book_id)
+        return member[0], book[0], book[1]
+
+    # Method that allows a member to borrow a book. Returns the Transaction, or raises a LibraryError.
+    def issue_book(self, member_id, book_id, when=None):
+        when = when or datetime.now()
+        with self.connection:                                                # Checks and changes everything in one transaction.
+            name, kind, title = self.member_and_book(member_id, book_id)
+            if self.connection.execute("SELECT 1 FROM loans WHERE member_id = ? AND book_id = ?", (member_id, book_id)).fetchone():
+                raise AlreadyBorrowedError(member_id, name, book_id, title)
+            if kind == "ebook":
+                operation = BORROW_EBOOK
+            elif self.connection.execute("UPDATE books SET copies = copies - 1 WHERE book_id = ? AND copies > 0",
+                                         (book_id,)).rowcount:               # Takes a copy only if one is left.
+                operation = BORROW
+            else:
+                raise NotAvailableError(book_id, title)
+            transaction = Transaction(operation, member_id, book_id, int(when.timestamp()))
+            self.connection.execute("INSERT INTO loans (member_id, book_id, borrowed_at) VALUES (?, ?, ?)",
+                                    (member_id, book_id, transaction.timestamp))
+            self.connection.execute(INSERT_TRANSACTION, (*transaction, title))
+        self.notify("issue_book", member_id, book_id, when)
+        return transaction
+
+    # Method that allows a member to return a book. Returns the Transaction, or raises a LibraryError.
+    def return_book(self, member_id, book_id, when=None):
+        when = when or datetime.now()
+        with self.connection:
+            name, kind, title = self.member_and_book(member_id, book_id)
+            if not self.connection.execute("DELETE FROM loans WHERE member_id = ? AND book_id = ?", (member_id, book_id)).rowcount:
+                raise NotBorrowedError(member_id, name, book_id, title)
+            if kind != "ebook":
+                self.connection.execute("UPDATE books SET copies = copies + 1 WHERE book_id = ?", (book_id,))
+            transaction = Transaction(RETURN, member_id, book_id, int(when.timestamp()))
+            self.connection.execute(INSERT_TRANSACTION, (*transaction, title))
+        self.notify("return_book", member_id, book_id, when)
+        return transaction
+
+    # Method that returns the members who have a book borrowed, in the order they borrowed it.
+    def borrowers_of(self, book_id):
+        rows = self.connection.execute(
+            "SELECT members.member_id, members.name FROM loans JOIN members ON members.member_id = loans.member_id WHERE loans.book_id = ? ORDER BY loans.id",
+            (book_id,)).fetchall()
+        return [self.load_member(member_id, name) for member_id, name in rows]
+
+    # Method that returns the rows (rowid first, then the book columns) of the books whose title or author contains the search term.
+    def matching_rows(self, search_term):
+        if self.full_text_search and len(search_term) >= 3:                  # The trigram index only handles terms of three or more characters.
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            return self.connection.execute(
+                f"""SELECT rowid, {BOOK_COLUMNS} FROM books WHERE rowid IN
+                    (SELECT rowid FROM books_search WHERE books_search MATCH ?) ORDER BY rowid""", (phrase,))
+        pattern = like_pattern(search_term)
+        return self.connection.execute(
+            f"SELECT rowid, {BOOK_COLUMNS} FROM books WHERE title LIKE ? ESCAPE '\\' OR author LIKE ? ESCAPE '\\' ORDER BY rowid",
+            (pattern, pattern))
+
+    # Method that returns the books whose title or author contains the search term.
+    def search_books(self, search_term):
+        return [book_from_row(row[1:]) for row in self.matching_rows(search_term)]
+
+    # Method that returns the books matching any word of a query, best matches first (scored as Library.search_books_ranked scores them).
+    def search_books_ranked(self, query, limit=10):
+        scores, books = {}, {}
+        for term in set(WORD_PATTERN.findall(query.lower())):                # Scores each word of the query separately.
+            for rowid, *row in self.matching_rows(term):
+                book = books[rowid] = book_from_row(row)
+                title, author = book.title.lower(), book.author.lower()
+                score = 2 if term in title else 1                            # Title matches count more than author matches.
+                if term in WORD_PATTERN.findall(title + " " + author):
+                    score += 1                                               # Whole-word matches count more than partial matches.
+                scores[rowid] = scores.get(rowid, 0) + score
+        ranking = sorted(scores, key=lambda rowid: (-scores[rowid], rowid))
+        return [books[rowid] for rowid in ranking[:limit]]
+
+    # Method that returns the books with a word in the title or author starting with a prefix (autocomplete).
+    def search_books_prefix(self, prefix, limit=10):
+        if self.full_text_search and prefix.isalnum():                       # A prefix query of the word index, when the prefix is a single word.
+            rows = self.connection.execute(
+                f"""SELECT {BOOK_COLUMNS} FROM books WHERE rowid IN
+                    (SELECT rowid FROM books_words WHERE books_words MATCH ?) ORDER BY rowid LIMIT ?""",
+                ('"' + prefix + '" *', -1 if limit is None else limit))
+            return [book_from_row(row) for row in rows]
+        prefix = prefix.lower()
+        matches = (book for book in self.search_books(prefix)                # Words start with the prefix only where the prefix is found.
+                   if any(word.startswith(prefix) for word in WORD_PATTERN.findall(f"{book.title} {book.author}".lower())))
+        return list(islice(matches, limit))
@@ -0,0 +1,149 @@
+"""
+Transaction Log
+==========================
+An append-only log of the borrow and return transactions of a library.
+
+Each transaction is stored as four typed values (operation code, member ID, book ID and epoch timestamp in
+seconds) in parallel arrays, with per-member and per-book position indexes for fast queries. The title the
+book had at the time is kept as a number pointing into a list of distinct titles, so a renamed book keeps
+its old title in older entries. Text such as "Borrowed 'Title' on 2025-03-25 12:00:00" is only produced when
+a transaction is displayed.
+"""
+
+import threading
+from array import array
+from collections import namedtuple
+from datetime import datetime
+
+BORROW, BORROW_EBOOK, RETURN = 0, 1, 2                                       # Operation codes
+OPERATION_NAMES = {BORROW: "borrow", BORROW_EBOOK: "borrow_ebook", RETURN: "return"}
+OPERATION_CODES = {name: code for code, name in OPERATION_NAMES.items()}
+OPERATION_FORMATS = {                                                        # How each operation is shown in the history
+    BORROW: "Borrowed '{}' on {}",
+    BORROW_EBOOK: "Borrowed Ebook '{}' on {}",
+    RETURN: "Returned '{}' on {}",
+}
+
+Transaction = namedtuple("Transaction", ["operation", "member_id", "book_id", "timestamp"])
+
+
+# Function that turns a transaction into the text shown in the transaction history.
+def format_transaction(transaction, title):
+    when = datetime.fromtimestamp(transaction.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return OPERATION_FORMATS[transaction.operation].format(title, when)
+
+
+# Function that finds the first of a list of positions whose timestamp is at or after a time (positions must be in time order).
+def first_at_or_after(timestamps, positions, timestamp):
+    low, high = 0, len(positions)
+    while low < high:                                                        # Binary search over the positions.
+        middle = (low + high) // 2
+        if timestamps[positions[middle]] < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+# Class that stores transactions in typed arrays.
+class TransactionLog:
+    def __init__(self):
+        self.operations = array("b")                                         # Operation code of each transaction
+        self.member_ids = array("q")                                         # Member ID of each transaction
+        self.book_ids = array("q")                                           # Book ID of each transaction
+        self.timestamps = array("q")                                         # Time of each transaction in seconds since the epoch
+        self.title_ids = array("I")                                          # Number of the book's title at the time of each transaction (into self.titles)
+        self.titles = []                                                     # Distinct titles, each stored once
+        self.title_numbers = {}                                              # Number of each title in self.titles, keyed by title
+        self.by_member = {}                                                  # Positions of each member's transactions keyed by member ID
+        self.by_book = {}                                                    # Positions of each book's transactions keyed by book ID
+        self.in_time_order = True                                            # False once a transaction is appended with an earlier time than the one before
+        self.lock = threading.Lock()                                         # Keeps the arrays in step when several threads append
+
+    def __len__(self):
+        return len(self.operations)
+
+    # Method that appends a transaction to the log.
+    def append(self, operation, member_id, book_id, timestamp, title):
+        timestamp = int(timestamp)
+        with self.lock:
+            position = len(self.operations)
+            if position and timestamp < self.timestamps[-1]:
+                self.in_time_order = False
+            self.operations.append(operation)
+            self.member_ids.append(member_id)
+            self.book_ids.append(book_id)
+            self.timestamps.append(timestamp)
+            title_id = self.title_numbers.get(title)
+            if title_id is None:
+                title_id = self.title_numbers[title] = len(self.titles)
+                self.titles.append(title)
+            self.title_ids.append(title_id)
+            positions = self.by_member.get(member_id)
+            if positions is None:
+                positions = self.by_member[member_id] = array("q")
+            positions.append(position)
+            positions = self.by_book.get(book_id)
+            if positions is None:
+                positions = self.by_book[book_id] = array("q")
+            positions.append(position)
+
+    # Method that returns the transaction at a position.
+    def get(self, position):
+        return Transaction(self.operations[position], self.member_ids[position], self.book_ids[position], self.timestamps[position])
+
+    # Method that returns the positions of the transactions of a member and/or a book.
+    def positions(self, member_id=None, book_id=None):
+        if member_id is None and book_id is None:
+            return range(len(self.operations))
+        if book_id is None:
+            return self.by_member.get(member_id, ())
+        if member_id is None:
+            return self.by_book.get(book_id, ())
+        member_positions = self.by_member.get(member_id, ())
+        book_positions = self.by_book.get(book_id, ())
+        if len(member_positions) <= len(book_positions):                     # Filters the shorter of the two position lists.
+            return [position for position in member_positions if self.book_ids[position] == book_id]
+        return [position for position in book_positions if self.member_ids[position] == member_id]
+
+    # Method that returns the title a book had at the time of the transaction at a position (None if it was not known).
+    def title_at(self, position):
+        return self.titles[self.title_ids[position]]
+
+    # Method that returns the title of a book in its last transaction, or None if it has none.
+    def title_of(self, book_id):
+        positions = self.by_book.get(book_id)
+        return self.title_at(positions[-1]) if positions else None
+
+    # Method that returns transactions, optionally only those of a member, of a book and/or between start (included) and end (excluded).
+    def query(self, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+        return [self.get(position) for position in self.find(member_id, book_id, start, end, offset, limit)]
+
+    # Method that returns the positions of the transactions query() would return.
+    def find(self, member_id=None, book_id=None, start=None, end=None, offset=0, limit=None):
+        positions = self.positions(member_id, book_id)
+        if start is not None or end is not None:
+            if self.in_time_order:                                           # Positions are in time order, so the range can be found by binary search.
+                low = 0 if start is None else first_at_or_after(self.timestamps, positions, start)
+                high = len(positions) if end is None else first_at_or_after(self.timestamps, positions, end)
+                positions = positions[low:high]
+            else:
+                positions = [position for position in positions
+                             if (start is None or self.timestamps[position] >= start)
+                             and (end is None or self.timestamps[position] < end)]
+        stop = None if limit is None else offset + limit
+        return positions[offset:stop]
+
+    # Method that turns the transaction at a position into the text shown in the transaction history.
+    def format(self, position):
+        title = self.title_at(position)
+        return format_transaction(self.get(position), f"#{self.book_ids[position]}" if title is None else title)
+
+    # Method that returns the transaction history of a member as text, oldest first.
+    def history(self, member_id):
+        return [self.format(position) for position in self.by_member.get(member_id, ())]
+
+    # Method that copies the transactions of a member from another log into this one.
+    def copy_member(self, other, member_id):
+        for position in other.find(member_id=member_id):
+            self.append(*other.get(position), other.title_at(position))
@@ -1,6 +1,11 @@
+import contextlib
+import io
+import random
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from Library_cli import Book, Ebook, Member, Library
+from Library_cli import (AlreadyBorrowedError, Book, BookNotFoundError, BookOnLoanError, DuplicateIdError, Ebook, Library,
+                         LibraryError, Member, MemberHasLoansError, MemberNotFoundError, NotAvailableError, NotBorrowedError)
 
 class TestLibraryManagement(unittest.TestCase):
 
@@ -101,5 +106,133 @@ class TestLibraryManagement(unittest.TestCase):
         self.assertTrue(any("Borrowed" in entry for entry in history))
         self.assertTrue(any("Returned" in entry for entry in history))
 
+    def test_library_lookup_by_id(self):
+        self.library.add_book(self.book)
+        self.library.add_member(self.member)
+        self.assertIs(self.library.get_book(1), self.book)
+        self.assertIs(self.library.get_member(1), self.member)
+        self.assertIsNone(self.library.get_book(99))
+
+    def test_library_keeps_insertion_order(self):
+        self.library.add_book(self.ebook)
+        self.library.add_book(self.book)
+        with self.assertRaises(DuplicateIdError):
+            self.library.add_book(Book(2, "Duplicate", "Someone", 1))
+        self.assertEqual(self.library.books, [self.ebook, self.book])
+
+    def test_search_books_after_update(self):
+        self.library.add_book(self.book)
+        self.library.update_book(1, title="Advanced Rust")
+        self.assertEqual(self.library.search_books("Python"), [])
+        self.assertEqual(self.library.search_books("rust"), [self.book])
+
+    def test_search_books_ranked_and_prefix(self):
+        self.library.add_book(self.book)
+        self.library.add_book(self.ebook)
+        self.assertEqual(self.library.search_books_ranked("machine doe"), [self.ebook, self.book])
+        self.assertEqual(self.library.search_books_prefix("prog"), [self.book])
+
+    def test_books_and_members_use_slots(self):
+        for record in (self.book, self.ebook, self.member):
+            self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_library_transaction_log(self):
+        self.library.add_book(self.book)
+        self.library.add_member(self.member)
+        self.library.issue_book(1, 1, when=datetime(2025, 3, 25, 12, 0, 0))
+        self.library.return_book(1, 1, when=datetime(2025, 3, 26, 12, 0, 0))
+        self.assertIs(self.member.log, self.library.transactions)
+        self.assertEqual(self.member.transaction_history, ["Borrowed 'Python Programming' on 2025-03-25 12:00:00",
+                                                           "Returned 'Python Programming' on 2025-03-26 12:00:00"])
+        start = datetime(2025, 3, 26).timestamp()
+        self.assertEqual(len(self.library.query_transactions(book_id=1, start=start)), 1)
+        self.library.update_book(1, title="Advanced Python")                 # Older entries keep the title the book had then.
+        self.library.issue_book(1, 1, when=datetime(2025, 3, 27, 12, 0, 0))
+        self.assertEqual(self.member.transaction_history[1:], ["Returned 'Python Programming' on 2025-03-26 12:00:00",
+                                                               "Borrowed 'Advanced Python' on 2025-03-27 12:00:00"])
+        self.assertEqual([record[-1] for record in self.library.iter_transaction_records()],
+                         ["Python Programming", "Python Programming", "Advanced Python"])
+
+    def test_member_history_moves_into_library_log(self):
+        self.member.borrow_book(self.book)
+        self.library.add_member(self.member)
+        self.assertEqual(len(self.library.transactions), 1)
+        self.assertEqual(len(self.member.transaction_history), 1)
+
+    def test_thread_safe_checkout_keeps_copies_consistent(self):
+        library = Library(thread_safe=True, lock_stripes=8)
+        library.add_books(Book(book_id, f"Title {book_id}", "Author", 2) for book_id in range(5))
+        library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(20))
+
+        def work(seed):
+            generator = random.Random(seed)
+            for _ in range(300):
+                member_id, book_id = generator.randrange(20), generator.randrange(5)
+                try:
+                    library.issue_book(member_id, book_id)
+                except LibraryError:                                         # Not available, or already borrowed by this member
+                    continue
+                if generator.random() < 0.5:
+                    library.return_book(member_id, book_id)
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(work, range(8)))
+        for book in library.books:
+            on_loan = sum(member.borrowed_books.count(book.title) for member in library.members)
+            self.assertGreaterEqual(book.copies, 0)
+            self.assertEqual(book.copies + on_loan, 2)
+
+    def test_methods_return_results_without_printing(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertIs(self.library.add_book(self.book), self.book)
+            self.assertIs(self.library.add_member(self.member), self.member)
+            transaction = self.library.issue_book(1, 1, when=datetime(2025, 3, 25, 12, 0, 0))
+            self.assertEqual((transaction.member_id, transaction.book_id), (1, 1))
+            self.assertEqual(self.library.update_member(1, "Bob").name, "Bob")
+            self.library.return_book(1, 1)
+            self.assertIs(self.library.remove_book(1), self.book)
+        self.assertEqual(output.getvalue(), "")
+
+    def test_failures_raise_typed_errors(self):
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        self.library.add_member(self.member)
+        with self.assertRaises(DuplicateIdError):
+            self.library.add_book(Book(1, "Duplicate", "Someone", 1))
+        with self.assertRaises(BookNotFoundError):
+            self.library.remove_book(99)
+        with self.assertRaises(MemberNotFoundError):
+            self.library.issue_book(99, 1)
+        with self.assertRaises(NotBorrowedError):
+            self.library.return_book(1, 1)
+        self.library.issue_book(1, 1)
+        with self.assertRaises(AlreadyBorrowedError):
+            self.library.issue_book(1, 1)
+        self.library.add_member(Member(2, "Bob"))
+        with self.assertRaises(NotAvailableError) as caught:
+            self.library.issue_book(2, 1)
+        self.assertEqual(str(caught.exception), "Sorry, 'Python Programming' is not available.")
+        with self.assertRaises(BookOnLoanError):
+            self.library.remove_book(1)
+
+    def test_loans_are_indexed_by_book(self):
+        self.library.add_book(self.book)
+        self.library.add_member(self.member)
+        self.library.add_member(Member(2, "Bob"))
+        self.library.issue_book(1, 1)
+        self.library.issue_book(2, 1)
+        self.assertEqual([member.name for member in self.library.borrowers_of(1)], ["Alice", "Bob"])
+        self.library.update_book(1, title="Advanced Python")
+        self.assertEqual(self.member.borrowed_books, ["Advanced Python"])      # The loan follows the renamed book.
+        self.library.return_book(1, 1)
+        self.assertEqual([member.name for member in self.library.borrowers_of(1)], ["Bob"])
+        with self.assertRaises(MemberHasLoansError):                         # Bob must return the book first, so the copy is not lost.
+            self.library.remove_member(2)
+        self.library.return_book(2, 1)
+        self.assertEqual(self.library.get_book(1).copies, 3)
+        self.library.remove_member(2)
+        self.assertEqual(self.library.borrowers_of(1), [])
+        self.assertEqual(len(self.library.loans), 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from bench_library import find_regressions, find_superlinear
+
+BASELINE = {
+    "memory": {"1000": 1000000},
+    "results": [{"size": 1000, "operation": "get_book", "p50_us": 10.0, "ops_per_sec": 1000.0},
+                {"size": 1000, "operation": "search_books", "p50_us": 100.0, "ops_per_sec": 100.0}],
+}
+
+class TestFindRegressions(unittest.TestCase):
+
+    def results(self, p50_us, ops_per_sec, peak):
+        return {"memory": {"1000": peak},
+                "results": [{"size": 1000, "operation": "get_book", "p50_us": p50_us, "ops_per_sec": ops_per_sec},
+                            {"size": 1000, "operation": "add_book", "p50_us": 99.0, "ops_per_sec": 1.0}]}  # Not in the baseline
+
+    def test_changes_within_the_threshold(self):
+        self.assertEqual(find_regressions(self.results(12.5, 800.0, 1250000), BASELINE, 0.25), [])
+
+    def test_changes_beyond_the_threshold(self):
+        regressions = find_regressions(self.results(13.0, 500.0, 1500000), BASELINE, 0.25)
+        self.assertEqual([(size, what) for size, what, old, new, change in regressions],
+                         [(1000, "get_book p50_us"), (1000, "get_book ops_per_sec"), (1000, "peak memory")])
+        self.assertAlmostEqual(regressions[0][4], 0.3)
+        self.assertEqual(regressions[1][2:4], (1000.0, 500.0))
+        self.assertAlmostEqual(regressions[2][4], 0.5)
+
+    def test_threshold_is_applied(self):
+        regressions = find_regressions(self.results(13.0, 500.0, 1500000), BASELINE, 0.4)  # The 30% slower p50 is now within the threshold.
+        self.assertEqual([what for size, what, old, new, change in regressions], ["get_book ops_per_sec", "peak memory"])
+
+class TestFindSuperlinear(unittest.TestCase):
+
+    def test_build_time_per_book(self):
+        results = {"build": {"1000": 10.0, "100000": 15.0, "10000": 12.0}}
+        self.assertEqual(find_superlinear(results, 2.0), [])
+        results["build"]["400000"] = 45.0                                    # 4.5 times the time per book of the smallest size
+        self.assertEqual(find_superlinear(results, 2.0), [(400000, 1000, 3.5)])
+        self.assertEqual(find_superlinear({"build": {"1000": 10.0}}), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import unittest
+from datetime import datetime
+from Library_cli import Book, Ebook, Library, LibraryError, Member, MemberHasLoansError
+from library_analytics import CirculationAnalytics, bump, count_history, numpy
+from library_transactions import BORROW, RETURN
+
+DAY = 86400
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library()
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 2))
+        self.library.add_book(Book(2, "Data Science", "John Doe", 1))
+        self.library.add_book(Ebook(3, "Machine Book", "Jane Doe", 5))
+        self.library.add_members([Member(1, "Alice"), Member(2, "Bob")])
+        self.analytics = CirculationAnalytics(self.library)
+
+    def issue(self, member_id, book_id, day):
+        self.library.issue_book(member_id, book_id, when=datetime.fromtimestamp(day * DAY + 3600))
+
+    def test_incremental_reports(self):
+        self.issue(1, 1, 0)
+        self.issue(2, 1, 0)
+        self.issue(1, 3, 1)
+        self.library.return_book(2, 1, when=datetime.fromtimestamp(DAY + 7200))
+        self.assertEqual(self.analytics.most_borrowed(2), [(1, "Python Programming", 2), (3, "Machine Book", 1)])
+        self.assertEqual(self.analytics.top_authors(), [("John Doe", 2), ("Jane Doe", 1)])
+        self.assertEqual(self.analytics.author_demand("Jane Doe"), 1)
+        self.assertEqual(self.analytics.active_borrowers(), 1)
+        self.assertEqual(self.analytics.utilization(1), 0.5)
+        self.assertEqual(self.analytics.utilization(), 1 / 3)                # One of the three physical copies is out.
+        self.assertEqual([borrows for _, borrows, _ in self.analytics.rates_between()], [2, 1])
+        self.assertEqual(self.analytics.summary()["returns"], 1)
+
+    def test_imported_history_leaves_copies_out_alone(self):
+        self.library.add_transactions([(RETURN, 1, 2, 0, "Data Science")] + [(BORROW, 2, 1, DAY * day, "Python Programming") for day in range(3)])
+        for analytics in (self.analytics, CirculationAnalytics(self.library)):
+            self.assertEqual(analytics.copies_out, 0)
+            self.assertEqual(analytics.utilization(), 0.0)
+            self.assertEqual(analytics.utilization(1), 0.0)                  # Both copies are still on the shelf.
+            self.assertEqual(analytics.most_borrowed(1), [(1, "Python Programming", 3)])
+            self.assertEqual(analytics.summary()["returns"], 1)
+
+    def test_member_with_loans_is_kept(self):
+        self.issue(1, 2, 0)
+        with self.assertRaises(MemberHasLoansError):
+            self.library.remove_member(1)
+        self.assertEqual(self.analytics.active_borrowers(), 1)
+        self.library.return_book(1, 2, when=datetime.fromtimestamp(DAY))
+        self.library.remove_member(1)
+        self.assertEqual(self.analytics.active_borrowers(), 0)
+        self.assertEqual(self.analytics.utilization(2), 0.0)
+
+    def test_recompute_matches_incremental(self):
+        self.library.add_books(Book(book_id, f"Title {book_id}", f"Author {book_id % 3}", 2) for book_id in range(10, 40))
+        self.library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(10, 30))
+        generator = random.Random(7)
+        for step in range(2000):
+            member_id, book_id = generator.randrange(10, 30), generator.randrange(10, 40)
+            when = datetime.fromtimestamp(step * 600)
+            try:
+                if generator.random() < 0.6:
+                    self.library.issue_book(member_id, book_id, when)
+                else:
+                    self.library.return_book(member_id, book_id, when)
+            except LibraryError:
+                pass
+        self.library.update_book(10, copies=7)
+        self.library.update_book(14, author="Author 1")                      # Moves the borrows of book 14 from Author 2.
+        self.library.update_book(15, author="New Author")
+        for member in self.library.borrowers_of(16):
+            self.library.return_book(member.member_id, 16, datetime.fromtimestamp(2000 * 600))
+        self.library.remove_book(16)
+        for book_id in list(self.library.get_member(11).loans):
+            self.library.return_book(11, book_id, datetime.fromtimestamp(2000 * 600))
+        self.library.remove_member(11)
+        self.library.add_transactions([(BORROW, 12, 13, 0, "Title 13"), (RETURN, 12, 13, 60, "Title 13")])
+        fresh = CirculationAnalytics(self.library)
+        for name in ("borrows", "author_borrows", "rates", "total_borrows", "total_returns", "member_out",
+                     "book_out", "copies_out", "shelf", "shelf_total"):
+            self.assertEqual(getattr(self.analytics, name), getattr(fresh, name), name)
+        self.assertEqual([borrows for _, _, borrows in self.analytics.most_borrowed()],
+                         [borrows for _, _, borrows in fresh.most_borrowed()])
+        self.assertEqual(self.analytics.top_authors(), fresh.top_authors())
+        self.assertGreater(self.analytics.author_demand("New Author"), 0)
+
+    def test_bump_keeps_top_in_order(self):
+        counts, top = {}, []
+        for key in "abcabcaadeeeee":
+            bump(counts, top, key, 2)
+        self.assertEqual(top, ["e", "a"])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_and_python_counts_agree(self):
+        self.issue(1, 1, 0)
+        self.issue(1, 3, 2)
+        self.library.return_book(1, 1, when=datetime.fromtimestamp(3 * DAY))
+        log = self.library.transactions
+        self.assertEqual(count_history(log, use_numpy=True), count_history(log, use_numpy=False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+from Library_cli import Ebook, Library
+from library_batch import parse_command, run_batch
+from library_sqlite import SQLiteLibrary
+
+SCRIPT = """# A small script
+add_book 1 "Python Programming" "John Doe" 1
+0 2 "C# Basics" Jane 5
+add_member 1 Alice
+
+5 1 1
+issue_book 1 1
+fly away
+add_member two Bob
+display_books
+display_history
+"""
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library()
+
+    def test_parse_command(self):
+        self.assertEqual(parse_command('add_book 1 "Data Science" Jo 2'), ("add_book", [1, "Data Science", "Jo", 2]))
+        self.assertEqual(parse_command("6 1 2"), ("return_book", [1, 2]))
+        self.assertIsNone(parse_command("   # don't run this"))
+        self.assertIsNone(parse_command("\n"))
+        with self.assertRaises(ValueError):
+            parse_command("issue_book 1")
+
+    def test_run_batch(self):
+        output = io.StringIO()
+        report = run_batch(self.library, io.StringIO(SCRIPT), output)
+        self.assertEqual(report.commands, 9)
+        self.assertEqual(report.succeeded, 6)
+        self.assertEqual(report.failures[0], (7, "Alice already has 'Python Programming' borrowed."))
+        self.assertEqual([line for line, message in report.failures], [7, 8, 9])
+        self.assertIsInstance(self.library.get_book(2), Ebook)
+        self.assertEqual(self.library.get_member(1).borrowed_books, ["Python Programming"])
+        self.assertIn("Library Books:", output.getvalue())
+        self.assertIn("Transaction History for Alice:", output.getvalue())
+        self.assertIn("9 commands", report.summary())
+
+    def test_unexpected_error_is_a_failure(self):
+        def broken(member):
+            raise RuntimeError("disk full")
+        self.library.add_member = broken
+        output = io.StringIO()
+        report = run_batch(self.library, io.StringIO(SCRIPT), output)
+        self.assertEqual(report.commands, 9)
+        self.assertEqual(report.failures[0], (4, "RuntimeError: disk full"))
+        self.assertIn("Library Books:", output.getvalue())
+
+    def test_stop_on_error(self):
+        report = run_batch(self.library, io.StringIO(SCRIPT), stop_on_error=True)
+        self.assertEqual(report.commands, 5)
+        self.assertEqual(report.failure_count, 1)
+
+    def test_holds_are_refused_without_support(self):
+        library = SQLiteLibrary()
+        report = run_batch(library, io.StringIO('add_book 1 Dune Frank 0\nadd_member 1 Alice\nplace_hold 1 1\ndisplay_overdue\n'))
+        self.assertEqual(report.failures, [(3, "place_hold is not supported by SQLiteLibrary."),
+                                           (4, "overdue_loans is not supported by SQLiteLibrary.")])
+        library.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from datetime import datetime
+from Library_cli import (Book, BookNotFoundError, DAY, DuplicateIdError, Ebook, Library, Member, MemberHasLoansError,
+                         MemberNotFoundError, NotAvailableError)
+from library_federation import Federation
+
+class TestFederation(unittest.TestCase):
+
+    def setUp(self):
+        self.federation = Federation(shards=3, processes=False)
+        self.fill(self.federation)
+
+    def tearDown(self):
+        self.federation.close()
+
+    def fill(self, library):
+        library.add_books(Book(book_id, f"Python {book_id}", f"Author {book_id % 4}", 1) for book_id in range(1, 10))
+        library.add_book(Ebook(10, "Python Machine Book", "Jane Doe", 5))
+        library.add_members([Member(1, "Alice"), Member(2, "Bob")])
+
+    def test_books_are_split_and_members_copied(self):
+        sizes = [len(shard.library.book_index) for shard in self.federation.shards]
+        self.assertEqual(sum(sizes), 10)
+        self.assertTrue(all(sizes))
+        self.assertTrue(all(len(shard.library.member_index) == 2 for shard in self.federation.shards))
+        self.assertEqual(self.federation.get_book(5).title, "Python 5")
+        self.assertEqual(self.federation.get_book(5), self.federation.shard_of(5).library.get_book(5))
+        with self.assertRaises(DuplicateIdError):
+            self.federation.add_member(Member(1, "Alice"))
+
+    def test_loans_go_to_the_owning_shard(self):
+        library = Library()
+        self.fill(library)
+        for step, book_id in enumerate([4, 8, 6]):
+            for target in (library, self.federation):
+                target.issue_book(1, book_id, datetime.fromtimestamp(1_700_000_000 + step * 3600))
+        with self.assertRaises(NotAvailableError):
+            self.federation.issue_book(2, 4)
+        self.assertEqual(self.federation.borrowed_books(1), ["Python 4", "Python 8", "Python 6"])
+        self.assertEqual(self.federation.member_history(1), library.get_member(1).transaction_history)
+        self.assertEqual([transaction.book_id for transaction in self.federation.query_transactions(member_id=1, limit=1)], [4])
+        self.federation.return_book(1, 4)
+        self.assertEqual(self.federation.get_book(4).copies, 1)
+        with self.assertRaises(MemberNotFoundError):
+            self.federation.member_history(3)
+
+    def test_searches_merge_like_one_library(self):
+        library = Library()
+        self.fill(library)
+        self.assertEqual([book.book_id for book in self.federation.search_books("python")],
+                         [book.book_id for book in library.search_books("python")])
+        self.assertEqual([book.book_id for book in self.federation.search_books_ranked("machine jane", 3)],
+                         [book.book_id for book in library.search_books_ranked("machine jane", 3)])
+        self.assertEqual([book.book_id for book in self.federation.search_books_prefix("auth", 4)], [1, 2, 3, 4])
+
+    def test_holds_and_due_dates_per_shard(self):
+        self.federation.issue_book(1, 3)
+        self.federation.place_hold(2, 3)
+        self.assertEqual([hold.member_id for hold in self.federation.waiting_for(3)], [2])
+        later = datetime.fromtimestamp(datetime.now().timestamp() + 15 * DAY)
+        self.assertEqual([(loan.member_id, loan.book_id) for loan in self.federation.overdue_loans(later)], [(1, 3)])
+        self.assertEqual([notice.kind for notice in self.federation.process_due(later)], ["overdue"])
+
+    def test_removals(self):
+        self.federation.issue_book(2, 5)
+        with self.assertRaises(MemberHasLoansError):
+            self.federation.remove_member(2)
+        self.assertTrue(all(2 in shard.library.member_index for shard in self.federation.shards))
+        self.federation.return_book(2, 5)
+        self.assertEqual(self.federation.remove_member(2).name, "Bob")
+        self.assertTrue(all(2 not in shard.library.member_index for shard in self.federation.shards))
+        self.federation.remove_book(7)
+        with self.assertRaises(BookNotFoundError):
+            self.federation.remove_book(7)
+
+    def test_branches(self):
+        federation = Federation(branches=["North", "South"], processes=False)
+        federation.add_book(Book(1, "Dune", "Frank Herbert", 1), branch="South")
+        self.assertEqual(federation.add_books([Book(1, "Dune", "Frank Herbert", 1), Book(2, "Emma", "Jane Austen", 1)], branch="North"), 1)
+        self.assertIn(1, federation.shards[1].library.book_index)
+        self.assertIn(2, federation.shards[0].library.book_index)
+        with self.assertRaises(DuplicateIdError):
+            federation.add_book(Book(1, "Dune", "Frank Herbert", 1), branch="North")
+        with self.assertRaises(ValueError):
+            federation.add_book(Book(3, "Ulysses", "James Joyce", 1), branch="East")
+        self.assertEqual(len(list(federation.iter_books())), 2)
+
+    def test_worker_processes(self):
+        federation = Federation(shards=2)
+        try:
+            self.fill(federation)
+            federation.issue_book(1, 2)
+            with self.assertRaises(NotAvailableError) as caught:             # Errors come back from the worker with their details.
+                federation.issue_book(2, 2)
+            self.assertEqual(caught.exception.title, "Python 2")
+            self.assertEqual(len(federation.search_books("python")), 10)
+            self.assertEqual(federation.borrowed_books(1), ["Python 2"])
+        finally:
+            federation.close()
+        self.assertFalse(any(shard.process.is_alive() for shard in federation.shards))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import tempfile
+import unittest
+from datetime import datetime
+from Library_cli import (AlreadyOnHoldError, Book, DAY, Ebook, HoldNotNeededError, Library, Member, NotAvailableError,
+                         NotOnHoldError)
+from library_holds import Notice, Scheduler
+from library_journal import open_library
+
+START = 1_700_000_000                                                       # Epoch time the fake clock starts at
+
+class FakeClock:
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return datetime.fromtimestamp(self.now)
+
+class TestHolds(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.library = Library(clock=self.clock)
+        self.fill(self.library)
+
+    def fill(self, library):
+        library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        library.add_members([Member(1, "Alice"), Member(2, "Bob"), Member(3, "Carol"), Member(4, "Dave")])
+
+    def test_holds_are_served_by_priority_then_order(self):
+        self.library.issue_book(1, 1)
+        self.library.place_hold(2, 1)
+        self.library.place_hold(3, 1)
+        self.library.place_hold(4, 1, priority=-1)
+        self.assertEqual([hold.member_id for hold in self.library.waiting_for(1)], [4, 2, 3])
+        self.library.return_book(1, 1)
+        self.assertEqual(self.library.get_book(1).copies, 0)                # The copy is set aside for Dave.
+        with self.assertRaises(NotAvailableError):
+            self.library.issue_book(2, 1)
+        self.library.issue_book(4, 1)
+        self.assertEqual(self.library.borrowers_of(1)[0].member_id, 4)
+        self.assertEqual(self.library.process_due(), [Notice("hold_ready", 4, 1, START)])
+
+    def test_holds_are_refused_when_not_needed(self):
+        with self.assertRaises(HoldNotNeededError):
+            self.library.place_hold(1, 1)
+        with self.assertRaises(HoldNotNeededError):
+            self.library.place_hold(1, 2)
+        self.library.issue_book(1, 1)
+        self.library.place_hold(2, 1)
+        with self.assertRaises(AlreadyOnHoldError):
+            self.library.place_hold(2, 1)
+        with self.assertRaises(NotOnHoldError):
+            self.library.cancel_hold(3, 1)
+
+    def test_uncollected_hold_expires_to_next_member(self):
+        self.library.issue_book(1, 1)
+        self.library.place_hold(2, 1)
+        self.library.place_hold(3, 1)
+        self.library.return_book(1, 1)
+        self.clock.now += 3 * DAY
+        notices = self.library.process_due()
+        self.assertEqual([notice.kind for notice in notices], ["hold_ready", "hold_expired", "hold_ready"])
+        self.assertIsNone(self.library.holds.get(2, 1))
+        self.assertTrue(self.library.holds.get(3, 1).ready)
+        self.library.cancel_hold(3, 1)
+        self.assertEqual(self.library.get_book(1).copies, 1)                 # Nobody else is waiting, so the copy goes back on the shelf.
+
+    def test_overdue_loans(self):
+        self.library.issue_book(1, 1)
+        self.library.issue_book(2, 2)
+        self.clock.now += DAY
+        self.library.issue_book(3, 2)
+        self.library.return_book(2, 2)
+        self.clock.now += 14 * DAY
+        self.assertEqual([(loan.member_id, loan.book_id) for loan in self.library.overdue_loans()], [(1, 1), (3, 2)])
+        self.assertEqual([notice.kind for notice in self.library.process_due()], ["overdue", "overdue"])
+        self.library.return_book(1, 1)
+        self.assertEqual(len(self.library.overdue_loans()), 1)
+
+    def test_remove_member_passes_their_copy_on(self):
+        self.library.issue_book(1, 1)
+        self.library.place_hold(2, 1)
+        self.library.place_hold(3, 1)
+        self.library.return_book(1, 1)
+        self.library.remove_member(2)
+        self.assertTrue(self.library.holds.get(3, 1).ready)
+        self.library.remove_book(1)
+        self.assertEqual(len(self.library.holds), 0)
+
+    def test_journal_keeps_holds_and_due_dates(self):
+        for snapshot in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                library, journal = open_library(directory, library_options={"clock": self.clock})
+                self.fill(library)
+                library.issue_book(1, 1)
+                library.place_hold(2, 1)
+                library.place_hold(3, 1)
+                library.place_hold(4, 1)
+                library.return_book(1, 1)
+                self.clock.now += 3 * DAY
+                library.process_due()
+                journal.close(snapshot=snapshot)
+
+                library, journal = open_library(directory, library_options={"clock": self.clock})
+                self.assertTrue(library.holds.get(3, 1).ready)
+                self.assertIsNone(library.holds.get(2, 1))
+                self.assertEqual([hold.member_id for hold in library.waiting_for(1)], [4])
+                self.assertEqual(library.holds.get(3, 1).expires_at, START + 6 * DAY)
+                self.clock.now += 3 * DAY
+                self.assertEqual([notice.kind for notice in library.process_due()], ["hold_expired", "hold_ready"])
+                journal.close()
+                self.clock.now = START
+
+    def test_restart_keeps_expiry_times_and_overdue_loans(self):
+        for snapshot in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                library, journal = open_library(directory, library_options={"clock": self.clock})
+                self.fill(library)
+                library.issue_book(1, 1)
+                library.place_hold(2, 1)
+                self.clock.now += 15 * DAY
+                self.assertEqual([notice.kind for notice in library.process_due()], ["overdue"])
+                library.update_book(1, copies=1)                             # The new copy is set aside for Bob.
+                journal.close(snapshot=snapshot)
+
+                self.clock.now += DAY
+                library, journal = open_library(directory, library_options={"clock": self.clock})
+                self.assertEqual(library.holds.get(2, 1).expires_at, START + 18 * DAY)  # The time of the update, not of the replay
+                self.assertEqual(library.process_due(), [])                  # Alice's loan was reported overdue before the restart.
+                self.assertEqual(len(library.overdue_loans()), 1)
+                journal.close()
+                self.clock.now = START
+
+    def test_scheduler_returns_events_in_time_order(self):
+        scheduler = Scheduler()
+        scheduler.schedule(30, "due", 1)
+        scheduler.schedule(10, "due", 2)
+        scheduler.schedule(20, "due", 3)
+        self.assertEqual(scheduler.pop_due(20), [(10, "due", 2), (20, "due", 3)])
+        self.assertEqual(scheduler.next_time(), 30)
+
+if __name__ == '__main__':
+    unittest.main()
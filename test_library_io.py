@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from Library_cli import Book, Ebook, Library, Member
+from library_io import export_records, import_records, parse_int
+
+class TestImportExport(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.library = Library()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def test_import_books_csv(self):
+        path = self.write("books.csv", "kind,book_id,title,author,copies,file_size\n"
+                                       "book,1,Python Programming,John Doe,3,\n"
+                                       ",2,Machine Book,Jane Doe,,5\n"
+                                       "book,1,Duplicate,Someone,1,\n"
+                                       "book,x,Bad Id,Someone,1,\n"
+                                       "book,3,,Someone,1,\n"
+                                       "ebook,4,Negative Book,Someone,,-5\n")
+        report = import_records(self.library, "books", path, chunk_size=2)
+        self.assertEqual((report.rows, report.imported, report.duplicates, report.error_count), (6, 2, 1, 3))
+        self.assertEqual([line for line, _ in report.errors], [5, 6, 7])
+        self.assertEqual(report.errors[2][1], "file_size cannot be negative")
+        self.assertIsNone(self.library.get_book(4))
+        self.assertIsInstance(self.library.get_book(2), Ebook)
+        self.assertEqual(self.library.search_books("machine"), [self.library.get_book(2)])
+
+    def test_import_members_jsonl(self):
+        self.library.add_member(Member(1, "Alice"))
+        path = self.write("members.jsonl", '{"member_id": 1, "name": "Again"}\n'
+                                           '{"member_id": 2, "name": "Bob"}\n'
+                                           'not json\n'
+                                           '\n'
+                                           '[1, 2]\n')
+        report = import_records(self.library, "members", path)
+        self.assertEqual((report.rows, report.imported, report.duplicates, report.error_count), (4, 1, 1, 2))
+        self.assertEqual(self.library.get_member(2).name, "Bob")
+
+    def test_parse_int_takes_only_whole_numbers(self):
+        self.assertEqual([parse_int({"copies": value}, "copies") for value in (3, "3", " 12 ", "-1")], [3, 3, 12, -1])
+        self.assertIsNone(parse_int({}, "copies", required=False))
+        for value in (2.7, 3.0, True, "2.7", "1e3", "1_000", "x", [1]):
+            with self.assertRaises(ValueError, msg=repr(value)):
+                parse_int({"copies": value}, "copies")
+
+    def test_round_trip(self):
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 3))
+        self.library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        self.library.add_member(Member(1, "Alice"))
+        self.library.issue_book(1, 1)
+        copy = Library()
+        for kind, extension in (("books", "csv"), ("members", "jsonl"), ("history", "csv")):
+            path = os.path.join(self.temp_dir.name, f"{kind}.{extension}")
+            export_records(self.library, kind, path)
+            report = import_records(copy, kind, path)
+            self.assertEqual(report.error_count, 0)
+        self.assertEqual([(book.book_id, book.title, book.copies) for book in copy.books],
+                         [(book.book_id, book.title, book.copies) for book in self.library.books])
+        self.assertIsInstance(copy.get_book(2), Ebook)
+        self.assertEqual(copy.get_member(1).transaction_history, self.library.get_member(1).transaction_history)
+
+    def test_export_jsonl(self):
+        self.library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        path = os.path.join(self.temp_dir.name, "books.jsonl")
+        self.assertEqual(export_records(self.library, "books", path), 1)
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(json.loads(file.readline())["file_size"], 5)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            import_records(self.library, "books", "books.txt")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from Library_cli import Book, Ebook, LibraryError, Member
+from library_journal import Journal, open_library
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fill(self, library):
+        library.add_book(Book(1, "Python Programming", "John Doe", 3))
+        library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        library.add_member(Member(1, "Alice"))
+        library.issue_book(1, 1)
+        library.issue_book(1, 2)
+        library.return_book(1, 2)
+        library.update_book(1, title="Advanced Python")
+
+    def assert_filled(self, library):
+        self.assertEqual([book.book_id for book in library.books], [1, 2])
+        self.assertEqual(library.get_book(1).title, "Advanced Python")
+        self.assertEqual(library.get_book(1).copies, 2)
+        self.assertIsInstance(library.get_book(2), Ebook)
+        member = library.get_member(1)
+        self.assertEqual(member.borrowed_books, ["Advanced Python"])                   # Loans show the current title of the book.
+        self.assertEqual(len(member.transaction_history), 3)
+        self.assertEqual(library.search_books("advanced"), [library.get_book(1)])
+
+    def test_replay_without_snapshot(self):
+        library, journal = open_library(self.directory, durability="always")
+        self.fill(library)
+        original_history = library.get_member(1).transaction_history
+        journal.close(snapshot=False)
+
+        library, journal = open_library(self.directory)
+        self.assertEqual(journal.replayed, 7)
+        self.assert_filled(library)
+        self.assertEqual(library.get_member(1).transaction_history, original_history)
+        journal.close()
+
+    def test_snapshot_bounds_replay(self):
+        library, journal = open_library(self.directory, snapshot_every=5)
+        self.fill(library)
+        journal.close(snapshot=False)
+
+        library, journal = open_library(self.directory)
+        self.assertEqual(journal.replayed, 2)
+        self.assert_filled(library)
+        journal.close()
+
+        library, journal = open_library(self.directory)
+        self.assertEqual(journal.replayed, 0)
+        self.assert_filled(library)
+        journal.close()
+
+    def test_failed_operations_are_not_recorded(self):
+        library, journal = open_library(self.directory)
+        library.add_book(Book(1, "Python Programming", "John Doe", 0))
+        with self.assertRaises(LibraryError):
+            library.add_book(Book(1, "Duplicate", "John Doe", 1))
+        with self.assertRaises(LibraryError):
+            library.issue_book(1, 1)
+        self.assertEqual(journal.sequence, 1)
+        journal.close()
+
+    def test_torn_tail_is_discarded(self):
+        library, journal = open_library(self.directory)
+        self.fill(library)
+        journal.close(snapshot=False)
+        with open(os.path.join(self.directory, "journal.log"), "ab") as log:
+            log.write(b'[8,"add_member",2,"Bo')
+
+        library, journal = open_library(self.directory)
+        self.assertEqual(journal.replayed, 7)
+        library.add_member(Member(2, "Bob"))
+        journal.close(snapshot=False)
+
+        library, journal = open_library(self.directory)
+        self.assertEqual(library.get_member(2).name, "Bob")
+        journal.close()
+
+    def test_unknown_durability_mode(self):
+        with self.assertRaises(ValueError):
+            Journal(self.directory, durability="sometimes")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from Library_cli import Book
+from library_loans import Loan, LoanTable
+
+class TestLoanTable(unittest.TestCase):
+
+    def setUp(self):
+        self.book = Book(1, "Python Programming", "John Doe", 3)
+        self.other = Book(2, "Machine Book", "Jane Doe", 5)
+        self.loans = LoanTable()
+
+    def test_add_and_find(self):
+        self.assertTrue(self.loans.add(Loan(1, self.book, 100)))
+        self.assertFalse(self.loans.add(Loan(1, self.book, 200)))            # One loan per member and book
+        self.loans.add(Loan(2, self.book, 300))
+        self.loans.add(Loan(1, self.other, 400))
+        self.assertEqual(len(self.loans), 3)
+        self.assertEqual(self.loans.get(1, 1).borrowed_at, 100)
+        self.assertEqual(list(self.loans.of_member(1)), [1, 2])
+        self.assertEqual(list(self.loans.of_book(1)), [1, 2])
+        self.assertIsNone(self.loans.get(3, 1))
+
+    def test_remove(self):
+        self.loans.add(Loan(1, self.book, 100))
+        self.loans.add(Loan(2, self.book, 200))
+        self.loans.add(Loan(1, self.other, 300))
+        self.assertEqual(self.loans.remove(1, 1).member_id, 1)
+        self.assertIsNone(self.loans.remove(1, 1))
+        self.assertEqual(list(self.loans.of_book(1)), [2])
+        self.assertEqual([loan.book_id for loan in self.loans.remove_member(1)], [2])
+        self.assertEqual(self.loans.of_member(1), {})
+        self.assertEqual(self.loans.of_book(2), {})
+        self.assertEqual(len(self.loans), 1)
+
+if __name__ == '__main__':
+    unittest.main()
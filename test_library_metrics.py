@@ -0,0 +1,86 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from Library_cli import Book, Library, Member, NotAvailableError
+from library_metrics import Metrics, OperationStats, instrument, percentile, uninstrument
+from library_render import Console
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library()
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        self.library.add_member(Member(1, "Alice"))
+        self.library.add_member(Member(2, "Bob"))
+        self.metrics = instrument(self.library)
+
+    def test_counts_calls_and_errors(self):
+        self.library.issue_book(1, 1)
+        with self.assertRaises(NotAvailableError):
+            self.library.issue_book(2, 1)
+        self.library.search_books("python")
+        stats = self.metrics.stats["issue_book"]
+        self.assertEqual((stats.calls, stats.errors), (2, 1))
+        self.assertEqual(stats.error_types, {"NotAvailableError": 1})
+        self.assertEqual(sum(stats.buckets), 2)
+        self.assertEqual(self.metrics.stats["search_books"].calls, 1)
+        self.assertNotIn("issue_book", vars(Library()))                      # Only the instrumented library is wrapped.
+
+    def test_disable_and_uninstrument(self):
+        self.metrics.enabled = False
+        self.library.issue_book(1, 1)
+        self.assertEqual(self.metrics.stats["issue_book"].calls, 0)
+        uninstrument(self.library)
+        self.assertEqual(self.library.issue_book.__func__, Library.issue_book)
+        self.assertFalse(hasattr(self.library, "metrics"))
+
+    def test_percentiles_from_buckets(self):
+        stats = OperationStats()
+        for elapsed_ns in [1000] * 90 + [1_000_000] * 10:
+            stats.record(elapsed_ns)
+        self.assertLessEqual(stats.percentile(0.5), 1024e-9)
+        self.assertGreaterEqual(stats.percentile(0.5), 1000e-9)
+        self.assertEqual(stats.percentile(0.99), 1e-3)                       # Never more than the slowest call
+
+    def test_percentile_of_sorted_values(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 51)
+        self.assertEqual(percentile(values, 0.99), 100)
+        self.assertEqual(percentile(values, 1.0), 100)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_prometheus_and_json(self):
+        self.library.issue_book(1, 1)
+        with self.assertRaises(NotAvailableError):
+            self.library.issue_book(2, 1)
+        text = self.metrics.to_prometheus()
+        self.assertIn('library_operation_calls_total{operation="issue_book"} 2', text)
+        self.assertIn('library_operation_errors_total{operation="issue_book",error="NotAvailableError"} 1', text)
+        self.assertIn('library_operation_duration_seconds_bucket{operation="issue_book",le="+Inf"} 2', text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            self.metrics.write(path)
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(json.load(file)["operations"]["issue_book"]["errors"], 1)
+
+    def test_slow_calls_are_profiled(self):
+        slow_calls = []
+        metrics = Metrics(slow_threshold=0, profile_every=1, on_slow=slow_calls.append)
+        library = Library()
+        instrument(library, metrics)
+        library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        self.assertEqual(slow_calls[0].operation, "add_book")
+        self.assertIn("insert_book", slow_calls[0].profile)
+        self.assertEqual(list(metrics.slow_calls), slow_calls)
+
+    def test_console_listings_are_timed(self):
+        console = Console(self.library, io.StringIO())
+        console.show_books()
+        console.show_search("python")
+        self.assertEqual(self.metrics.stats["show_books"].calls, 1)
+        self.assertEqual(self.metrics.stats["search_books"].calls, 1)       # Called by show_search
+
+if __name__ == '__main__':
+    unittest.main()
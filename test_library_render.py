@@ -0,0 +1,58 @@
+import io
+import unittest
+from unittest import mock
+from Library_cli import Book, Ebook, Library, Member
+from library_render import BufferedWriter, Console, book_lines
+
+class TestConsole(unittest.TestCase):
+
+    def setUp(self):
+        self.library = Library()
+        self.library.add_books(Book(book_id, f"Title {book_id}", "Author", 1) for book_id in range(1, 6))
+        self.library.add_book(Ebook(6, "Machine Book", "Jane Doe", 5))
+        self.library.add_member(Member(1, "Alice"))
+        self.output = io.StringIO()
+        self.console = Console(self.library, self.output)
+
+    def test_writer_writes_in_blocks(self):
+        target = io.StringIO()
+        writer = BufferedWriter(target, flush_size=10)
+        writer.write("12345")
+        self.assertEqual(target.getvalue(), "")
+        writer.write("67890")
+        self.assertEqual(target.getvalue(), "1234567890")
+        BufferedWriter(None).write("thrown away")
+
+    def test_book_lines_are_lazy(self):
+        lines = book_lines(self.library.iter_books())
+        self.assertEqual(next(lines), "[Book]  ID: 1, Title: Title 1, Author: Author, Copies: 1")
+
+    def test_perform_shows_messages(self):
+        self.console.perform("issue_book", 1, 6)
+        self.console.perform("update_member", 1, "Bob")
+        self.console.flush()
+        self.assertEqual(self.output.getvalue(), "Alice borrowed Ebook 'Machine Book'\nMember 'Alice' renamed to 'Bob'.\n")
+
+    def test_show_books_page(self):
+        self.console.show_books(offset=4, limit=2)
+        self.console.flush()
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(lines[1], "Library Books:")
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[3].startswith("[Ebook] ID: 6"))
+
+    def test_pause_between_pages(self):
+        console = Console(self.library, self.output, page_size=2, pause=True)
+        with mock.patch("builtins.input", side_effect=["", "q", ""]) as prompt:
+            console.show_books()
+        self.assertEqual(prompt.call_count, 3)                                # Two page breaks, then "Press Enter to continue".
+        self.assertEqual(self.output.getvalue().count("[Book]"), 4)
+
+    def test_show_search(self):
+        self.assertEqual(self.console.show_search("machine"), [self.library.get_book(6)])
+        self.console.show_search("nothing")
+        self.console.flush()
+        self.assertIn("No books found matching 'nothing'.", self.output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from library_search import SearchIndex
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(1, "Python Programming", "John Doe")
+        self.index.add(2, "Machine Learning", "Jane Doe")
+        self.index.add(3, "Learning Python", "Guido Smith")
+
+    def test_substring_matches_title_and_author(self):
+        self.assertEqual(self.index.substring("python"), [1, 3])
+        self.assertEqual(self.index.substring("DOE"), [1, 2])
+        self.assertEqual(self.index.substring("ing pyth"), [3])
+        self.assertEqual(self.index.substring("py"), [1, 3])
+        self.assertEqual(self.index.substring("cobol"), [])
+
+    def test_short_terms(self):
+        self.index.add(4, "Go", "Al")
+        self.assertEqual(self.index.substring("g"), [1, 2, 3, 4])
+        self.assertEqual(self.index.substring("go"), [4])
+        self.assertEqual(self.index.substring("al"), [4])
+        self.assertTrue(all(len(gram) == 3 for gram in self.index.grams if gram not in ("go", "al")))
+
+    def test_substring_does_not_match_across_fields(self):
+        self.assertEqual(self.index.substring("programmingjohn"), [])
+
+    def test_empty_term_matches_everything(self):
+        self.assertEqual(self.index.substring(""), [1, 2, 3])
+
+    def test_update_and_remove(self):
+        self.index.add(1, "Advanced Rust", "John Doe")
+        self.assertEqual(self.index.substring("python"), [3])
+        self.assertEqual(self.index.substring("rust"), [1])
+        self.index.remove(3)
+        self.assertEqual(self.index.substring("python"), [])
+        self.assertNotIn("guido", self.index.sorted_words())
+
+    def test_prefix_and_suggest(self):
+        self.assertEqual(self.index.prefix("lea"), [2, 3])
+        self.assertEqual(self.index.suggest("p"), ["programming", "python"])
+        self.assertEqual(self.index.suggest("p", limit=1), ["programming"])
+
+    def test_word_list_is_sorted_on_demand(self):
+        self.index.sorted_words()
+        for book_id in range(10, 1010):                                      # Every book brings unique words, as edition numbers do.
+            self.index.add(book_id, f"Volume {book_id}", f"Editor{book_id}")
+        self.assertEqual(self.index.words, ["doe", "guido", "jane", "john", "learning", "machine", "programming", "python", "smith"])
+        self.assertEqual(self.index.suggest("editor10", 3), ["editor10", "editor100", "editor1000"])
+        self.index.remove(100)
+        self.index.add(100, "Volume 100", "Editor100")                       # Removed and added again before the next lookup
+        self.index.remove(1000)
+        self.assertEqual(self.index.suggest("editor10", 3), ["editor10", "editor100", "editor1001"])
+        self.assertEqual(len(self.index.sorted_words()), len(self.index.word_books))
+
+    def test_ranked(self):
+        self.assertEqual(self.index.ranked("learning python"), [3, 1, 2])
+        self.assertEqual(self.index.ranked("learning python", limit=1), [3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import unittest
+from Library_cli import Book, Ebook, Library, Member
+from library_server import LibraryServer
+from library_sqlite import SQLiteLibrary
+
+class TestLibraryServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.library = Library()
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        self.library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        self.library.add_member(Member(1, "Alice"))
+        self.server = await LibraryServer(self.library, "127.0.0.1", 0).start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.server.close()
+
+    async def send(self, *requests):
+        self.writer.write("".join(json.dumps(request) + "\n" for request in requests).encode("utf-8"))
+        await self.writer.drain()
+        return [json.loads(await self.reader.readline()) for _ in requests]
+
+    async def test_issue_and_return(self):
+        responses = await self.send({"id": 1, "op": "issue_book", "args": {"member_id": 1, "book_id": 1}},
+                                    {"id": 2, "op": "issue_book", "args": [1, 1]},
+                                    {"id": 3, "op": "get_member", "args": [1]},
+                                    {"id": 4, "op": "borrowers_of", "args": [1]},
+                                    {"id": 5, "op": "return_book", "args": [1, 1]})
+        self.assertEqual([response["id"] for response in responses], [1, 2, 3, 4, 5])   # Pipelined answers keep their order.
+        self.assertEqual(responses[0]["result"]["operation"], 0)
+        self.assertFalse(responses[1]["ok"])
+        self.assertEqual(responses[1]["type"], "AlreadyBorrowedError")
+        self.assertIn("already has", responses[1]["error"])
+        self.assertEqual(responses[2]["result"]["borrowed_books"], ["Python Programming"])
+        self.assertEqual([member["member_id"] for member in responses[3]["result"]], [1])
+        self.assertTrue(responses[4]["ok"])
+        self.assertEqual(self.library.get_book(1).copies, 1)
+
+    async def test_crud_and_search(self):
+        responses = await self.send({"id": 1, "op": "add_book", "args": {"book_id": 3, "title": "Data Science", "author": "Jo", "copies": 2}},
+                                    {"id": 2, "op": "add_book", "args": [3, "Again", "Jo", 1]},
+                                    {"id": 3, "op": "search_books", "args": ["book"]},
+                                    {"id": 4, "op": "update_book", "args": {"book_id": 3, "title": "Data Engineering"}},
+                                    {"id": 5, "op": "search_books_prefix", "args": ["data"]},
+                                    {"id": 6, "op": "remove_book", "args": [3]},
+                                    {"id": 7, "op": "list_books", "args": {"limit": 1}})
+        self.assertTrue(responses[0]["ok"])
+        self.assertFalse(responses[1]["ok"])
+        self.assertEqual([book["book_id"] for book in responses[2]["result"]], [2])
+        self.assertEqual(responses[2]["result"][0]["kind"], "ebook")
+        self.assertEqual([book["title"] for book in responses[4]["result"]], ["Data Engineering"])
+        self.assertTrue(responses[5]["ok"])
+        self.assertEqual(len(responses[6]["result"]), 1)
+
+    async def test_history_queries(self):
+        await self.send({"id": 1, "op": "issue_book", "args": [1, 2]}, {"id": 2, "op": "return_book", "args": [1, 2]})
+        transactions, history = await self.send({"id": 3, "op": "query_transactions", "args": {"member_id": 1}},
+                                                {"id": 4, "op": "member_history", "args": [1]})
+        self.assertEqual([t["operation"] for t in transactions["result"]], [1, 2])
+        self.assertTrue(history["result"][0].startswith("Borrowed Ebook 'Machine Book'"))
+
+    async def test_batch_and_errors(self):
+        batch, unknown, bad_arguments = await self.send(
+            {"id": 1, "op": "batch", "requests": [{"id": "a", "op": "add_member", "args": [2, "Bob"]},
+                                                   {"id": "b", "op": "issue_book", "args": [2, 1]}]},
+            {"id": 2, "op": "fly"},
+            {"id": 3, "op": "get_book", "args": {"nope": 1}})
+        self.assertEqual([response["ok"] for response in batch["result"]], [True, True])
+        self.assertEqual(self.library.get_member(2).borrowed_books, ["Python Programming"])
+        self.assertFalse(unknown["ok"])
+        self.assertIn("bad arguments", bad_arguments["error"])
+        self.writer.write(b"not json\n")
+        self.assertEqual(json.loads(await self.reader.readline())["error"], "invalid JSON")
+
+    async def test_bad_argument_types(self):
+        responses = await self.send({"id": 1, "op": "search_books", "args": [5]},
+                                    {"id": 2, "op": "list_books", "args": [-1]},
+                                    {"id": 3, "op": "add_book", "args": {"book_id": 3, "title": "Dune", "author": "Frank", "copies": "3"}},
+                                    {"id": 4, "op": "issue_book", "args": [1, 1.0]},
+                                    {"id": 5, "op": "issue_book", "args": [1, 1]})
+        self.assertEqual([response["ok"] for response in responses], [False, False, False, False, True])
+        self.assertEqual(responses[2]["error"], "copies must be a whole number, got '3'")
+        self.assertIsNone(self.library.get_book(3))
+        broken = LibraryServer(None).execute({"id": 6, "op": "get_book", "args": [1]})   # Unexpected errors are answered as well.
+        self.assertEqual((broken["ok"], broken["type"]), (False, "AttributeError"))
+
+    async def test_deeply_nested_requests(self):
+        nested = b'{"op": "batch", "requests": [' * 2000 + b'{"op": "get_book", "args": [1]}' + b"]}" * 2000  # Too deep for json.dumps, so written out
+        self.writer.write(b"[" * 5000 + b"]" * 5000 + b"\n" + nested + b"\n")
+        too_deep, batch, later = [json.loads(await self.reader.readline()) for _ in range(2)] + await self.send({"id": 2, "op": "get_book", "args": [1]})
+        self.assertEqual(too_deep["error"], "request nested too deeply")
+        self.assertFalse(batch["ok"])                                        # Too deep to decode, or refused as a batch inside a batch
+        self.assertEqual(later["result"]["title"], "Python Programming")     # The connection still answers the requests after them.
+        inner, = self.server.execute({"id": 3, "op": "batch", "requests": [{"id": 4, "op": "batch", "requests": []}]})["result"]
+        self.assertEqual(inner["error"], "a batch cannot contain another batch")
+
+    async def test_holds_without_support(self):
+        self.library.add_member(Member(2, "Bob"))
+        self.library.issue_book(1, 1)
+        placed, = await self.send({"id": 1, "op": "place_hold", "args": [2, 1]})
+        self.assertEqual(placed["result"]["member_id"], 2)
+        server = LibraryServer(SQLiteLibrary())
+        refused = server.execute({"id": 2, "op": "place_hold", "args": [2, 1]})
+        self.assertEqual((refused["ok"], refused["type"]), (False, "NotSupportedError"))
+        server.library.close()
+
+    async def test_many_clients(self):
+        self.library.add_book(Book(3, "Popular", "Jo", 5))
+        self.library.add_members(Member(member_id, f"Member {member_id}") for member_id in range(10, 30))
+
+        async def client(member_id):
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+            writer.write(json.dumps({"id": member_id, "op": "issue_book", "args": [member_id, 3]}).encode("utf-8") + b"\n")
+            response = json.loads(await reader.readline())
+            writer.close()
+            return response["ok"]
+
+        results = await asyncio.gather(*(client(member_id) for member_id in range(10, 30)))
+        self.assertEqual(sum(results), 5)
+        self.assertEqual(self.library.get_book(3).copies, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from Library_cli import (AlreadyBorrowedError, Book, BookNotFoundError, BookOnLoanError, DuplicateIdError, Ebook, Library, Member,
+                         MemberHasLoansError, NotAvailableError, NotBorrowedError)
+from library_sqlite import SQLiteLibrary
+
+class TestSQLiteLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.library = SQLiteLibrary()
+        self.library.add_book(Book(1, "Python Programming", "John Doe", 1))
+        self.library.add_book(Ebook(2, "Machine Book", "Jane Doe", 5))
+        self.library.add_member(Member(1, "Alice"))
+
+    def tearDown(self):
+        self.library.close()
+
+    def test_add_and_get(self):
+        book = self.library.get_book(1)
+        self.assertEqual((book.title, book.author, book.copies), ("Python Programming", "John Doe", 1))
+        self.assertIsInstance(self.library.get_book(2), Ebook)
+        self.assertEqual([book.book_id for book in self.library.books], [1, 2])
+        with self.assertRaises(DuplicateIdError):
+            self.library.add_book(Book(1, "Duplicate", "Someone", 1))
+        with self.assertRaises(DuplicateIdError):
+            self.library.add_member(Member(1, "Bob"))
+
+    def test_issue_and_return(self):
+        self.assertEqual(self.library.issue_book(1, 1).book_id, 1)
+        with self.assertRaises(AlreadyBorrowedError):
+            self.library.issue_book(1, 1)
+        self.library.add_member(Member(2, "Bob"))
+        with self.assertRaises(NotAvailableError):
+            self.library.issue_book(2, 1)
+        self.assertEqual(self.library.issue_book(1, 2).operation, 1)
+        self.assertEqual(self.library.get_book(1).copies, 0)
+        self.assertEqual(self.library.get_member(1).borrowed_books, ["Python Programming", "Machine Book"])
+        self.assertEqual(self.library.return_book(1, 1).operation, 2)
+        with self.assertRaises(NotBorrowedError):
+            self.library.return_book(1, 1)
+        self.assertEqual(self.library.get_book(1).copies, 1)
+        history = self.library.get_member(1).transaction_history
+        self.assertEqual(len(history), 3)
+        self.assertTrue(history[1].startswith("Borrowed Ebook 'Machine Book' on "))
+        self.assertTrue(history[2].startswith("Returned 'Python Programming' on "))
+
+    def test_query_transactions(self):
+        self.library.issue_book(1, 1)
+        self.library.issue_book(1, 2)
+        self.library.return_book(1, 1)
+        self.assertEqual([t.book_id for t in self.library.query_transactions(member_id=1)], [1, 2, 1])
+        self.assertEqual(len(self.library.query_transactions(book_id=1)), 2)
+        self.assertEqual([t.book_id for t in self.library.query_transactions(offset=1, limit=1)], [2])
+        self.assertEqual(self.library.query_transactions(end=0), [])
+
+    def test_update_and_remove(self):
+        self.library.update_book(1, title="Advanced Python", copies=4)
+        self.library.update_book(2, author="", file_size=7)
+        self.library.update_member(1, "Bob")
+        self.assertEqual((self.library.get_book(1).title, self.library.get_book(1).copies), ("Advanced Python", 4))
+        self.assertEqual((self.library.get_book(2).author, self.library.get_book(2).file_size), ("Jane Doe", 7))
+        self.assertEqual(self.library.get_member(1).name, "Bob")
+        self.assertEqual(self.library.remove_book(1).title, "Advanced Python")
+        with self.assertRaises(BookNotFoundError):
+            self.library.remove_book(1)
+        self.assertEqual(self.library.remove_member(1).name, "Bob")
+        self.assertIsNone(self.library.get_member(1))
+
+    def test_loans_by_book(self):
+        self.library.add_member(Member(2, "Bob"))
+        self.library.issue_book(1, 2)
+        self.library.issue_book(2, 2)
+        self.assertEqual([member.name for member in self.library.borrowers_of(2)], ["Alice", "Bob"])
+        self.library.update_book(2, title="Deep Book")
+        self.assertEqual(self.library.get_member(1).borrowed_books, ["Deep Book"])
+        self.library.return_book(1, 2)
+        with self.assertRaises(BookOnLoanError):
+            self.library.remove_book(2)
+        self.assertEqual(self.library.remove_books([1, 2]), 1)
+        self.assertEqual([member.name for member in self.library.borrowers_of(2)], ["Bob"])
+
+    def test_search(self):
+        self.library.update_book(1, title="Advanced Python")
+        self.assertEqual([book.book_id for book in self.library.search_books("python")], [1])
+        self.assertEqual([book.book_id for book in self.library.search_books("doe")], [1, 2])
+        self.assertEqual([book.book_id for book in self.library.search_books("ma")], [2])
+        self.assertEqual([book.book_id for book in self.library.search_books("100%")], [])
+        self.assertEqual([book.book_id for book in self.library.search_books_prefix("jane")], [2])
+
+    def test_prefix_and_ranked_search_match_library(self):
+        library = Library()
+        library.add_books([Book(1, "Python Programming", "John Doe", 1), Ebook(2, "Machine Book", "Jane Doe", 5)])
+        for target in (library, self.library):
+            target.add_books([Book(3, "Learning Python", "Guido Smith", 1), Book(4, "The Go Programming Language", "Alan Donovan", 1)])
+        for full_text_search in (True, False):                               # With and without the full-text indexes
+            self.library.full_text_search = full_text_search and self.library.full_text_search
+            for prefix in ("pro", "PY", "d", "go", "lan", "smith", "", "machine book"):
+                self.assertEqual([book.book_id for book in self.library.search_books_prefix(prefix)],
+                                 [book.book_id for book in library.search_books_prefix(prefix)], prefix)
+            self.assertEqual([book.book_id for book in self.library.search_books_prefix("p", 2)], [1, 3])
+            for query in ("learning python", "doe go", "o", "programming language"):
+                self.assertEqual([book.book_id for book in self.library.search_books_ranked(query)],
+                                 [book.book_id for book in library.search_books_ranked(query)], query)
+            self.assertEqual([book.book_id for book in self.library.search_books_ranked("python", 1)], [1])
+
+    def test_bulk_operations(self):
+        added = self.library.add_books(Book(book_id, f"Title {book_id}", "Bulk Author", 2) for book_id in range(1, 101))
+        self.assertEqual(added, 98)
+        self.assertEqual(self.library.add_members([Member(2, "Bob"), Member(1, "Alice")]), 1)
+        self.assertEqual(self.library.update_copies([(10, 5), (11, 6), (2, 9)]), 2)
+        self.assertEqual(self.library.get_book(11).copies, 6)
+        self.assertEqual(len(self.library.search_books("title 5")), 11)
+        self.assertEqual(self.library.remove_books(range(50, 200)), 51)
+        self.library.issue_book(2, 10)
+        self.assertEqual(self.library.remove_members([1, 2, 3]), 1)          # Bob has a book borrowed and stays.
+        with self.assertRaises(MemberHasLoansError):
+            self.library.remove_member(2)
+        self.assertEqual(len(self.library.books), 49)
+
+    def test_reopen_database_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "library.db")
+            library = SQLiteLibrary(path)
+            library.add_book(Book(1, "Python Programming", "John Doe", 1))
+            library.close()
+            library = SQLiteLibrary(path)
+            self.assertEqual(library.get_book(1).title, "Python Programming")
+            library.close()
+
+if __name__ == '__main__':
+    unittest.main()
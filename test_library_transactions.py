@@ -0,0 +1,41 @@
+import unittest
+from library_transactions import BORROW, BORROW_EBOOK, RETURN, Transaction, TransactionLog
+
+class TestTransactionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.log = TransactionLog()
+        self.log.append(BORROW, 1, 10, 1000, "Python Programming")
+        self.log.append(BORROW_EBOOK, 2, 20, 2000, "Machine Book")
+        self.log.append(RETURN, 1, 10, 3000, "Python Programming")
+        self.log.append(BORROW, 2, 10, 4000, "Python Programming")
+
+    def test_query_by_member_and_book(self):
+        self.assertEqual(self.log.query(member_id=1), [Transaction(BORROW, 1, 10, 1000), Transaction(RETURN, 1, 10, 3000)])
+        self.assertEqual([t.member_id for t in self.log.query(book_id=10)], [1, 1, 2])
+        self.assertEqual(self.log.query(member_id=2, book_id=10), [Transaction(BORROW, 2, 10, 4000)])
+        self.assertEqual(self.log.query(member_id=3), [])
+
+    def test_query_time_range_and_pages(self):
+        self.assertEqual([t.timestamp for t in self.log.query(start=2000, end=4000)], [2000, 3000])
+        self.assertEqual([t.timestamp for t in self.log.query(book_id=10, start=1500)], [3000, 4000])
+        self.assertEqual([t.timestamp for t in self.log.query(offset=1, limit=2)], [2000, 3000])
+
+    def test_time_range_when_out_of_order(self):
+        self.log.append(RETURN, 2, 20, 1500, "Machine Book")
+        self.assertFalse(self.log.in_time_order)
+        self.assertEqual([t.timestamp for t in self.log.query(end=2000)], [1000, 1500])
+
+    def test_format(self):
+        text = self.log.format(1)
+        self.assertTrue(text.startswith("Borrowed Ebook 'Machine Book' on "))
+
+    def test_entries_keep_their_title(self):
+        self.log.append(RETURN, 2, 10, 5000, "Advanced Python")
+        self.assertEqual([text.split(" on ")[0] for text in self.log.history(2)],
+                         ["Borrowed Ebook 'Machine Book'", "Borrowed 'Python Programming'", "Returned 'Advanced Python'"])
+        self.assertEqual(self.log.title_of(10), "Advanced Python")
+        self.assertEqual(self.log.titles.count("Python Programming"), 1)     # Each distinct title is stored once.
+
+if __name__ == '__main__':
+    unittest.main()